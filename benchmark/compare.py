@@ -0,0 +1,63 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse, json, sys
+
+def parse_commandline():
+    parser = argparse.ArgumentParser(description = "Compare two benchmark results")
+    parser.add_argument('-t', '--threshold', type = float, default = 10.0, \
+                        help = "percentage a stage may be slower before it is reported " + \
+                               "as a regression (default: %(default)s)")
+    parser.add_argument('--min-seconds', type = float, default = 0.01, \
+                        help = "stages faster than this in both runs are never reported " + \
+                               "as a regression (default: %(default)s)")
+    parser.add_argument('baseline', help = "json file written by run.py")
+    parser.add_argument('current', help = "json file written by run.py")
+    return parser.parse_args()
+
+
+def load_results(filename):
+    with open(filename, 'r') as f:
+        report = json.load(f)
+    return { (r['shape'], r['points'], r['stage']): r['seconds'] for r in report['results'] }
+
+
+# MAIN
+parameters = parse_commandline()
+baseline = load_results(parameters.baseline)
+current = load_results(parameters.current)
+
+amount_regressions = 0
+print("%-12s %10s %-30s %10s %10s %8s" % \
+        ("shape", "points", "stage", "baseline", "current", "change"))
+for key in sorted(baseline.keys() & current.keys()):
+    change = (current[key] - baseline[key]) / baseline[key] * 100 if baseline[key] > 0 else 0.0
+    regression = change > parameters.threshold and \
+                 max(baseline[key], current[key]) >= parameters.min_seconds
+    if regression:
+        amount_regressions += 1
+    print("%-12s %10d %-30s %10.4f %10.4f %+7.1f%%%s" % \
+            (key + (baseline[key], current[key], change, " REGRESSION" if regression else "")))
+
+for key in sorted(baseline.keys() ^ current.keys()):
+    print("%-12s %10d %-30s only in %s" % \
+            (key + (parameters.baseline if key in baseline else parameters.current, )))
+
+print("%d regressions" % amount_regressions)
+sys.exit(1 if amount_regressions > 0 else 0)
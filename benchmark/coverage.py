@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse, contextlib, io, math, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from hikingmap import AreaIndex, Track, Tracks, TrackFinder
+
+def parse_commandline():
+    parser = argparse.ArgumentParser(description = "Page coverage query benchmark")
+    parser.add_argument('-l', '--lengths', dest = 'lengths', type = float, nargs = '+', \
+                        default = [ 100, 200, 400, 800, 1600 ], \
+                        help = "track lengths in km (default: %(default)s)")
+    return parser.parse_args()
+
+
+def generate_track(length_km):
+    # meandering track heading east, one point every 20 m
+    track = Track()
+    km_per_degree_lat = 40041.44 / 360.0
+    km_per_degree_lon = km_per_degree_lat * math.cos(math.radians(45.0))
+    for i in range(int(length_km / 0.02)):
+        x = i * 0.02 * 0.8
+        y = math.sin(x / 5.0) * 8.0
+        track.append(4.0 + x / km_per_degree_lon, 45.0 + y / km_per_degree_lat)
+    return track
+
+
+def time_queries(track, contains_coord):
+    start = time.perf_counter()
+    for coord in track:
+        contains_coord(coord)
+    return time.perf_counter() - start
+
+
+# MAIN
+parameters = parse_commandline()
+print("%8s %8s %8s %12s %12s %12s" % \
+        ("km", "points", "pages", "layout (s)", "list (s)", "index (s)"))
+for length in parameters.lengths:
+    tracks = Tracks()
+    tracks.tracks = [ generate_track(length) ]
+
+    trackfinder = TrackFinder(50000, 20.0, 28.7, 1.0, False)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        trackfinder.calculate_pages(tracks)
+    layout_time = time.perf_counter() - start
+
+    areaindex = AreaIndex()
+    for page in trackfinder.pages:
+        areaindex.append(page)
+    list_time = time_queries(tracks.tracks[0], \
+                             lambda c: any(a.contains_coord(c) for a in trackfinder.pages))
+    index_time = time_queries(tracks.tracks[0], areaindex.contains_coord)
+
+    print("%8d %8d %8d %12.3f %12.3f %12.3f" % \
+            (length, len(tracks.tracks[0]), len(trackfinder.pages), \
+             layout_time, list_time, index_time))
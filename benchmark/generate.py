@@ -0,0 +1,104 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse, math, random
+
+SHAPES = [ 'randomwalk', 'outandback', 'loop', 'segments' ]
+
+# global constants
+km_per_degree_lat = 40041.44 / 360.0
+step_km = 0.02
+
+def parse_commandline():
+    parser = argparse.ArgumentParser(description = "Deterministic synthetic GPX generator")
+    parser.add_argument('-s', '--shape', choices = SHAPES, default = 'randomwalk', \
+                        help = "shape of the generated track (default: %(default)s)")
+    parser.add_argument('-n', '--points', type = int, default = 10000, \
+                        help = "total amount of points (default: %(default)s)")
+    parser.add_argument('--segment-points', type = int, default = 100, \
+                        help = "points per segment for the segments shape (default: %(default)s)")
+    parser.add_argument('--seed', type = int, default = 1, \
+                        help = "random seed (default: %(default)s)")
+    parser.add_argument('output', help = "output gpx file")
+    return parser.parse_args()
+
+
+def random_walk(amount_points, generator, lon = 4.0, lat = 45.0):
+    # one point every 20 m, the heading changes slowly
+    points = list()
+    heading = generator.uniform(0, 2 * math.pi)
+    for i in range(amount_points):
+        points.append((lon, lat))
+        heading += generator.gauss(0, 0.15)
+        lon += step_km * math.sin(heading) / (km_per_degree_lat * math.cos(math.radians(lat)))
+        lat += step_km * math.cos(heading) / km_per_degree_lat
+    return points
+
+
+def loop(amount_points, generator, lon = 4.0, lat = 45.0):
+    # a circle with some noise, the last point equals the first one
+    radius_km = amount_points * step_km / (2 * math.pi)
+    points = list()
+    for i in range(amount_points - 1):
+        angle = 2 * math.pi * i / (amount_points - 1)
+        r = radius_km * (1 + generator.uniform(-0.01, 0.01))
+        points.append((lon + r * math.sin(angle) / \
+                                (km_per_degree_lat * math.cos(math.radians(lat))), \
+                       lat + r * (math.cos(angle) - 1) / km_per_degree_lat))
+    points.append(points[0])
+    return points
+
+
+# Returns a list of tracks, every track is a list of (lon, lat) tuples
+def generate_tracks(shape, amount_points, seed = 1, segment_points = 100):
+    generator = random.Random(seed)
+    if shape == 'randomwalk':
+        return [ random_walk(amount_points, generator) ]
+    elif shape == 'outandback':
+        out = random_walk(amount_points // 2 + 1, generator)
+        return [ out + out[-2::-1] ]
+    elif shape == 'loop':
+        return [ loop(max(amount_points, 3), generator) ]
+    else:
+        # a random walk cut in connecting segments, shuffled and half of them reversed
+        points = random_walk(amount_points, generator)
+        tracks = [ points[i:i + segment_points + 1] \
+                        for i in range(0, max(len(points) - 1, 1), segment_points) ]
+        generator.shuffle(tracks)
+        return [ track[::-1] if generator.random() < 0.5 else track for track in tracks ]
+
+
+def write_gpx(tracks, filename):
+    with open(filename, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<gpx creator="hikingmap benchmark" version="1.0" ' + \
+                'xmlns="http://www.topografix.com/GPX/1/0">\n')
+        for (trackindex, track) in enumerate(tracks):
+            f.write('  <trk>\n    <name>track %03d</name>\n    <trkseg>\n' % trackindex)
+            f.writelines('      <trkpt lat="%.7f" lon="%.7f"/>\n' % (lat, lon) \
+                                for (lon, lat) in track)
+            f.write('    </trkseg>\n  </trk>\n')
+        f.write('</gpx>\n')
+
+
+if __name__ == '__main__':
+    parameters = parse_commandline()
+    write_gpx(generate_tracks(parameters.shape, parameters.points, parameters.seed, \
+                              parameters.segment_points), \
+              parameters.output)
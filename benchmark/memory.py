@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse, math, os, sys, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from hikingmap import Coordinate, Track
+
+class DictCoordinate:
+    '''
+    Coordinate as it was stored before Track existed: one object per point
+    with a __dict__ holding degrees and radians
+    '''
+    def __init__(self, lon, lat):
+        self.lon = lon
+        self.lat = lat
+        self.lon_radians = math.radians(lon)
+        self.lat_radians = math.radians(lat)
+
+
+def parse_commandline():
+    parser = argparse.ArgumentParser(description = "Track storage memory benchmark")
+    parser.add_argument('-n', '--points', dest = 'points', type = int, default = 1000000, \
+                        help = "amount of track points (default: %(default)s)")
+    return parser.parse_args()
+
+
+def generate_points(amount):
+    for i in range(amount):
+        yield (4.0 + i * 1e-6, 50.0 + math.sin(i * 1e-3) * 1e-2)
+
+
+def measure(description, amount, build):
+    tracemalloc.start()
+    container = build(amount)
+    (current, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("%-32s %12d bytes %8.1f bytes/point" % (description, current, current / amount))
+    del container
+
+
+def build_dict_coordinates(amount):
+    return [ DictCoordinate(lon, lat) for (lon, lat) in generate_points(amount) ]
+
+
+def build_coordinates(amount):
+    return [ Coordinate(lon, lat) for (lon, lat) in generate_points(amount) ]
+
+
+def build_track(amount):
+    track = Track()
+    for (lon, lat) in generate_points(amount):
+        track.append(lon, lat)
+    return track
+
+
+# MAIN
+parameters = parse_commandline()
+print("Memory used to store %d track points:" % parameters.points)
+measure("list of Coordinate (__dict__)", parameters.points, build_dict_coordinates)
+measure("list of Coordinate (__slots__)", parameters.points, build_coordinates)
+measure("Track (float64 arrays)", parameters.points, build_track)
@@ -0,0 +1,140 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse, contextlib, io, json, os, platform, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from hikingmap import Tracks, TrackFinder
+from hikingmap.tracks import numpy
+from generate import SHAPES, generate_tracks, write_gpx
+
+def parse_commandline():
+    parser = argparse.ArgumentParser(description = "Time every stage of hikingmap")
+    parser.add_argument('-s', '--shapes', choices = SHAPES, nargs = '+', default = SHAPES, \
+                        help = "shapes of the generated tracks (default: %(default)s)")
+    parser.add_argument('-n', '--points', type = int, nargs = '+', \
+                        default = [ 1000, 10000, 100000 ], \
+                        help = "amount of points of the generated tracks (default: %(default)s)")
+    parser.add_argument('--permutation-points', type = int, default = 10000, \
+                        help = "largest amount of points for which the track permutations " + \
+                               "are calculated (default: %(default)s)")
+    parser.add_argument('-r', '--repeat', type = int, default = 3, \
+                        help = "amount of runs, the fastest one is reported (default: %(default)s)")
+    parser.add_argument('-o', '--output', \
+                        help = "write the results to this json file")
+    return parser.parse_args()
+
+
+# Runs function repeat times and returns the shortest duration and the last result
+def measure(function, repeat):
+    durations = list()
+    for i in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = function()
+            durations.append(time.perf_counter() - start)
+    return (min(durations), result)
+
+
+# Split a track in 6 tracks, to calculate all 720 track permutations. The last
+# track contains the remaining points.
+def split_track(track):
+    size = max(len(track) // 6, 2)
+    starts = list(range(0, len(track), size))[:6]
+    return [ track[start:end] for (start, end) in zip(starts, starts[1:] + [ len(track) ]) ]
+
+
+def run_stages(gpxfile, amount_points, parameters):
+    results = dict()
+
+    def parse():
+        tracks = Tracks()
+        tracks.parse_files([ gpxfile ])
+        return tracks
+    (results['parse_files'], tracks) = measure(parse, parameters.repeat)
+    (results['read_tracks'], _) = \
+        measure(lambda: Tracks.read_gpx(gpxfile), parameters.repeat)
+    # parse_files reads and joins the tracks
+    results['join_tracks'] = max(results['parse_files'] - results['read_tracks'], 0.0)
+
+    def waypoints():
+        waypoint_tracks = Tracks()
+        waypoint_tracks.tracks = tracks.tracks
+        waypoint_tracks.calculate_waypoints(1, 'km')
+        return waypoint_tracks
+    (results['calculate_waypoints'], waypoint_tracks) = measure(waypoints, parameters.repeat)
+    def write_waypoints():
+        waypoint_tracks.write_waypoints_tempfile()
+        os.remove(waypoint_tracks.tempwaypointfile)
+        waypoint_tracks.tempwaypointfile = None
+    (results['write_waypoints_tempfile'], _) = measure(write_waypoints, parameters.repeat)
+
+    def layout(layout_tracks):
+        trackfinder = TrackFinder(50000, 20.0, 28.7, 1.0, False)
+        trackfinder.calculate_pages(layout_tracks)
+        return trackfinder
+    (results['calculate_pages'], trackfinder) = \
+        measure(lambda: layout(tracks), parameters.repeat)
+
+    if amount_points <= parameters.permutation_points and len(tracks.tracks) == 1:
+        permutation_tracks = Tracks()
+        permutation_tracks.tracks = split_track(tracks.tracks[0])
+        (results['calculate_pages_permutations'], _) = \
+            measure(lambda: layout(permutation_tracks), parameters.repeat)
+
+    pages = list(trackfinder.pages)
+    def overview():
+        trackfinder.pages = list(pages)
+        trackfinder.add_overview_page()
+        os.remove(trackfinder.tempoverviewfile)
+        trackfinder.tempoverviewfile = None
+    (results['add_overview_page'], _) = measure(overview, parameters.repeat)
+
+    overview_pages = list(trackfinder.pages)
+    def reorder():
+        trackfinder.pages = list(overview_pages)
+        trackfinder.reorder_pages('book')
+    (results['reorder_pages'], _) = measure(reorder, parameters.repeat)
+
+    return (results, len(trackfinder.pages))
+
+
+# MAIN
+parameters = parse_commandline()
+report = { 'python': platform.python_version(), \
+           'platform': platform.platform(), \
+           'numpy': numpy is not None, \
+           'results': list() }
+
+with tempfile.TemporaryDirectory(prefix = 'hikingmap_benchmark') as tempdir:
+    for shape in parameters.shapes:
+        for amount_points in parameters.points:
+            gpxfile = os.path.join(tempdir, '%s_%d.gpx' % (shape, amount_points))
+            write_gpx(generate_tracks(shape, amount_points), gpxfile)
+
+            (results, amount_pages) = run_stages(gpxfile, amount_points, parameters)
+            for (stage, seconds) in results.items():
+                print("%-12s %10d %-30s %10.4f" % (shape, amount_points, stage, seconds))
+                report['results'].append({ 'shape': shape, 'points': amount_points, \
+                                           'stage': stage, 'seconds': seconds })
+            os.remove(gpxfile)
+
+if parameters.output:
+    with open(parameters.output, 'w') as f:
+        json.dump(report, f, indent = 2)
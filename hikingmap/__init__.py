@@ -3,5 +3,13 @@
 from .coordinate import Coordinate
 from .area import Area
 from .page import Page
+from .renderresult import RenderResult
+from .renderer import RenderRequest
+from .rendercache import RenderCache
+from .layoutcache import LayoutCache
+from .areaindex import AreaIndex
+from .endpointindex import EndpointIndex
+from .track import Track
 from .tracks import Tracks
 from .trackfinder import TrackFinder
+from .api import LayoutCalculator, calculate_layout
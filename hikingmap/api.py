@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from .page import Page
+from .track import Track
+from .tracks import Tracks
+from .trackfinder import TrackFinder
+
+class LayoutCalculator:
+    '''
+    Calculates the pages for tracks held in memory and returns them as plain data.
+    Nothing is printed unless a log function is given, no files are read or written
+    and no processes are started. The parameters are fixed when the calculator is
+    created and every calculation uses its own Tracks and TrackFinder, so a single
+    calculator can be used from multiple threads at the same time.
+    '''
+    def __init__(self, scale=50000, pagewidth=20.0, pageheight=28.7, pageoverlap=1.0, \
+                 waypt_distance=1, length_unit='km', join_tolerance=0, \
+                 permutation_order='input', optimize_seconds=0, simplify=0, \
+                 generate_overview=False, page_order='naturalorder', log=None):
+        self.scale = scale
+        self.pagewidth = pagewidth
+        self.pageheight = pageheight
+        self.pageoverlap = pageoverlap
+        self.waypt_distance = waypt_distance
+        self.length_unit = length_unit
+        self.join_tolerance = join_tolerance
+        self.permutation_order = permutation_order
+        self.optimize_seconds = optimize_seconds
+        self.simplify = simplify
+        self.generate_overview = generate_overview
+        self.page_order = page_order
+        self.log = log if log is not None else self.__discard
+
+
+    @staticmethod
+    def __discard(message):
+        pass
+
+
+    @staticmethod
+    def __to_track(points):
+        if isinstance(points, Track):
+            return Track(points.lon, points.lat)
+        elif hasattr(points, 'shape'):
+            # array with a row for every point
+            return Track(points[:, 0].tolist(), points[:, 1].tolist())
+        else:
+            track = Track()
+            for (lon, lat) in points:
+                track.append(lon, lat)
+            return track
+
+
+    @staticmethod
+    def __page_to_dict(page):
+        if page is None:
+            # blank page in book page order
+            return None
+        return { 'pageindex': page.pageindex, \
+                 'orientation': 'landscape' if page.orientation == Page.orientation_landscape \
+                                            else 'portrait', \
+                 'pagewidth': page.get_page_width(), \
+                 'pageheight': page.get_page_height(), \
+                 'scale': page.scale, \
+                 'minlon': page.minlon, \
+                 'minlat': page.minlat, \
+                 'maxlon': page.maxlon, \
+                 'maxlat': page.maxlat }
+
+
+    def calculate(self, tracks):
+        '''
+        Calculate the pages for a list of tracks, every track is a Track, a sequence of
+        (lon, lat) tuples in degrees or an array with a lon and lat column.
+        Returns a dict with the track order, the pages in page order with their
+        bounding box and orientation, and the waypoints of every joined track.
+        '''
+        layout_tracks = Tracks(self.log)
+        layout_tracks.add_tracks([ ('track %d' % trackindex, self.__to_track(points)) \
+                                        for (trackindex, points) in enumerate(tracks) ], \
+                                 self.join_tolerance)
+
+        if self.waypt_distance > 0:
+            layout_tracks.calculate_waypoints(self.waypt_distance, self.length_unit)
+
+        trackfinder = TrackFinder(self.scale, self.pagewidth, self.pageheight, \
+                                  self.pageoverlap, False, self.log)
+        if self.simplify > 0:
+            # the tolerance on paper in mm converted to meters on the ground
+            layout_tracks.simplify(self.simplify / 1000 * self.scale)
+            trackfinder.calculate_simplified_pages(layout_tracks, 1, self.permutation_order, \
+                                                   self.optimize_seconds)
+        else:
+            trackfinder.calculate_pages(layout_tracks, 1, self.permutation_order, \
+                                        self.optimize_seconds)
+
+        if self.generate_overview:
+            trackfinder.add_overview_page(False)
+        trackfinder.reorder_pages(self.page_order)
+
+        return { 'trackorder': list(trackfinder.trackorder), \
+                 'pages': [ self.__page_to_dict(page) for page in trackfinder.pages ], \
+                 'waypoints': [ [ { 'lon': waypoint.lon, \
+                                    'lat': waypoint.lat, \
+                                    'description': description } \
+                                        for (waypoint, description) in track_waypoints ] \
+                                            for track_waypoints in layout_tracks.waypoints ] }
+
+
+def calculate_layout(tracks, **parameters):
+    '''
+    Calculate the pages for a list of tracks in memory, see LayoutCalculator
+    '''
+    return LayoutCalculator(**parameters).calculate(tracks)
@@ -66,10 +66,57 @@ class Area:
         return self.maxlat - self.minlat
 
 
+    # surface on the ground in km2
+    def surface(self):
+        width = self._convert_degrees_lon_to_cm(self.sizelon(), (self.minlat + self.maxlat) / 2)
+        height = self._convert_degrees_lat_to_cm(self.sizelat())
+        return width * height / CM_TO_KM_FACTOR ** 2
+
+
     def contains_coord(self, coord):
         return self.minlon <= coord.lon <= self.maxlon and self.minlat <= coord.lat <= self.maxlat
 
 
+    def intersects(self, area):
+        return self.minlon <= area.maxlon and area.minlon <= self.maxlon and \
+               self.minlat <= area.maxlat and area.minlat <= self.maxlat
+
+
+    def clip_line(self, start, end):
+        '''
+        Clip the line [start-end] to this area using the Liang-Barsky algorithm.
+        Returns the part of the line inside the area as a (start, end) tuple, in
+        which the original coordinates are kept when they are inside the area, or
+        None when the line does not intersect the area.
+        '''
+        delta_lon = end.lon - start.lon
+        delta_lat = end.lat - start.lat
+        t_start = 0.0
+        t_end = 1.0
+        for (p, q) in [ (-delta_lon, start.lon - self.minlon), \
+                        (delta_lon, self.maxlon - start.lon), \
+                        (-delta_lat, start.lat - self.minlat), \
+                        (delta_lat, self.maxlat - start.lat) ]:
+            if p == 0:
+                # parallel to this border, entirely outside when q < 0
+                if q < 0:
+                    return None
+            elif p < 0:
+                # entering the area
+                t_start = max(t_start, q / p)
+            else:
+                # leaving the area
+                t_end = min(t_end, q / p)
+            if t_start > t_end:
+                return None
+
+        clipped_start = start if t_start == 0.0 else \
+                        Coordinate(start.lon + t_start * delta_lon, start.lat + t_start * delta_lat)
+        clipped_end = end if t_end == 1.0 else \
+                      Coordinate(start.lon + t_end * delta_lon, start.lat + t_end * delta_lat)
+        return (clipped_start, clipped_end)
+
+
     def to_string(self):
         return Coordinate(self.minlon, self.minlat).to_string() + " - " + \
                Coordinate(self.maxlon, self.maxlat).to_string()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+
+class AreaIndex:
+    '''
+    List of areas with a uniform grid index on their boundaries, the grid cell
+    size is the size of the first area added. Point queries only check the
+    areas registered in the grid cell of the point, in insertion order.
+    '''
+    def __init__(self):
+        self.areas = list()
+        self.__cells = dict()
+        self.__cellsizelon = None
+        self.__cellsizelat = None
+
+
+    def __len__(self):
+        return len(self.areas)
+
+
+    def __iter__(self):
+        return iter(self.areas)
+
+
+    def __getitem__(self, index):
+        return self.areas[index]
+
+
+    def __get_cell(self, lon, lat):
+        return (math.floor(lon / self.__cellsizelon), math.floor(lat / self.__cellsizelat))
+
+
+    def append(self, area):
+        if self.__cellsizelon is None:
+            self.__cellsizelon = area.sizelon() if area.sizelon() > 0 else 1.0
+            self.__cellsizelat = area.sizelat() if area.sizelat() > 0 else 1.0
+
+        areaindex = len(self.areas)
+        self.areas.append(area)
+
+        (mincelllon, mincelllat) = self.__get_cell(area.minlon, area.minlat)
+        (maxcelllon, maxcelllat) = self.__get_cell(area.maxlon, area.maxlat)
+        for celllon in range(mincelllon, maxcelllon + 1):
+            for celllat in range(mincelllat, maxcelllat + 1):
+                self.__cells.setdefault((celllon, celllat), list()).append(areaindex)
+
+
+    # remove all areas except the first amount_areas
+    def truncate(self, amount_areas):
+        while len(self.areas) > amount_areas:
+            area = self.areas.pop()
+
+            (mincelllon, mincelllat) = self.__get_cell(area.minlon, area.minlat)
+            (maxcelllon, maxcelllat) = self.__get_cell(area.maxlon, area.maxlat)
+            for celllon in range(mincelllon, maxcelllon + 1):
+                for celllat in range(mincelllat, maxcelllat + 1):
+                    cell = self.__cells[(celllon, celllat)]
+                    # indices are in ascending order, the removed area is the last one
+                    cell.pop()
+                    if not cell:
+                        del self.__cells[(celllon, celllat)]
+
+
+    # indices of all areas which may contain coord, in insertion order
+    def get_candidate_indices(self, coord):
+        if self.__cellsizelon is None:
+            return []
+        return self.__cells.get(self.__get_cell(coord.lon, coord.lat), [])
+
+
+    # indices of all areas which may intersect area, in insertion order
+    def get_overlapping_indices(self, area):
+        if self.__cellsizelon is None:
+            return []
+        (mincelllon, mincelllat) = self.__get_cell(area.minlon, area.minlat)
+        (maxcelllon, maxcelllat) = self.__get_cell(area.maxlon, area.maxlat)
+        if mincelllon == maxcelllon and mincelllat == maxcelllat:
+            return self.__cells.get((mincelllon, mincelllat), [])
+        if (maxcelllon - mincelllon + 1) * (maxcelllat - mincelllat + 1) > len(self.areas):
+            # checking all areas is cheaper than visiting all cells
+            return range(len(self.areas))
+        indices = set()
+        for celllon in range(mincelllon, maxcelllon + 1):
+            for celllat in range(mincelllat, maxcelllat + 1):
+                indices.update(self.__cells.get((celllon, celllat), []))
+        return sorted(indices)
+
+
+    # all areas which may contain coord, in insertion order
+    def get_candidates(self, coord):
+        if self.__cellsizelon is None:
+            return []
+        return [ self.areas[i] for i in self.__cells.get(self.__get_cell(coord.lon, coord.lat), []) ]
+
+
+    def contains_coord(self, coord):
+        if self.__cellsizelon is None:
+            return False
+        return any(self.areas[i].contains_coord(coord) \
+                        for i in self.__cells.get(self.__get_cell(coord.lon, coord.lat), []))
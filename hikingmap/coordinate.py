@@ -20,6 +20,8 @@ import math
 from lxml import etree
 
 class Coordinate:
+    __slots__ = ('lon', 'lat', 'lon_radians', 'lat_radians')
+
     # lon and lat are coordinates, by default in degrees
     def __init__(self, lon, lat, isDegrees = True):
         if isDegrees:
@@ -61,7 +63,7 @@ class Coordinate:
 
 
     @staticmethod
-    def __get_earth_radius(length_unit):
+    def get_earth_radius(length_unit):
         if length_unit == "mi":
             return 3959
         else: # default to km
@@ -80,7 +82,7 @@ class Coordinate:
             math.cos(self.lat_radians) * math.cos(coord.lat_radians)
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
 
-        return self.__get_earth_radius(length_unit) * c
+        return self.get_earth_radius(length_unit) * c
 
 
     def calc_waypoint_on_line(self, dest_coord, distance, length_unit):
@@ -89,7 +91,7 @@ class Coordinate:
         from self in the direction of dest_coord
         '''
         b = self.bearing(dest_coord)
-        earth_radius = self.__get_earth_radius(length_unit)
+        earth_radius = self.get_earth_radius(length_unit)
         return Coordinate(#lon
                           self.lon_radians + \
                           math.atan2(math.sin(b) * \
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+from .coordinate import Coordinate
+
+class EndpointIndex:
+    '''
+    Index on the endpoints of tracks. Without tolerance two endpoints match when
+    their coordinates are equal, otherwise when they are at most tolerance meters
+    apart. In that case a uniform grid is used with cells of tolerance meters in
+    latitude, only the cells within reach of a point are searched.
+    '''
+    def __init__(self, tolerance=0):
+        self.tolerance = tolerance
+        self.__cells = dict()
+        if tolerance > 0:
+            self.__cellsize = \
+                math.degrees(tolerance / 1000 / Coordinate.get_earth_radius('km'))
+
+
+    def __get_cell(self, lon, lat):
+        if self.tolerance > 0:
+            return (math.floor(lon / self.__cellsize), math.floor(lat / self.__cellsize))
+        else:
+            return (lon, lat)
+
+
+    def add(self, coord, value):
+        self.__cells.setdefault(self.__get_cell(coord.lon, coord.lat), list()).append((coord, value))
+
+
+    def remove(self, coord, value):
+        cell = self.__get_cell(coord.lon, coord.lat)
+        entries = self.__cells[cell]
+        for (index, (c, v)) in enumerate(entries):
+            if v == value and c.equals(coord):
+                del entries[index]
+                break
+        if not entries:
+            del self.__cells[cell]
+
+
+    # values of all endpoints matching coord
+    def find(self, coord):
+        if self.tolerance <= 0:
+            return [ v for (c, v) in self.__cells.get((coord.lon, coord.lat), []) ]
+
+        # a distance in longitude is longer in degrees further away from the equator
+        maxabslat = min(abs(coord.lat) + self.__cellsize, 90.0)
+        cos_lat = math.cos(math.radians(maxabslat))
+        if cos_lat * 180.0 > self.__cellsize:
+            sizelon = self.__cellsize / cos_lat
+        else:
+            sizelon = 180.0
+
+        (mincelllon, mincelllat) = \
+            self.__get_cell(coord.lon - sizelon, coord.lat - self.__cellsize)
+        (maxcelllon, maxcelllat) = \
+            self.__get_cell(coord.lon + sizelon, coord.lat + self.__cellsize)
+        return [ v for celllon in range(mincelllon, maxcelllon + 1) \
+                       for celllat in range(mincelllat, maxcelllat + 1) \
+                           for (c, v) in self.__cells.get((celllon, celllat), []) \
+                               if coord.distance_haversine(c, 'km') * 1000 <= self.tolerance ]
+
+
+    def matches(self, coord1, coord2):
+        if self.tolerance <= 0:
+            return coord1.equals(coord2)
+        else:
+            return coord1.distance_haversine(coord2, 'km') * 1000 <= self.tolerance
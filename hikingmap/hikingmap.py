@@ -16,12 +16,46 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import re
+import sys
+import time
 import argparse
 from .tracks import Tracks
 from .trackfinder import TrackFinder
+from .rendercache import RenderCache
+from .layoutcache import LayoutCache
+from .trackcache import TrackCache
+from .manifest import Manifest
+from . import profiler
+from . import server
 
-def parse_commandline():
-    parser = argparse.ArgumentParser()
+def add_render_arguments(parser):
+    parser.add_argument('--render-jobs', type=int, default=1, dest='render_jobs', \
+                        help='amount of pages rendered at the same time (default: %(default)s)')
+    parser.add_argument('--render-timeout', type=float, default=None, dest='render_timeout', \
+                        help='maximum time in seconds to render a single page ' + \
+                             '(default: no limit)')
+    parser.add_argument('--render-retries', type=int, default=0, dest='render_retries', \
+                        help='amount of times rendering a page is retried when it fails ' + \
+                             'or times out (default: %(default)s)')
+    parser.add_argument('--render-cache', dest='render_cache', \
+                        help='directory to cache rendered pages, pages which are rendered ' + \
+                             'before with the same parameters are copied from the cache')
+    parser.add_argument('--render-cache-size', type=int, default=1024, dest='render_cache_size', \
+                        help='maximum size of the render cache in MB (default: %(default)s)')
+    parser.add_argument('--no-render-plugins', action='store_false', dest='render_plugins', \
+                        help='always start the render command for every page, even when a ' + \
+                             'renderer plugin with the same name is installed')
+    parser.add_argument('--render-workers', action='store_true', dest='render_workers', \
+                        help='start the render command once as a worker instead of for ' + \
+                             'every page, when it supports running as a worker')
+
+
+def parse_commandline(args=None, prog=None, plan=False):
+    parser = argparse.ArgumentParser(prog=prog)
+    if plan:
+        parser.add_argument('-m', '--manifest', required=True, \
+                            help='directory in which the manifest is written')
     parser.add_argument('-s', '--scale', type=int, default=50000, \
                         help='scale denominator (default: %(default)s)')
     parser.add_argument('--pagewidth', type=float, default=20.0, \
@@ -38,12 +72,60 @@ def parse_commandline():
     parser.add_argument('-u', '--unit', choices=[ 'km', 'mi' ], default='km', dest='length_unit', \
                         help='length unit in which the value of the waypoints parameter ' + \
                              'is expressed (default: %(default)s)')
+    parser.add_argument('--clip-waypoints', action='store_true', dest='clip_waypoints', \
+                        help='write the waypoints of every page to a separate file, ' + \
+                             'only containing the waypoints on the page')
+    parser.add_argument('--clip-tracks', action='store_true', dest='clip_tracks', \
+                        help='write the tracks of every page to a separate file, clipped ' + \
+                             'to the page, and render the pages with this file instead of ' + \
+                             'the gpx files')
+    parser.add_argument('--clip-margin', type=float, default=1.0, dest='clip_margin', \
+                        help='margin in cm around the page within which waypoints and ' + \
+                             'tracks are written for --clip-waypoints and --clip-tracks ' + \
+                             '(default: %(default)s)')
+    parser.add_argument('--join-tolerance', type=float, default=0, dest='join_tolerance', \
+                        help='maximum distance in meters between the endpoints of tracks ' + \
+                             'which are joined (default: %(default)s)')
+    parser.add_argument('--simplify', type=float, default=0, \
+                        help='remove track points closer than N mm on paper to the ' + \
+                             'simplified track before calculating the pages, 0 to disable ' + \
+                             '(default: %(default)s)')
+    parser.add_argument('--simplify-check', action='store_true', dest='simplify_check', \
+                        help='compare the pages of the simplified tracks with the pages of ' + \
+                             'the original tracks')
     parser.add_argument('-o', '--page-order', choices=[ 'naturalorder', 'rectoverso', 'book' ], \
                         default='naturalorder', dest='page_order', \
                         help='order in which pages are generated (default: %(default)s)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, \
+                        help='amount of processes used to calculate the track permutations ' + \
+                             '(default: %(default)s)')
+    parser.add_argument('--permutation-order', choices=[ 'input', 'nearest' ], default='input', \
+                        dest='permutation_order', \
+                        help='order in which the track permutations are evaluated, ' + \
+                             'either the input order or the nearest next track first ' + \
+                             '(default: %(default)s)')
+    parser.add_argument('--optimize-seconds', type=float, default=0, dest='optimize_seconds', \
+                        help='time in seconds to search for a better track order when there ' + \
+                             'are too many tracks to check all track permutations, ' + \
+                             '0 to use the input order (default: %(default)s)')
+    add_render_arguments(parser)
+    parser.add_argument('--layout-cache', dest='layout_cache', \
+                        help='directory to cache the calculated pages, the gpx files are not ' + \
+                             'read again when they and the layout parameters are unchanged')
+    parser.add_argument('--recalculate', action='store_true', \
+                        help='calculate the pages even when they are found in the layout cache')
+    parser.add_argument('--track-cache', dest='track_cache', \
+                        help='directory to cache the tracks read from the gpx files, files ' + \
+                             'with the same size and modification time are not parsed again')
+    parser.add_argument('--track-cache-hash', action='store_true', dest='track_cache_hash', \
+                        help='only use the track cache when the hash of the contents of the ' + \
+                             'gpx files is unchanged as well')
     parser.add_argument('-b', '--basename', default='detail.', dest='output_basename', \
                         help='output filename, hikingmap will add the pagenumber and extension ' + \
                              '(default: %(default)s)')
+    parser.add_argument('--profile', \
+                        help='write the duration, memory usage and counters of every stage ' + \
+                             'to this json file')
     parser.add_argument('--debug', action='store_true', dest='debugmode', \
                         help=argparse.SUPPRESS)
     parser.add_argument('-v', '--verbose', action='store_true', \
@@ -54,30 +136,278 @@ def parse_commandline():
                         help='render command, precede by -- when the previous parameter is --gpx')
     parser.add_argument('renderoptions', nargs=argparse.REMAINDER, \
                         help='render options, rendercommand is required when adding options')
-    return parser.parse_args()
+    return parser.parse_args(args)
 
 
-def main():
-    params = parse_commandline()
+def parse_execute_commandline(args):
+    parser = argparse.ArgumentParser(prog='hikingmap execute', \
+                                     description='render the pages of a manifest written ' + \
+                                                 'by hikingmap plan')
+    parser.add_argument('manifest', \
+                        help='directory of the manifest')
+    parser.add_argument('--shard', \
+                        help='render shard I of N shards, given as I/N')
+    parser.add_argument('--pages', \
+                        help='comma separated page numbers or ranges to render, e.g. 0,2,5-7')
+    parser.add_argument('--check', action='store_true', \
+                        help='check whether the selected pages are rendered instead of ' + \
+                             'rendering them')
+    add_render_arguments(parser)
+    parser.add_argument('--profile', \
+                        help='write the duration, memory usage and counters of every stage ' + \
+                             'to this json file')
+    return parser.parse_args(args)
 
-    # read tracks
-    tracks = Tracks()
-    tracks.parse_files(params.gpxfiles)
 
-    if params.waypt_distance > 0:
-        tracks.calculate_waypoints(params.waypt_distance, params.length_unit)
-        tracks.write_waypoints_tempfile()
+def calculate_simplified_pages(params, tracks, trackfinder):
+    # the tolerance on paper in mm converted to meters on the ground
+    tracks.simplify(params.simplify / 1000 * params.scale)
+
+    starttime = time.perf_counter()
+    trackfinder.calculate_simplified_pages(tracks, params.jobs, params.permutation_order, \
+                                           params.optimize_seconds)
+    simplified_duration = time.perf_counter() - starttime
+
+    if params.simplify_check:
+        print("Calculating pages of the unsimplified tracks")
+        unsimplified_tracks = Tracks()
+        unsimplified_tracks.tracks = tracks.unsimplified_tracks
+        unsimplified_trackfinder = TrackFinder(params.scale, params.pagewidth, params.pageheight, \
+                                               params.pageoverlap, params.debugmode)
+        starttime = time.perf_counter()
+        unsimplified_trackfinder.calculate_pages(unsimplified_tracks, params.jobs, \
+                                                 params.permutation_order, \
+                                                 params.optimize_seconds)
+        unsimplified_duration = time.perf_counter() - starttime
+
+        print("Simplified tracks: %d pages in %.2f seconds" % \
+                    (len(trackfinder.pages), simplified_duration))
+        print("Unsimplified tracks: %d pages in %.2f seconds" % \
+                    (len(unsimplified_trackfinder.pages), unsimplified_duration))
+        print("Speedup: %.1fx" % (unsimplified_duration / max(simplified_duration, 1e-9)))
 
-    # calculate pages
+
+def calculate_layout(params):
+    tracks = Tracks()
     trackfinder = TrackFinder(params.scale, params.pagewidth, params.pageheight, \
                               params.pageoverlap, params.debugmode)
-    trackfinder.calculate_pages(tracks)
+
+    trackcache = None
+    if params.track_cache:
+        trackcache = TrackCache(params.track_cache, params.track_cache_hash)
+
+    layoutcache = None
+    layout_cached = False
+    if params.layout_cache:
+        with profiler.stage('load_layout_cache'):
+            layoutcache = LayoutCache(params.layout_cache)
+            layoutkey = layoutcache.get_key(params.gpxfiles, \
+                            { 'scale': params.scale, 'pagewidth': params.pagewidth, \
+                              'pageheight': params.pageheight, 'pageoverlap': params.pageoverlap, \
+                              'waypt_distance': params.waypt_distance, \
+                              'length_unit': params.length_unit, \
+                              'join_tolerance': params.join_tolerance, \
+                              'simplify': params.simplify, \
+                              'permutation_order': params.permutation_order, \
+                              'optimize_seconds': params.optimize_seconds })
+            if not params.recalculate:
+                layout_cached = layoutcache.load(layoutkey, tracks, trackfinder)
+
+    if layout_cached:
+        print("Using cached page layout")
+        if params.waypt_distance > 0 and not params.clip_waypoints:
+            with profiler.stage('write_waypoints_tempfile'):
+                tracks.write_waypoints_tempfile()
+        if params.clip_tracks:
+            # the tracks are not cached, but they are needed to clip them
+            with profiler.stage('parse_files'):
+                tracks.parse_files(params.gpxfiles, params.join_tolerance, trackcache)
+    else:
+        # read tracks
+        with profiler.stage('parse_files'):
+            tracks.parse_files(params.gpxfiles, params.join_tolerance, trackcache)
+
+        if params.waypt_distance > 0:
+            with profiler.stage('calculate_waypoints'):
+                tracks.calculate_waypoints(params.waypt_distance, params.length_unit)
+            if not params.clip_waypoints:
+                with profiler.stage('write_waypoints_tempfile'):
+                    tracks.write_waypoints_tempfile()
+
+        # calculate pages
+        with profiler.stage('calculate_pages'):
+            if params.simplify > 0:
+                calculate_simplified_pages(params, tracks, trackfinder)
+            else:
+                trackfinder.calculate_pages(tracks, params.jobs, params.permutation_order, \
+                                            params.optimize_seconds)
+
+        if layoutcache is not None:
+            layoutcache.store(layoutkey, tracks, trackfinder)
 
     if params.generate_overview:
-        trackfinder.add_overview_page()
+        with profiler.stage('add_overview_page'):
+            trackfinder.add_overview_page()
+
+    with profiler.stage('reorder_pages'):
+        trackfinder.reorder_pages(params.page_order)
+
+    if params.waypt_distance > 0 and params.clip_waypoints:
+        with profiler.stage('write_page_waypoints_tempfiles'):
+            tracks.write_page_waypoints_tempfiles(trackfinder.pages, params.clip_margin)
+
+    if params.clip_tracks:
+        with profiler.stage('write_page_tracks_tempfiles'):
+            tracks.write_page_tracks_tempfiles(trackfinder.pages, params.clip_margin)
+
+    return (tracks, trackfinder)
+
+
+def render(params, trackfinder, rendercommand, renderoptions, output_basename, waypointfile, \
+           gpxfiles, verbose, selection=None, overviewfile=None, waypointfiles=None, \
+           trackfiles=None):
+    rendercache = None
+    if params.render_cache:
+        rendercache = RenderCache(params.render_cache, params.render_cache_size * 1024 * 1024)
+
+    with profiler.stage('render'):
+        results = trackfinder.render(rendercommand, renderoptions, output_basename, waypointfile, \
+                                     gpxfiles, verbose, params.render_jobs, \
+                                     params.render_timeout, params.render_retries, rendercache, \
+                                     params.render_plugins, params.render_workers, \
+                                     selection, overviewfile, waypointfiles, trackfiles)
+
+    if rendercache is not None:
+        rendercache.evict()
+        rendercache.print_statistics()
+
+    if params.profile:
+        for result in results:
+            if result is not None:
+                profiler.count('pages_rendered')
+                profiler.count('render_attempts', result.attempts)
+                profiler.count('render_seconds', result.seconds)
+                if result.cached:
+                    profiler.count('render_cache_hits')
+
+    return results
+
+
+def write_profile(params):
+    if params.profile:
+        profiler.write(params.profile)
+        print("Profile written to %s" % params.profile)
+
+
+def plan(args):
+    params = parse_commandline(args, 'hikingmap plan', True)
+
+    if params.profile:
+        profiler.enable()
+
+    (tracks, trackfinder) = calculate_layout(params)
+
+    with profiler.stage('write_manifest'):
+        manifest = Manifest(params.manifest)
+        manifest.create(params, tracks, trackfinder)
+    print("Manifest with %d pages written to %s" % \
+                (len(manifest.get_page_indices()), params.manifest))
+
+    write_profile(params)
+
+
+def get_selection(params, manifest):
+    pageindices = manifest.get_page_indices()
+    if params.shard:
+        match = re.fullmatch(r'(\d+)/(\d+)', params.shard)
+        if match is None or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            sys.exit("Invalid shard %s, expected I/N with 1 <= I <= N" % params.shard)
+        (shard, shards) = (int(match.group(1)), int(match.group(2)))
+        return pageindices[shard - 1::shards]
+    elif params.pages:
+        selection = list()
+        for pagerange in params.pages.split(','):
+            match = re.fullmatch(r'(\d+)(?:-(\d+))?', pagerange.strip())
+            if match is None:
+                sys.exit("Invalid page range %s" % pagerange)
+            first = int(match.group(1))
+            last = int(match.group(2)) if match.group(2) else first
+            selection += [ p for p in range(first, last + 1) if p not in selection ]
+        invalid = [ p for p in selection if p not in pageindices ]
+        if invalid:
+            sys.exit("Pages not in the manifest: %s" % ", ".join(str(p) for p in invalid))
+        return sorted(selection)
+    else:
+        return pageindices
+
+
+def execute(args):
+    params = parse_execute_commandline(args)
+
+    if params.profile:
+        profiler.enable()
+
+    manifest = Manifest(params.manifest)
+    try:
+        manifest.load()
+    except (OSError, ValueError) as e:
+        sys.exit("Cannot read manifest in %s: %s" % (params.manifest, e))
+    selection = get_selection(params, manifest)
+
+    if params.check:
+        missing = manifest.get_missing_pages(selection)
+        if missing:
+            print("%d of %d pages not completed: %s" % \
+                        (len(missing), len(selection), ", ".join(str(p) for p in missing)))
+            sys.exit(1)
+        print("All %d pages completed" % len(selection))
+        return
+
+    trackfinder = TrackFinder(manifest.manifest['scale'], manifest.manifest['pagewidth'], \
+                              manifest.manifest['pageheight'], manifest.manifest['pageoverlap'], \
+                              False)
+    manifest.restore_pages(trackfinder)
+
+    print("Rendering %d of %d pages" % (len(selection), len(manifest.get_page_indices())))
+    results = render(params, trackfinder, manifest.manifest['rendercommand'], \
+                     manifest.manifest['renderoptions'], manifest.manifest['output_basename'], \
+                     manifest.get_file('waypointfile'), manifest.get_gpxfiles(), \
+                     manifest.manifest['verbose'], selection, manifest.get_file('overviewfile'), \
+                     manifest.get_page_waypointfiles(), manifest.get_page_trackfiles())
+
+    for (ordered_index, result) in enumerate(results):
+        if result is not None and result.success:
+            manifest.mark_completed(ordered_index, result)
+
+    write_profile(params)
+
+    if any(result is not None and not result.success for result in results):
+        sys.exit(1)
+
+
+def main():
+    commands = { 'serve': server.main, 'plan': plan, 'execute': execute }
+    if len(sys.argv) > 1 and sys.argv[1] in commands:
+        commands[sys.argv[1]](sys.argv[2:])
+        return
+
+    params = parse_commandline()
+
+    if params.profile:
+        profiler.enable()
+
+    (tracks, trackfinder) = calculate_layout(params)
+
+    gpxfiles = params.gpxfiles
+    if (not params.clip_tracks or params.generate_overview) and \
+       any(Tracks.is_compressed(gpxfile) for gpxfile in params.gpxfiles):
+        # renderers may not be able to read compressed gpx files
+        with profiler.stage('write_decompressed_tempfiles'):
+            gpxfiles = tracks.write_decompressed_tempfiles(params.gpxfiles)
 
-    trackfinder.reorder_pages(params.page_order)
+    render(params, trackfinder, params.rendercommand, params.renderoptions, \
+           params.output_basename, tracks.tempwaypointfile, gpxfiles, params.verbose, \
+           waypointfiles=tracks.pagewaypointfiles if params.clip_waypoints else None, \
+           trackfiles=tracks.pagetrackfiles if params.clip_tracks else None)
 
-    # render
-    trackfinder.render(params.rendercommand, params.renderoptions, params.output_basename, \
-                       tracks.tempwaypointfile, params.gpxfiles, params.verbose)
+    write_profile(params)
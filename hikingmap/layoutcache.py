@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import hashlib
+import tempfile
+from .coordinate import Coordinate
+from .page import Page
+
+# increase when the layout calculation or the file format changes
+LAYOUT_CACHE_VERSION = 1
+
+class LayoutCache:
+    '''
+    On-disk cache of the calculated page layout and waypoints, one json file per
+    combination of gpx file contents and layout parameters. The pages are stored
+    before adding the overview page and reordering, which are cheap to repeat.
+    '''
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+
+    @staticmethod
+    def get_key(gpxfiles, parameters):
+        key = hashlib.sha256()
+        key.update(json.dumps([ LAYOUT_CACHE_VERSION, parameters ], sort_keys=True).encode('utf-8'))
+        for gpxfile in gpxfiles:
+            filehash = hashlib.sha256()
+            with open(gpxfile, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    filehash.update(block)
+            key.update(filehash.digest())
+        return key.hexdigest()
+
+
+    def __get_filename(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+
+    # Restore the page layout in trackfinder and the waypoints in tracks,
+    # returns False if key is not cached
+    def load(self, key, tracks, trackfinder):
+        try:
+            with open(self.__get_filename(key), 'r') as f:
+                layout = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+
+        tracks.waypoints = [ [ (Coordinate(lon, lat), description) \
+                                    for (lon, lat, description) in track_waypoints ] \
+                                        for track_waypoints in layout['waypoints'] ]
+
+        trackfinder.trackorder = tuple(layout['trackorder'])
+        trackfinder.pages = list()
+        for p in layout['pages']:
+            page = Page(p['pageindex'], p['scale'], trackfinder.pagewidth, trackfinder.pageheight, \
+                        trackfinder.pageoverlap, trackfinder.debugmode)
+            (page.minlon, page.minlat, page.maxlon, page.maxlat) = p['bbox']
+            page.set_orientation(p['orientation'])
+            trackfinder.pages.append(page)
+
+        return True
+
+
+    def store(self, key, tracks, trackfinder):
+        layout = { 'trackorder': list(trackfinder.trackorder), \
+                   'pages': [ { 'pageindex': page.pageindex, \
+                                'scale': page.scale, \
+                                'orientation': page.orientation, \
+                                'bbox': [ page.minlon, page.minlat, page.maxlon, page.maxlat ] } \
+                                    for page in trackfinder.pages ], \
+                   'waypoints': [ [ (waypoint.lon, waypoint.lat, description) \
+                                        for (waypoint, description) in track_waypoints ] \
+                                            for track_waypoints in tracks.waypoints ] }
+
+        # write to a temporary file first, concurrent runs never read a partial file
+        (fd, tempfilename) = tempfile.mkstemp(prefix='.tmp', suffix='.json', dir=self.directory)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(layout, f)
+        os.replace(tempfilename, self.__get_filename(key))
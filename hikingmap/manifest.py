@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import shutil
+import socket
+import tempfile
+from .page import Page
+from .tracks import Tracks
+
+# increase when the manifest format changes
+MANIFEST_VERSION = 1
+
+class Manifest:
+    '''
+    Directory with everything needed to render the pages of a calculated layout on
+    another machine: manifest.json with the render parameters and the pages, and
+    copies of the gpx files, the overview file, the waypoint files and the clipped
+    track files. Compressed gpx files are copied decompressed. Every page which is
+    rendered successfully is marked in the completed subdirectory. Paths are
+    stored relative to the directory, so it can be copied elsewhere.
+    '''
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = None
+
+
+    def __get_path(self, filename):
+        return os.path.join(self.directory, filename)
+
+
+    def __write_json(self, filename, data):
+        # write to a temporary file first, a concurrent check never reads a partial file
+        (fd, tempfilename) = tempfile.mkstemp(prefix='.tmp', suffix='.json', \
+                                              dir=os.path.dirname(self.__get_path(filename)))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tempfilename, self.__get_path(filename))
+
+
+    def create(self, params, tracks, trackfinder):
+        '''
+        Write the manifest for the pages in trackfinder, the temp overview and waypoint
+        files must be written already
+        '''
+        os.makedirs(self.__get_path('gpx'), exist_ok=True)
+        os.makedirs(self.__get_path('completed'), exist_ok=True)
+
+        gpxfiles = list()
+        for (fileindex, gpxfile) in enumerate(params.gpxfiles):
+            filename = os.path.basename(gpxfile)
+            compressed = Tracks.is_compressed(gpxfile)
+            if compressed and os.path.splitext(filename)[1].lower() in [ '.gz', '.bz2', '.xz' ]:
+                filename = os.path.splitext(filename)[0]
+            gpxfiles.append(os.path.join('gpx', '%d_%s' % (fileindex, filename)))
+            if compressed:
+                # renderers may not be able to read compressed files
+                with Tracks.open_gpx(gpxfile) as src, \
+                     open(self.__get_path(gpxfiles[-1]), 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+            else:
+                shutil.copyfile(gpxfile, self.__get_path(gpxfiles[-1]))
+
+        overviewfile = None
+        if trackfinder.tempoverviewfile is not None:
+            overviewfile = 'overview.gpx'
+            shutil.copyfile(trackfinder.tempoverviewfile, self.__get_path(overviewfile))
+
+        waypointfile = None
+        if tracks.tempwaypointfile is not None:
+            waypointfile = 'waypoints.gpx'
+            shutil.copyfile(tracks.tempwaypointfile, self.__get_path(waypointfile))
+
+        if tracks.pagewaypointfiles:
+            os.makedirs(self.__get_path('waypoints'), exist_ok=True)
+        if tracks.pagetrackfiles:
+            os.makedirs(self.__get_path('tracks'), exist_ok=True)
+
+        pages = list()
+        for (ordered_index, page) in enumerate(trackfinder.pages):
+            if page is None:
+                pages.append(None)
+            else:
+                if page.pageindex in tracks.pagewaypointfiles:
+                    pagewaypointfile = os.path.join('waypoints', '%d.gpx' % page.pageindex)
+                    shutil.copyfile(tracks.pagewaypointfiles[page.pageindex], \
+                                    self.__get_path(pagewaypointfile))
+                else:
+                    pagewaypointfile = None
+                if page.pageindex in tracks.pagetrackfiles:
+                    pagetrackfile = os.path.join('tracks', '%d.gpx' % page.pageindex)
+                    shutil.copyfile(tracks.pagetrackfiles[page.pageindex], \
+                                    self.__get_path(pagetrackfile))
+                else:
+                    pagetrackfile = None
+                pages.append({ 'pageindex': page.pageindex, \
+                               'outputname': trackfinder.get_output_filename( \
+                                                    params.output_basename, ordered_index), \
+                               'scale': page.scale, \
+                               'orientation': 'landscape' \
+                                    if page.orientation == Page.orientation_landscape \
+                                    else 'portrait', \
+                               'bbox': [ page.minlon, page.minlat, page.maxlon, page.maxlat ], \
+                               'waypointfile': pagewaypointfile, \
+                               'trackfile': pagetrackfile })
+
+        self.manifest = { 'version': MANIFEST_VERSION, \
+                          'rendercommand': params.rendercommand, \
+                          'renderoptions': params.renderoptions, \
+                          'output_basename': params.output_basename, \
+                          'verbose': params.verbose, \
+                          'scale': params.scale, \
+                          'pagewidth': params.pagewidth, \
+                          'pageheight': params.pageheight, \
+                          'pageoverlap': params.pageoverlap, \
+                          'gpxfiles': gpxfiles, \
+                          'overviewfile': overviewfile, \
+                          'waypointfile': waypointfile, \
+                          'clip_waypoints': bool(params.waypt_distance > 0 and \
+                                                 params.clip_waypoints), \
+                          'clip_tracks': params.clip_tracks, \
+                          'pages': pages }
+        self.__write_json('manifest.json', self.manifest)
+
+
+    def load(self):
+        with open(self.__get_path('manifest.json'), 'r') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError("Unsupported manifest version %s" % self.manifest.get('version'))
+
+
+    def get_file(self, key):
+        '''
+        Absolute path of the overviewfile or waypointfile, or None
+        '''
+        if self.manifest[key] is None:
+            return None
+        return os.path.abspath(self.__get_path(self.manifest[key]))
+
+
+    def get_page_waypointfiles(self):
+        '''
+        Absolute path of the waypoint file of every page by page index, or None
+        when the waypoints are not clipped
+        '''
+        if not self.manifest.get('clip_waypoints'):
+            return None
+        return { p['pageindex']: os.path.abspath(self.__get_path(p['waypointfile'])) \
+                    for p in self.manifest['pages'] \
+                        if p is not None and p.get('waypointfile') is not None }
+
+
+    def get_page_trackfiles(self):
+        '''
+        Absolute path of the clipped track file of every page by page index, or None
+        when the tracks are not clipped
+        '''
+        if not self.manifest.get('clip_tracks'):
+            return None
+        return { p['pageindex']: os.path.abspath(self.__get_path(p['trackfile'])) \
+                    for p in self.manifest['pages'] \
+                        if p is not None and p.get('trackfile') is not None }
+
+
+    def get_gpxfiles(self):
+        return [ os.path.abspath(self.__get_path(gpxfile)) for gpxfile in self.manifest['gpxfiles'] ]
+
+
+    def restore_pages(self, trackfinder):
+        trackfinder.pages = list()
+        for p in self.manifest['pages']:
+            if p is None:
+                trackfinder.pages.append(None)
+                continue
+            page = Page(p['pageindex'], p['scale'], self.manifest['pagewidth'], \
+                        self.manifest['pageheight'], self.manifest['pageoverlap'], False)
+            (page.minlon, page.minlat, page.maxlon, page.maxlat) = p['bbox']
+            page.set_orientation(Page.orientation_landscape if p['orientation'] == 'landscape' \
+                                    else Page.orientation_portrait)
+            trackfinder.pages.append(page)
+
+
+    def get_page_indices(self):
+        '''
+        Indices in the page list of all pages which are not blank
+        '''
+        return [ ordered_index for (ordered_index, p) in enumerate(self.manifest['pages']) \
+                    if p is not None ]
+
+
+    def __get_completed_filename(self, ordered_index):
+        return os.path.join('completed', '%d.json' % ordered_index)
+
+
+    def mark_completed(self, ordered_index, result):
+        self.__write_json(self.__get_completed_filename(ordered_index), \
+                          { 'outputname': self.manifest['pages'][ordered_index]['outputname'], \
+                            'host': socket.gethostname(), \
+                            'attempts': result.attempts, \
+                            'cached': result.cached, \
+                            'seconds': result.seconds })
+
+
+    def get_missing_pages(self, selection):
+        return [ ordered_index for ordered_index in selection \
+                    if not os.path.isfile(self.__get_path( \
+                                self.__get_completed_filename(ordered_index))) ]
@@ -17,9 +17,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
-import subprocess
+import sys
 from .coordinate import Coordinate
 from .area import Area
+from .renderresult import RenderResult
+from .renderer import RenderRequest, SubprocessRenderer
 
 class Page(Area):
     orientation_unknown = 0
@@ -88,6 +90,15 @@ class Page(Area):
             self._convert_cm_to_degrees_lat(self.get_page_height(), self.scale)
 
 
+    # the page area extended by margin cm on paper on every side
+    def get_clip_area(self, margin):
+        marginlon = self._convert_cm_to_degrees_lon(margin, self.scale, \
+                                                    max(abs(self.minlat), abs(self.maxlat)))
+        marginlat = self._convert_cm_to_degrees_lat(margin, self.scale)
+        return Area(Coordinate(self.minlon - marginlon, self.minlat - marginlat), \
+                    Coordinate(self.maxlon + marginlon, self.maxlat + marginlat))
+
+
     def initialize_first_point(self, coord):
         self.track_area = Area(coord, coord) # size = 0
         self.prev_track_area = Area(coord, coord)
@@ -263,36 +274,53 @@ class Page(Area):
         self.maxlat = self.minlat + self.pagesizelat_full
 
 
-    def render(self, rendercommand, renderoptions, basefilename, tempgpxfile, gpxfiles, verbose):
-        args = [ rendercommand,
-                 "--pagewidth", str(self.get_page_width()),
-                 "--pageheight", str(self.get_page_height()),
-                 "-b", basefilename ]
-        if self.pageindex == 0 and tempgpxfile is not None:
-            args = args + [ "-t", tempgpxfile ]
-        elif self.pageindex > 0 and tempgpxfile is not None:
-            args = args + [ "-y", tempgpxfile ]
-        if verbose:
-            args = args + [ "-v" ]
-        if renderoptions:
-            args = args + renderoptions
-        args = args + [ os.path.abspath(f) for f in gpxfiles ]
-        args = args + [ "bbox",
-                        "-o", str(self.minlon), "-a", str(self.minlat),
-                        "-O", str(self.maxlon), "-A", str(self.maxlat) ]
-
-        retval = True
-        try:
-            process = subprocess.run(args, \
-                                     stdout = subprocess.PIPE, \
-                                     check = True, \
-                                     universal_newlines = True)
-            process.check_returncode()
-            print(process.stdout, end = '')
-        except subprocess.CalledProcessError:
-            retval = False
+    def get_render_request(self, basefilename, tempgpxfile, gpxfiles, verbose):
+        return RenderRequest(self.pageindex, self.get_page_width(), self.get_page_height(), \
+                             basefilename, \
+                             tempgpxfile if self.pageindex == 0 else None, \
+                             tempgpxfile if self.pageindex > 0 else None, \
+                             verbose, [ os.path.abspath(f) for f in gpxfiles ], \
+                             self.minlon, self.minlat, self.maxlon, self.maxlat)
 
-        return retval
+
+    # Run rendercommand for this page, the output is printed and True is returned when
+    # the page is rendered successfully
+    def render(self, rendercommand, renderoptions, basefilename, tempgpxfile, gpxfiles, verbose):
+        result = self.render_page(SubprocessRenderer(rendercommand, renderoptions), \
+                                  basefilename, tempgpxfile, gpxfiles, verbose)
+        print(result.output, end = '')
+        print(result.errors, end = '', file = sys.stderr)
+        return result.success
+
+
+    # Render this page with renderer, retry at most retries times when it fails or
+    # when it does not finish within timeout seconds. When a RenderCache is given the
+    # output files are restored from the cache instead when possible.
+    def render_page(self, renderer, basefilename, tempgpxfile, gpxfiles, verbose, \
+                    timeout=None, retries=0, cache=None):
+        request = self.get_render_request(basefilename, tempgpxfile, gpxfiles, verbose)
+
+        result = RenderResult(self.pageindex, basefilename)
+        if cache is not None:
+            key = cache.get_key(renderer.get_arguments(request), basefilename)
+            if cache.restore(key, basefilename):
+                result.success = True
+                result.cached = True
+                result.output = "Page %d restored from render cache\n" % self.pageindex
+                return result
+            snapshot = cache.snapshot(basefilename)
+
+        while not result.success and result.attempts <= retries:
+            result.attempts += 1
+            renderer.render(request, timeout, result)
+
+            if not result.success and result.attempts <= retries:
+                result.errors += "Rendering page %d failed, retrying\n" % self.pageindex
+
+        if result.success and cache is not None:
+            cache.store(key, basefilename, snapshot)
+
+        return result
 
 
     def to_string(self):
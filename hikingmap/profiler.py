@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import json
+import time
+import functools
+import contextlib
+from .area import Area
+from .areaindex import AreaIndex
+from .page import Page
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Profiling state of the current process. When profiling is disabled the stages
+# only cost a function call and the counters in the hot paths are guarded by
+# checking enabled, the methods which are called for every point are only
+# wrapped with a counter when profiling is enabled.
+enabled = False
+stages = list()
+counters = dict()
+
+def enable():
+    global enabled
+    if enabled:
+        return
+    enabled = True
+    _instrument(AreaIndex, 'contains_coord', 'coverage_queries')
+    _instrument(Area, 'contains_coord', 'contains_coord_checks')
+    _instrument(Page, 'calc_border_point', 'calc_border_point_calls')
+
+
+def _instrument(cls, methodname, countername):
+    method = getattr(cls, methodname)
+
+    @functools.wraps(method)
+    def counting_method(*args, **kwargs):
+        counters[countername] = counters.get(countername, 0) + 1
+        return method(*args, **kwargs)
+
+    setattr(cls, methodname, counting_method)
+
+
+def count(countername, amount=1):
+    counters[countername] = counters.get(countername, 0) + amount
+
+
+def _get_peak_rss_kb():
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+
+
+@contextlib.contextmanager
+def stage(name):
+    '''
+    Measure wall time, cpu time of this process and its child processes, such as
+    the renderer, and the peak resident memory at the end of a stage
+    '''
+    if not enabled:
+        yield
+        return
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    start_times = os.times()
+    try:
+        yield
+    finally:
+        end_times = os.times()
+        stages.append({ 'name': name, \
+                        'wall_seconds': time.perf_counter() - start_wall, \
+                        'cpu_seconds': time.process_time() - start_cpu, \
+                        'children_cpu_seconds': \
+                            (end_times.children_user + end_times.children_system) - \
+                            (start_times.children_user + start_times.children_system), \
+                        'peak_rss_kb': _get_peak_rss_kb() })
+
+
+def write(filename):
+    with open(filename, 'w') as f:
+        json.dump({ 'stages': stages, \
+                    'counters': dict(sorted(counters.items())), \
+                    'peak_rss_kb': _get_peak_rss_kb() }, f, indent=2)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+
+class RenderCache:
+    '''
+    Content addressed cache of rendered pages. The key of a page is a hash of the
+    arguments of the render command, where every argument which is an existing
+    file is replaced by a hash of its contents and the output filename is left out.
+    Every entry is a directory with the files created by the render command, the
+    least recently used entries are removed when the cache exceeds max_size bytes.
+    '''
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__filehashes = dict()
+        self.__lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+
+    def __hash_file(self, filename):
+        stat = os.stat(filename)
+        filekey = (os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+        with self.__lock:
+            if filekey in self.__filehashes:
+                return self.__filehashes[filekey]
+
+        filehash = hashlib.sha256()
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                filehash.update(block)
+
+        with self.__lock:
+            self.__filehashes[filekey] = filehash.hexdigest()
+        return self.__filehashes[filekey]
+
+
+    def get_key(self, args, basefilename):
+        keyargs = list()
+        for (index, arg) in enumerate(args):
+            if arg == basefilename and index > 0 and args[index - 1] == '-b':
+                continue
+            filename = arg
+            if index == 0 and not os.path.isfile(arg):
+                # render command found in PATH
+                filename = shutil.which(arg) or arg
+            if os.path.isfile(filename):
+                keyargs.append('file:' + self.__hash_file(filename))
+            else:
+                keyargs.append(arg)
+        return hashlib.sha256(json.dumps(keyargs).encode('utf-8')).hexdigest()
+
+
+    # The files which may be created by the render command for basefilename,
+    # all files named basefilename followed by an extension
+    @staticmethod
+    def __get_output_files(basefilename):
+        directory = os.path.dirname(basefilename) or '.'
+        prefix = os.path.basename(basefilename) + '.'
+        outputfiles = dict()
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.startswith(prefix) and \
+               '.' not in entry.name[len(prefix):]:
+                stat = entry.stat()
+                outputfiles[entry.name[len(prefix) - 1:]] = (stat.st_mtime_ns, stat.st_size)
+        return outputfiles
+
+
+    # Register the output files present before rendering, to be passed to store
+    def snapshot(self, basefilename):
+        return self.__get_output_files(basefilename)
+
+
+    # Copy the cached files of key to basefilename, returns False if key is not cached
+    def restore(self, key, basefilename):
+        entrydir = os.path.join(self.directory, key)
+        try:
+            for filename in os.listdir(entrydir):
+                shutil.copyfile(os.path.join(entrydir, filename), \
+                                basefilename + filename[len('page'):])
+            # the modification time of the entry is used to find the least recently used
+            os.utime(entrydir)
+        except FileNotFoundError:
+            with self.__lock:
+                self.misses += 1
+            return False
+
+        with self.__lock:
+            self.hits += 1
+        return True
+
+
+    # Add the files created or modified by the render command since snapshot to the cache
+    def store(self, key, basefilename, snapshot):
+        outputfiles = self.__get_output_files(basefilename)
+        tempdir = tempfile.mkdtemp(prefix='.tmp', dir=self.directory)
+        for (suffix, filestat) in outputfiles.items():
+            if snapshot.get(suffix) != filestat:
+                shutil.copyfile(basefilename + suffix, os.path.join(tempdir, 'page' + suffix))
+        try:
+            os.rename(tempdir, os.path.join(self.directory, key))
+        except OSError:
+            # stored by a concurrent render of the same page
+            shutil.rmtree(tempdir)
+
+
+    # Remove the least recently used entries until the cache fits in max_size
+    def evict(self):
+        entries = list()
+        total_size = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and not entry.name.startswith('.'):
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                entries.append((entry.stat().st_mtime, size, entry.path))
+                total_size += size
+
+        for (mtime, size, path) in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+            self.evictions += 1
+
+
+    def print_statistics(self):
+        print("Render cache: %d hits, %d misses, %d entries evicted" % \
+                    (self.hits, self.misses, self.evictions))
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import time
+import queue
+import itertools
+import subprocess
+import threading
+import traceback
+try:
+    from importlib.metadata import entry_points
+except ImportError:
+    entry_points = None
+
+# entry point group in which renderer plugins register themselves
+ENTRY_POINT_GROUP = 'hikingmap.renderers'
+# first line written by a render command started with --worker
+WORKER_PROTOCOL = 'hikingmap-worker'
+WORKER_PROTOCOL_VERSION = 1
+# seconds to wait for the first line of a render command started with --worker
+WORKER_HANDSHAKE_TIMEOUT = 5
+
+class RenderRequest:
+    '''
+    Everything a renderer needs to render a single page, the same information
+    which is passed on the command line of a render command. The temp track file
+    is only set for the overview page, the temp waypoint file only for detail pages.
+    '''
+    def __init__(self, pageindex, pagewidth, pageheight, basefilename, temptrackfile, \
+                 tempwaypointfile, verbose, gpxfiles, minlon, minlat, maxlon, maxlat):
+        self.pageindex = pageindex
+        self.pagewidth = pagewidth
+        self.pageheight = pageheight
+        self.basefilename = basefilename
+        self.temptrackfile = temptrackfile
+        self.tempwaypointfile = tempwaypointfile
+        self.verbose = verbose
+        self.gpxfiles = gpxfiles
+        self.minlon = minlon
+        self.minlat = minlat
+        self.maxlon = maxlon
+        self.maxlat = maxlat
+
+
+    def to_job(self, jobid):
+        job = dict(vars(self))
+        job['id'] = jobid
+        return job
+
+
+    def get_arguments(self, renderoptions):
+        args = [ "--pagewidth", str(self.pagewidth),
+                 "--pageheight", str(self.pageheight),
+                 "-b", self.basefilename ]
+        if self.temptrackfile is not None:
+            args = args + [ "-t", self.temptrackfile ]
+        if self.tempwaypointfile is not None:
+            args = args + [ "-y", self.tempwaypointfile ]
+        if self.verbose:
+            args = args + [ "-v" ]
+        if renderoptions:
+            args = args + renderoptions
+        args = args + self.gpxfiles
+        args = args + [ "bbox",
+                        "-o", str(self.minlon), "-a", str(self.minlat),
+                        "-O", str(self.maxlon), "-A", str(self.maxlat) ]
+        return args
+
+
+
+class SubprocessRenderer:
+    '''
+    Starts the render command for every page
+    '''
+    def __init__(self, rendercommand, renderoptions):
+        self.rendercommand = rendercommand
+        self.renderoptions = renderoptions
+
+
+    def get_arguments(self, request):
+        return [ self.rendercommand ] + request.get_arguments(self.renderoptions)
+
+
+    def render(self, request, timeout, result):
+        starttime = time.perf_counter()
+        try:
+            process = subprocess.run(self.get_arguments(request), \
+                                     stdout = subprocess.PIPE, \
+                                     stderr = subprocess.PIPE, \
+                                     timeout = timeout, \
+                                     universal_newlines = True)
+            result.output += process.stdout
+            result.errors += process.stderr
+            result.success = (process.returncode == 0)
+        except subprocess.TimeoutExpired:
+            result.errors += "Rendering page %d timed out after %g seconds\n" % \
+                                    (request.pageindex, timeout)
+        result.seconds += time.perf_counter() - starttime
+
+
+    def close(self):
+        pass
+
+
+
+class PluginRenderer:
+    '''
+    Renderer loaded in-process from the hikingmap.renderers entry point group.
+    The entry point is called once with the render options and returns an object
+    with a render(request) method, which is called for every page with a
+    RenderRequest and returns the text to show as output, or raises an exception
+    when rendering fails. Calls are serialized unless the object has a
+    thread_safe attribute which is True. The optional close() method is called
+    after the last page. Plugins can not be interrupted, the render timeout does
+    not apply to them.
+    '''
+    def __init__(self, name, version, plugin, renderoptions):
+        self.name = name
+        self.version = version
+        self.renderoptions = renderoptions
+        self.__plugin = plugin
+        self.__lock = None if getattr(plugin, 'thread_safe', False) else threading.Lock()
+
+
+    def get_arguments(self, request):
+        return [ 'plugin:%s==%s' % (self.name, self.version) ] + \
+               request.get_arguments(self.renderoptions)
+
+
+    def __render(self, request):
+        if self.__lock is None:
+            return self.__plugin.render(request)
+        with self.__lock:
+            return self.__plugin.render(request)
+
+
+    def render(self, request, timeout, result):
+        starttime = time.perf_counter()
+        try:
+            output = self.__render(request)
+            if output:
+                result.output += output if output.endswith('\n') else output + '\n'
+            result.success = True
+        except (Exception, SystemExit):
+            result.errors += traceback.format_exc()
+        result.seconds += time.perf_counter() - starttime
+
+
+    def close(self):
+        if hasattr(self.__plugin, 'close'):
+            self.__plugin.close()
+
+
+
+class RenderWorker:
+    '''
+    Render command running with --worker, reading one json job per line on stdin
+    and answering with one json line per job on stdout. Lines are read in a
+    background thread so a job can time out. Everything the worker writes on
+    stderr is collected and reported with the next answer.
+    '''
+    def __init__(self, args):
+        self.process = subprocess.Popen(args, \
+                                        stdin = subprocess.PIPE, \
+                                        stdout = subprocess.PIPE, \
+                                        stderr = subprocess.PIPE, \
+                                        universal_newlines = True, \
+                                        bufsize = 1)
+        self.__lines = queue.Queue()
+        self.__errors = list()
+        self.__errors_lock = threading.Lock()
+        threading.Thread(target=self.__read_lines, daemon=True).start()
+        self.__errors_reader = threading.Thread(target=self.__read_errors, daemon=True)
+        self.__errors_reader.start()
+
+
+    def __read_lines(self):
+        for line in self.process.stdout:
+            self.__lines.put(line)
+        # end of file, the worker has exited
+        self.__lines.put(None)
+
+
+    def __read_errors(self):
+        for line in self.process.stderr:
+            with self.__errors_lock:
+                self.__errors.append(line)
+
+
+    def get_errors(self):
+        with self.__errors_lock:
+            errors = ''.join(self.__errors)
+            self.__errors.clear()
+        return errors
+
+
+    # Returns the next message, None when the worker has exited or raises
+    # queue.Empty after timeout seconds and ValueError on invalid json
+    def read_message(self, timeout=None):
+        line = self.__lines.get(timeout=timeout)
+        if line is None:
+            return None
+        return json.loads(line)
+
+
+    def send_message(self, message):
+        self.process.stdin.write(json.dumps(message) + '\n')
+        self.process.stdin.flush()
+
+
+    def stop(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        # collect everything written on stderr before the worker was killed
+        self.__errors_reader.join(timeout=10)
+
+
+
+class WorkerRenderer:
+    '''
+    Keeps up to maxworkers render commands running with --worker and sends them
+    the pages to render, see RenderWorker. A worker which times out or exits is
+    killed and replaced by a new one for the next page.
+    '''
+    def __init__(self, rendercommand, renderoptions, maxworkers, worker):
+        self.rendercommand = rendercommand
+        self.renderoptions = renderoptions
+        self.maxworkers = max(maxworkers, 1)
+        self.__idle = [ worker ]
+        self.__started = 1
+        self.__condition = threading.Condition()
+        self.__jobids = itertools.count(1)
+
+
+    @staticmethod
+    def start_worker(rendercommand, renderoptions):
+        '''
+        Start rendercommand with --worker, returns None if it does not answer
+        with the worker protocol within WORKER_HANDSHAKE_TIMEOUT seconds
+        '''
+        worker = RenderWorker([ rendercommand, '--worker' ] + (renderoptions or []))
+        try:
+            hello = worker.read_message(WORKER_HANDSHAKE_TIMEOUT)
+        except (queue.Empty, ValueError):
+            hello = None
+        if not isinstance(hello, dict) or hello.get('protocol') != WORKER_PROTOCOL or \
+           hello.get('version') != WORKER_PROTOCOL_VERSION:
+            worker.kill()
+            return None
+        return worker
+
+
+    def get_arguments(self, request):
+        # the same pages as the render command, so the same render cache entries
+        return [ self.rendercommand ] + request.get_arguments(self.renderoptions)
+
+
+    def __acquire_worker(self):
+        with self.__condition:
+            while not self.__idle and self.__started >= self.maxworkers:
+                self.__condition.wait()
+            if self.__idle:
+                return self.__idle.pop()
+            self.__started += 1
+
+        try:
+            worker = self.start_worker(self.rendercommand, self.renderoptions)
+        except OSError:
+            worker = None
+        if worker is None:
+            self.__release_worker(None)
+        return worker
+
+
+    # return worker to the idle workers, or None when the worker is gone
+    def __release_worker(self, worker):
+        with self.__condition:
+            if worker is None:
+                self.__started -= 1
+            else:
+                self.__idle.append(worker)
+            self.__condition.notify()
+
+
+    def render(self, request, timeout, result):
+        worker = self.__acquire_worker()
+        if worker is None:
+            result.errors += "Failed to start render worker for page %d\n" % request.pageindex
+            return
+
+        jobid = next(self.__jobids)
+        error = None
+        try:
+            worker.send_message(request.to_job(jobid))
+            answer = worker.read_message(timeout)
+            while isinstance(answer, dict) and answer.get('id') != jobid:
+                answer = worker.read_message(timeout)
+            if answer is None:
+                error = "Render worker exited while rendering page %d\n" % request.pageindex
+            elif not isinstance(answer, dict):
+                error = "Invalid answer of render worker for page %d\n" % request.pageindex
+        except queue.Empty:
+            error = "Rendering page %d timed out after %g seconds\n" % \
+                        (request.pageindex, timeout)
+        except ValueError:
+            error = "Invalid answer of render worker for page %d\n" % request.pageindex
+        except OSError:
+            # broken pipe
+            error = "Render worker exited while rendering page %d\n" % request.pageindex
+
+        if error is not None:
+            worker.kill()
+            result.errors += worker.get_errors()
+            result.errors += error
+            self.__release_worker(None)
+            return
+
+        result.errors += worker.get_errors()
+        result.output += answer.get('output', '')
+        result.errors += answer.get('errors', '')
+        result.seconds += answer.get('seconds', 0)
+        result.success = (answer.get('status') == 'ok')
+        self.__release_worker(worker)
+
+
+    def close(self):
+        with self.__condition:
+            workers = self.__idle
+            self.__idle = list()
+        for worker in workers:
+            worker.stop()
+
+
+
+def find_renderer_plugin(name):
+    '''
+    Returns the entry point of the renderer plugin registered as name, or None
+    '''
+    if entry_points is None:
+        return None
+    eps = entry_points()
+    if hasattr(eps, 'select'):
+        eps = eps.select(group=ENTRY_POINT_GROUP, name=name)
+    else:
+        # python 3.8 and 3.9 return a dict of groups
+        eps = [ ep for ep in eps.get(ENTRY_POINT_GROUP, []) if ep.name == name ]
+    for ep in eps:
+        return ep
+    return None
+
+
+def load_renderer(rendercommand, renderoptions, use_plugins=True, use_workers=False, jobs=1, \
+                  log=print):
+    '''
+    Load the renderer plugin registered as rendercommand. When there is no such
+    plugin or it fails to load, start rendercommand as up to jobs workers if
+    use_workers is set and it supports the worker protocol, or as a subprocess
+    for every page otherwise.
+    '''
+    ep = find_renderer_plugin(rendercommand) if use_plugins else None
+    if ep is not None:
+        try:
+            plugin = ep.load()(renderoptions)
+            dist = getattr(ep, 'dist', None)
+            log("Using renderer plugin %s" % rendercommand)
+            return PluginRenderer(rendercommand, dist.version if dist is not None else '', \
+                                  plugin, renderoptions)
+        except (Exception, SystemExit) as e:
+            log("Failed to load renderer plugin %s, using render command instead: %s" % \
+                    (rendercommand, e))
+
+    if use_workers:
+        try:
+            worker = WorkerRenderer.start_worker(rendercommand, renderoptions)
+        except OSError:
+            worker = None
+        if worker is not None:
+            log("Using render workers of %s" % rendercommand)
+            return WorkerRenderer(rendercommand, renderoptions, jobs, worker)
+        log("%s does not support running as a worker, using render command instead" % \
+                rendercommand)
+
+    return SubprocessRenderer(rendercommand, renderoptions)
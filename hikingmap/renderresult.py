@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+class RenderResult:
+    '''
+    Outcome of rendering a single page: the output and errors of the render
+    command are collected over all attempts, seconds is the time spent rendering
+    '''
+    def __init__(self, pageindex, basefilename):
+        self.pageindex = pageindex
+        self.basefilename = basefilename
+        self.success = False
+        self.cached = False
+        self.attempts = 0
+        self.seconds = 0.0
+        self.output = ''
+        self.errors = ''
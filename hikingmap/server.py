@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import io
+import sys
+import stat
+import json
+import signal
+import time
+import hashlib
+import inspect
+import argparse
+import threading
+import socketserver
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from lxml import etree
+from .tracks import Tracks
+from .api import LayoutCalculator
+
+# parameters accepted in a layout request with their default values
+LAYOUT_PARAMETERS = { name: parameter.default \
+                        for (name, parameter) \
+                            in inspect.signature(LayoutCalculator.__init__).parameters.items() \
+                                if name not in [ 'self', 'log' ] }
+
+class LRUCache:
+    '''
+    Thread safe in-memory cache which keeps the maxsize most recently used entries
+    '''
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+
+    def get(self, key):
+        with self.__lock:
+            if key in self.__entries:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+                return self.__entries[key]
+            self.misses += 1
+            return None
+
+
+    def put(self, key, value):
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+
+    def get_statistics(self):
+        with self.__lock:
+            return { 'size': len(self.__entries), 'maxsize': self.maxsize, \
+                     'hits': self.hits, 'misses': self.misses }
+
+
+
+class RequestError(Exception):
+    pass
+
+
+
+class LayoutService:
+    '''
+    Calculates page layouts for json requests, keeping the parsed tracks and the
+    calculated layouts in memory. A request is a json object with the gpx contents
+    as a list of strings in 'gpx', a list of local gpx filenames in 'files' and the
+    LayoutCalculator parameters in 'parameters'.
+    At most max_concurrent layouts are calculated at the same time, requests for a
+    layout which is already being calculated wait for its result.
+    '''
+    def __init__(self, max_concurrent=4, track_cache_size=64, layout_cache_size=256):
+        self.max_concurrent = max_concurrent
+        self.track_cache = LRUCache(track_cache_size)
+        self.layout_cache = LRUCache(layout_cache_size)
+        self.__semaphore = threading.BoundedSemaphore(max_concurrent)
+        self.__lock = threading.Lock()
+        # events of the layouts which are being calculated
+        self.__pending = dict()
+        self.__starttime = time.monotonic()
+        self.__requests = 0
+        self.__errors = 0
+        self.__active = 0
+        # latency of the most recent requests in seconds
+        self.__latencies = deque(maxlen=1000)
+
+
+    def __get_tracks(self, key, gpxfile):
+        tracks = self.track_cache.get(key)
+        if tracks is None:
+            try:
+                tracks = Tracks.read_gpx(gpxfile)
+            except etree.XMLSyntaxError as e:
+                raise RequestError("Invalid gpx: %s" % e)
+            self.track_cache.put(key, tracks)
+        return tracks
+
+
+    def __get_track_sources(self, request):
+        sources = list()
+        for content in request.get('gpx', []):
+            if not isinstance(content, str):
+                raise RequestError("gpx must be a list of strings")
+            content = content.encode('utf-8')
+            key = ('gpx', hashlib.sha256(content).hexdigest())
+            sources.append((key, io.BytesIO(content)))
+        for gpxfile in request.get('files', []):
+            if not isinstance(gpxfile, str):
+                raise RequestError("files must be a list of strings")
+            gpxfile = os.path.abspath(gpxfile)
+            try:
+                stat = os.stat(gpxfile)
+            except OSError as e:
+                raise RequestError("Cannot read %s: %s" % (gpxfile, e.strerror))
+            key = ('file', gpxfile, stat.st_size, stat.st_mtime_ns)
+            sources.append((key, gpxfile))
+        if not sources:
+            raise RequestError("No gpx or files given")
+        return sources
+
+
+    @staticmethod
+    def __get_parameters(request):
+        parameters = dict(LAYOUT_PARAMETERS)
+        for (name, value) in request.get('parameters', {}).items():
+            if name not in LAYOUT_PARAMETERS:
+                raise RequestError("Unknown parameter %s" % name)
+            parameters[name] = value
+        return parameters
+
+
+    def calculate(self, request):
+        '''
+        Returns a tuple with the layout and whether it was found in the cache
+        '''
+        if not isinstance(request, dict):
+            raise RequestError("Request must be a json object")
+        sources = self.__get_track_sources(request)
+        parameters = self.__get_parameters(request)
+
+        layoutkey = (tuple(key for (key, gpxfile) in sources), \
+                     json.dumps(parameters, sort_keys=True))
+        while True:
+            layout = self.layout_cache.get(layoutkey)
+            if layout is not None:
+                return (layout, True)
+
+            with self.__lock:
+                pending = self.__pending.get(layoutkey)
+                if pending is None:
+                    pending = self.__pending[layoutkey] = threading.Event()
+                    break
+            # the same layout is calculated for another request, wait for its result
+            pending.wait()
+
+        try:
+            layout = self.__calculate_layout(sources, parameters)
+            self.layout_cache.put(layoutkey, layout)
+        finally:
+            with self.__lock:
+                del self.__pending[layoutkey]
+            pending.set()
+        return (layout, False)
+
+
+    def __calculate_layout(self, sources, parameters):
+        with self.__semaphore:
+            tracks = list()
+            for (key, gpxfile) in sources:
+                tracks += [ track for (trackname, track) in self.__get_tracks(key, gpxfile) ]
+            if not tracks:
+                raise RequestError("No tracks found")
+
+            try:
+                return LayoutCalculator(**parameters).calculate(tracks)
+            except (TypeError, ValueError) as e:
+                raise RequestError("Invalid parameters: %s" % e)
+
+
+    def start_request(self):
+        with self.__lock:
+            self.__active += 1
+        return time.perf_counter()
+
+
+    def finish_request(self, starttime, success):
+        latency = time.perf_counter() - starttime
+        with self.__lock:
+            self.__active -= 1
+            self.__requests += 1
+            if not success:
+                self.__errors += 1
+            self.__latencies.append(latency)
+
+
+    def get_statistics(self):
+        with self.__lock:
+            uptime = time.monotonic() - self.__starttime
+            latencies = sorted(self.__latencies)
+            statistics = { 'uptime': uptime, \
+                           'requests': self.__requests, \
+                           'errors': self.__errors, \
+                           'active': self.__active, \
+                           'max_concurrent': self.max_concurrent, \
+                           'requests_per_second': self.__requests / uptime if uptime > 0 else 0 }
+        if latencies:
+            statistics['latency'] = \
+                { 'mean': sum(latencies) / len(latencies), \
+                  'p50': latencies[len(latencies) // 2], \
+                  'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], \
+                  'max': latencies[-1] }
+        statistics['track_cache'] = self.track_cache.get_statistics()
+        statistics['layout_cache'] = self.layout_cache.get_statistics()
+        return statistics
+
+
+
+class LayoutRequestHandler(BaseHTTPRequestHandler):
+    '''
+    POST /layout calculates a layout, GET /stats returns the server statistics
+    '''
+    def __send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for (name, value) in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.__send_json(200, self.server.service.get_statistics())
+        else:
+            self.__send_json(404, { 'error': "Not found: %s" % self.path })
+
+
+    def do_POST(self):
+        if self.path != '/layout':
+            self.__send_json(404, { 'error': "Not found: %s" % self.path })
+            return
+
+        service = self.server.service
+        starttime = service.start_request()
+        headers = None
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                request = json.loads(self.rfile.read(length).decode('utf-8'))
+            except ValueError as e:
+                raise RequestError("Invalid json: %s" % e)
+            (layout, cached) = service.calculate(request)
+            (status, data) = (200, layout)
+            headers = { 'X-Hikingmap-Cache': 'hit' if cached else 'miss' }
+        except RequestError as e:
+            (status, data) = (400, { 'error': str(e) })
+        except Exception as e:
+            (status, data) = (500, { 'error': "%s: %s" % (type(e).__name__, e) })
+        # count the request before the client receives the response
+        service.finish_request(starttime, status == 200)
+        self.__send_json(status, data, headers)
+
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            # client_address is not a tuple on a unix socket
+            print(format % args)
+
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+
+def parse_commandline(args):
+    parser = argparse.ArgumentParser(prog='hikingmap serve', \
+                                     description='calculate page layouts over http, ' + \
+                                                 'POST /layout and GET /stats')
+    parser.add_argument('--host', default='127.0.0.1', \
+                        help='address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8080, \
+                        help='tcp port to listen on, 0 for any free port (default: %(default)s)')
+    parser.add_argument('--socket', \
+                        help='unix socket to listen on instead of a tcp port')
+    parser.add_argument('--max-concurrent', type=int, default=4, dest='max_concurrent', \
+                        help='maximum amount of layouts calculated at the same time ' + \
+                             '(default: %(default)s)')
+    parser.add_argument('--track-cache-size', type=int, default=64, dest='track_cache_size', \
+                        help='amount of parsed gpx files kept in memory (default: %(default)s)')
+    parser.add_argument('--layout-cache-size', type=int, default=256, dest='layout_cache_size', \
+                        help='amount of calculated layouts kept in memory (default: %(default)s)')
+    parser.add_argument('-v', '--verbose', action='store_true', \
+                        help='log every request')
+    return parser.parse_args(args)
+
+
+def stop_server(signum, frame):
+    raise SystemExit(0)
+
+
+def is_socket(path):
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+def main(args):
+    params = parse_commandline(args)
+
+    if params.socket:
+        if is_socket(params.socket):
+            os.remove(params.socket)
+        elif os.path.lexists(params.socket):
+            sys.exit("%s exists and is not a socket" % params.socket)
+        server = UnixHTTPServer(params.socket, LayoutRequestHandler)
+        address = params.socket
+    else:
+        server = ThreadingHTTPServer((params.host, params.port), LayoutRequestHandler)
+        address = 'http://%s:%d' % server.server_address[:2]
+    server.service = LayoutService(params.max_concurrent, params.track_cache_size, \
+                                   params.layout_cache_size)
+    server.verbose = params.verbose
+
+    signal.signal(signal.SIGTERM, stop_server)
+    print("Listening on %s" % address, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if params.socket and is_socket(params.socket):
+            os.remove(params.socket)
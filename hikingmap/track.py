@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+from array import array
+from .coordinate import Coordinate
+
+class Track:
+    '''
+    Compact storage for the points of a track: longitudes and latitudes are kept
+    in degrees in two contiguous float64 arrays. Coordinate objects are only
+    created when a single point is requested by indexing or iteration.
+    '''
+    def __init__(self, lons=None, lats=None):
+        self.lon = array('d', lons if lons is not None else [])
+        self.lat = array('d', lats if lats is not None else [])
+
+
+    def __copy__(self):
+        return Track(self.lon, self.lat)
+
+
+    def __len__(self):
+        return len(self.lon)
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Track(self.lon[index], self.lat[index])
+        else:
+            return Coordinate(self.lon[index], self.lat[index])
+
+
+    def __iter__(self):
+        for (lon, lat) in zip(self.lon, self.lat):
+            yield Coordinate(lon, lat)
+
+
+    def __add__(self, track):
+        return Track(self.lon + track.lon, self.lat + track.lat)
+
+
+    def append(self, lon, lat):
+        self.lon.append(lon)
+        self.lat.append(lat)
+
+
+    def extend(self, track):
+        self.lon.extend(track.lon)
+        self.lat.extend(track.lat)
+
+
+    def reverse(self):
+        self.lon.reverse()
+        self.lat.reverse()
+
+
+    def select(self, indices):
+        return Track([ self.lon[i] for i in indices ], [ self.lat[i] for i in indices ])
+
+
+    def get_simplified_indices(self, tolerance):
+        '''
+        Ramer-Douglas-Peucker simplification: returns the indices of the points to
+        keep so that no point is further than tolerance meters from the simplified
+        track. Distances are calculated in an equirectangular projection around the
+        first point, which is accurate enough for the size of a track on a page.
+        '''
+        if len(self) < 3:
+            return list(range(len(self)))
+
+        earth_radius = Coordinate.get_earth_radius('km') * 1000
+        cos_lat = math.cos(math.radians(self.lat[0]))
+        x = [ math.radians(lon) * cos_lat * earth_radius for lon in self.lon ]
+        y = [ math.radians(lat) * earth_radius for lat in self.lat ]
+
+        keep = [ False ] * len(self)
+        keep[0] = keep[-1] = True
+        stack = [ (0, len(self) - 1) ]
+        while stack:
+            (first, last) = stack.pop()
+            (dx, dy) = (x[last] - x[first], y[last] - y[first])
+            length_squared = dx * dx + dy * dy
+
+            # point between first and last with the largest distance to the segment
+            max_distance_squared = 0
+            max_index = None
+            for i in range(first + 1, last):
+                (px, py) = (x[i] - x[first], y[i] - y[first])
+                if length_squared > 0:
+                    t = min(max((px * dx + py * dy) / length_squared, 0.0), 1.0)
+                    (px, py) = (px - t * dx, py - t * dy)
+                distance_squared = px * px + py * py
+                if distance_squared > max_distance_squared:
+                    max_distance_squared = distance_squared
+                    max_index = i
+
+            if max_index is not None and max_distance_squared > tolerance * tolerance:
+                keep[max_index] = True
+                stack.append((first, max_index))
+                stack.append((max_index, last))
+
+        return [ i for i in range(len(self)) if keep[i] ]
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import struct
+import hashlib
+import tempfile
+from .track import Track
+
+# increase when the file format changes
+TRACK_CACHE_VERSION = 1
+TRACK_CACHE_MAGIC = b'HMTRACKS'
+# magic, version, byte order of the coordinates, size and modification time in ns of
+# the gpx file, sha256 of the gpx file or zeros and amount of tracks
+HEADER = struct.Struct('<8sIcQq32sI')
+# length of the name in bytes and amount of points of a track
+TRACK_HEADER = struct.Struct('<IQ')
+
+class TrackCache:
+    '''
+    On-disk cache of the tracks read from gpx files, one binary file per gpx file.
+    The file starts with a header identifying the gpx file by size and modification
+    time, and optionally by a hash of its contents, followed by the name and the
+    amount of points of every track. The longitudes and latitudes of all tracks are
+    stored as raw float64 arrays at the end, which are copied into the tracks
+    without any parsing when the file is loaded. The tracks are stored as they are found in the gpx
+    file, before joining them.
+    '''
+    def __init__(self, directory, verify_hash=False):
+        self.directory = directory
+        self.verify_hash = verify_hash
+        os.makedirs(directory, exist_ok=True)
+
+
+    def __get_filename(self, gpxfile):
+        pathhash = hashlib.sha256(os.path.abspath(gpxfile).encode('utf-8'))
+        return os.path.join(self.directory, pathhash.hexdigest() + '.tracks')
+
+
+    # Identification of the current contents of gpxfile, it should be determined
+    # before reading gpxfile
+    def get_file_key(self, gpxfile):
+        stat = os.stat(gpxfile)
+        filehash = bytes(32)
+        if self.verify_hash:
+            sha256 = hashlib.sha256()
+            with open(gpxfile, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha256.update(block)
+            filehash = sha256.digest()
+        return (stat.st_size, stat.st_mtime_ns, filehash)
+
+
+    @staticmethod
+    def __get_byteorder():
+        return b'<' if sys.byteorder == 'little' else b'>'
+
+
+    # Tracks of gpxfile as a list of (name, Track) tuples, or None when gpxfile is not
+    # cached or when it was cached with a different file_key
+    def load(self, gpxfile, file_key):
+        try:
+            f = open(self.__get_filename(gpxfile), 'rb')
+        except FileNotFoundError:
+            return None
+
+        with f:
+            data = f.read()
+        try:
+            return self.__read_tracks(data, file_key)
+        except (struct.error, UnicodeDecodeError):
+            return None
+
+
+    def __read_tracks(self, data, file_key):
+        (magic, version, byteorder, size, mtime, filehash, amount_tracks) = \
+            HEADER.unpack_from(data, 0)
+        if magic != TRACK_CACHE_MAGIC or version != TRACK_CACHE_VERSION or \
+           byteorder != self.__get_byteorder() or (size, mtime) != file_key[:2] or \
+           (self.verify_hash and filehash != file_key[2]):
+            return None
+
+        offset = HEADER.size
+        names = list()
+        lengths = list()
+        for i in range(amount_tracks):
+            (namelength, amount_points) = TRACK_HEADER.unpack_from(data, offset)
+            offset += TRACK_HEADER.size
+            names.append(data[offset:offset + namelength].decode('utf-8'))
+            lengths.append(amount_points)
+            offset += namelength
+
+        # the coordinates are aligned on 8 bytes
+        offset += -offset % 8
+        if offset + sum(lengths) * 16 != len(data):
+            return None
+
+        named_tracks = list()
+        with memoryview(data) as view:
+            for (name, amount_points) in zip(names, lengths):
+                track = Track()
+                with view[offset:offset + amount_points * 8] as lon:
+                    track.lon.frombytes(lon)
+                offset += amount_points * 8
+                with view[offset:offset + amount_points * 8] as lat:
+                    track.lat.frombytes(lat)
+                offset += amount_points * 8
+                named_tracks.append((name, track))
+        return named_tracks
+
+
+    # Store the (name, Track) tuples in named_tracks read from gpxfile with file_key
+    def store(self, gpxfile, file_key, named_tracks):
+        (size, mtime, filehash) = file_key
+
+        header = bytearray(HEADER.pack(TRACK_CACHE_MAGIC, TRACK_CACHE_VERSION, \
+                                       self.__get_byteorder(), size, mtime, filehash, \
+                                       len(named_tracks)))
+        for (name, track) in named_tracks:
+            name = name.encode('utf-8')
+            header += TRACK_HEADER.pack(len(name), len(track))
+            header += name
+        header += bytes(-len(header) % 8)
+
+        # write to a temporary file first, concurrent runs never read a partial file
+        (fd, tempfilename) = tempfile.mkstemp(prefix='.tmp', suffix='.tracks', dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            for (name, track) in named_tracks:
+                f.write(track.lon)
+                f.write(track.lat)
+        os.replace(tempfilename, self.__get_filename(gpxfile))
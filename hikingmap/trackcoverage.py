@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2015  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# area index of the points which are not on any area
+NOT_COVERED = 2**62
+
+class TrackCoverage:
+    '''
+    Index of the first rendered area containing every point of a track, stored in
+    a numpy array so the points covered by an area can be marked in bulk. The
+    indices are exact for the first amount_areas areas. Areas added later are only
+    applied from a given position in the track, where the calculation continues.
+    '''
+    def __init__(self, track):
+        self.track = track
+        # copies, the arrays of the track can not be resized while a view exists
+        self.__lon = numpy.array(track.lon, dtype=numpy.float64)
+        self.__lat = numpy.array(track.lat, dtype=numpy.float64)
+        self.__first_area = numpy.full(len(track), NOT_COVERED, dtype=numpy.int64)
+        self.amount_areas = 0
+
+
+    # forget all areas except the first amount_areas
+    def truncate(self, amount_areas):
+        self.amount_areas = min(self.amount_areas, amount_areas)
+
+
+    # apply all areas after amount_areas to every point of the track
+    def update(self, areas):
+        if self.amount_areas < len(areas):
+            # indices of removed or partially applied areas are not valid anymore
+            self.__first_area[self.__first_area >= self.amount_areas] = NOT_COVERED
+            for areaindex in range(self.amount_areas, len(areas)):
+                self.add_area(areas[areaindex], areaindex)
+            self.amount_areas = len(areas)
+
+
+    # apply the area at areaindex to the points from start onwards
+    def add_area(self, area, areaindex, start=0):
+        lon = self.__lon[start:]
+        lat = self.__lat[start:]
+        first_area = self.__first_area[start:]
+        inside = (lon >= area.minlon) & (lon <= area.maxlon) & \
+                 (lat >= area.minlat) & (lat <= area.maxlat)
+        numpy.copyto(first_area, numpy.where(inside, areaindex, NOT_COVERED), \
+                     where=(first_area >= areaindex))
+
+
+    # indices of the points from start onwards which are not on any of the first
+    # amount_areas areas
+    def get_uncovered_indices(self, start, amount_areas):
+        return (numpy.flatnonzero(self.__first_area[start:] >= amount_areas) + start).tolist()
@@ -17,102 +17,588 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import sys
 import math
-import itertools
+import random
+import time
+import multiprocessing
+import concurrent.futures
 import tempfile
 from lxml import etree
 from .coordinate import Coordinate
+from .area import Area
 from .page import Page
+from .areaindex import AreaIndex
+from .trackcoverage import TrackCoverage, numpy
+from .renderer import load_renderer
+from . import profiler
 
 # global constants
 MAX_TRACKS_PERM_CALC = 6
+# minimum amount of points of a track to mark its covered points in bulk with numpy
+MIN_POINTS_TRACK_COVERAGE = 256
+
+# state of a worker process calculating track permutations
+_worker_trackfinder = None
+_worker_tracks = None
+_worker_best_permutation = None
+
+def _init_permutation_worker(scale, pagewidth, pageheight, pageoverlap, debugmode, tracks, \
+                             best_permutation):
+    global _worker_trackfinder, _worker_tracks, _worker_best_permutation
+    _worker_trackfinder = TrackFinder(scale, pagewidth, pageheight, pageoverlap, debugmode)
+    _worker_trackfinder.calculate_lower_bounds(tracks)
+    _worker_tracks = tracks
+    _worker_best_permutation = best_permutation
+
+
+# a permutation can only replace the best one found so far when it needs less pages,
+# or an equal amount of pages when it comes first in the order of evaluation
+def _get_worker_max_pages(permindex):
+    with _worker_best_permutation.get_lock():
+        (best_amount_pages, best_permindex) = _worker_best_permutation[:]
+    if best_amount_pages < 0:
+        return None
+    return best_amount_pages if best_permindex < permindex else best_amount_pages + 1
+
+
+def _calculate_permutations_worker(task):
+    (prefix, permindex, permutation_order) = task
+
+    results = list()
+    for (trackorder, amount_pages, areas, amount_permutations) in \
+            _worker_trackfinder.search_permutations(_worker_tracks, prefix, permindex, \
+                                                    permutation_order, _get_worker_max_pages):
+        if amount_pages is not None:
+            with _worker_best_permutation.get_lock():
+                (best_amount_pages, best_permindex) = _worker_best_permutation[:]
+                if best_amount_pages < 0 or amount_pages < best_amount_pages or \
+                   (amount_pages == best_amount_pages and permindex < best_permindex):
+                    _worker_best_permutation[:] = [ amount_pages, permindex ]
+        # the pages are recalculated by the parent process for the best permutation only
+        results.append((trackorder, amount_pages, None, amount_permutations))
+        permindex += amount_permutations
+
+    return results
+
+
+class PermutationPruned(Exception):
+    '''
+    Raised when the calculation of a track permutation is aborted because it
+    cannot result in less pages than the best permutation found so far
+    '''
+    pass
+
 
 class TrackFinder:
-    def __init__(self, scale, pagewidth, pageheight, pageoverlap, debugmode):
+    def __init__(self, scale, pagewidth, pageheight, pageoverlap, debugmode, log=print):
         self.scale = scale
         self.pagewidth = pagewidth
         self.pageheight = pageheight
         self.pageoverlap = pageoverlap
         self.debugmode = debugmode
+        self.log = log
         self.pages = list()
+        self.trackorder = None
         self.tempoverviewfile = None
 
-        self.__renderedareas = list()
+        self.__renderedareas = AreaIndex()
         self.__currentpageindex = 1
         self.__currentpage = None
         self.__firstpointaccepted = False
         self.__pointskipped = True
+        self.__maxpages = None
+        self.__deadline = None
+        self.__lowerbounds = None
+        # TrackCoverage of every track, by track index
+        self.__coverages = dict()
 
 
     def __del__(self):
         # remove temp file
         if self.tempoverviewfile is not None and os.path.isfile(self.tempoverviewfile):
-            print("Removing temp file %s" % self.tempoverviewfile)
+            self.log("Removing temp file %s" % self.tempoverviewfile)
             os.remove(self.tempoverviewfile)
 
 
     # Calculate the minimum amount of pages needed to render all tracks
-    def calculate_pages(self, tracks):
-        allpermutations = [ tracks.tracks ]
+    def calculate_pages(self, tracks, jobs=1, permutation_order='input', optimize_seconds=0):
+        self.calculate_lower_bounds(tracks.tracks)
 
         if len(tracks.tracks) <= MAX_TRACKS_PERM_CALC:
-            print("Calculating track order permutation resulting in a minimum amount of pages")
-            print("This may take a while, checking %d track permutations" % \
+            self.log("Calculating track order permutation resulting in a minimum amount of pages")
+            self.log("This may take a while, checking %d track permutations" % \
                         math.factorial(len(tracks.tracks)))
 
-            allpermutations = itertools.permutations(tracks.tracks)
+            if jobs > 1:
+                results = self.__search_permutations_parallel(tracks.tracks, permutation_order, jobs)
+            else:
+                results = self.__search_permutations_serial(tracks.tracks, permutation_order)
+        elif optimize_seconds > 0:
+            self.log("Too many tracks to calculate all track permutations")
+            self.log("Optimizing track order during %g seconds" % optimize_seconds)
+            results = [ self.__optimize_track_order(tracks.tracks, optimize_seconds) ]
         else:
-            print("Too many tracks to calculate all track permutations")
+            self.log("Too many tracks to calculate all track permutations")
+            trackorder = tuple(range(len(tracks.tracks)))
+            areas = self.calculate_permutation(tracks.tracks, trackorder)
+            results = [ (trackorder, len(areas), areas, 1) ]
 
         min_amount_pages = -1
-        for permindex, trackpermutation in enumerate(allpermutations):
-            self.__renderedareas = list()
-            self.__currentpageindex = 1
-            self.__currentpage = None
-            self.__firstpointaccepted = False
+        best_trackorder = None
+        best_areas = None
+        total_permutations = 0
+        pruned_permutations = 0
+        for (trackorder, amount_pages, areas, amount_permutations) in results:
+            total_permutations += amount_permutations
+            if amount_pages is None:
+                pruned_permutations += amount_permutations
+            elif min_amount_pages == -1 or amount_pages < min_amount_pages:
+                min_amount_pages = amount_pages
+                best_trackorder = trackorder
+                best_areas = areas
+                self.log("Found track permutation with %d pages" % min_amount_pages)
+
+        if total_permutations > 1:
+            self.log("Pruned %d of %d track permutations" % (pruned_permutations, total_permutations))
+        if profiler.enabled:
+            profiler.count('permutations_calculated', total_permutations - pruned_permutations)
+            profiler.count('permutations_pruned', pruned_permutations)
+
+        if best_areas is None:
+            # the pages are not returned by the worker processes, recalculate them
+            best_areas = self.calculate_permutation(tracks.tracks, best_trackorder)
+        self.trackorder = best_trackorder
+        self.pages = list(best_areas)
+
+
+    # Calculate the pages of simplified tracks, points of the unsimplified tracks which
+    # are not on any page, for example close to the edge of a page, are added again
+    # until all points are covered. The layout is accepted when all of these points are
+    # in the simplified tracks already, recalculating it would not change the pages.
+    def calculate_simplified_pages(self, tracks, jobs=1, permutation_order='input', \
+                                   optimize_seconds=0):
+        self.calculate_pages(tracks, jobs, permutation_order, optimize_seconds)
+        uncovered_points = self.get_uncovered_points(tracks.unsimplified_tracks)
+        while any(uncovered_points):
+            amount_added = tracks.add_unsimplified_points(uncovered_points)
+            if amount_added == 0:
+                self.log("%d points are not on any page, although they are part of the " \
+                         "simplified tracks" % \
+                            sum(len(points) for points in uncovered_points))
+                break
+            self.log("Adding %d points which are not on any page" % amount_added)
+            self.calculate_pages(tracks, jobs, permutation_order, optimize_seconds)
+            uncovered_points = self.get_uncovered_points(tracks.unsimplified_tracks)
+
+
+    # Indices of the points of every track which are not on any of the pages
+    def get_uncovered_points(self, tracks):
+        pages = AreaIndex()
+        for page in self.pages:
+            pages.append(page)
+        return [ [ i for (i, coord) in enumerate(track) if not pages.contains_coord(coord) ] \
+                        for track in tracks ]
+
+
+    def __search_permutations_serial(self, tracks, permutation_order):
+        min_amount_pages = None
+        for result in self.search_permutations(tracks, (), 0, permutation_order, \
+                                               lambda permindex: min_amount_pages):
+            if result[1] is not None:
+                min_amount_pages = result[1]
+            yield result
+
+
+    def __search_permutations_parallel(self, tracks, permutation_order, jobs):
+        # split the permutation tree in subtrees on the first tracks of the permutation
+        # until there are enough subtrees to keep all workers busy
+        tasks = [ ((), 0) ]
+        while len(tasks) < jobs * 4 and len(tasks[0][0]) < len(tracks):
+            subtasks = list()
+            for (trackorder, permindex) in tasks:
+                amount_permutations = math.factorial(len(tracks) - len(trackorder) - 1)
+                for trackindex in self.__get_next_tracks(tracks, trackorder, permutation_order):
+                    subtasks.append((trackorder + (trackindex, ), permindex))
+                    permindex += amount_permutations
+            tasks = subtasks
+
+        # the tracks are passed once to every worker, when fork is available they are
+        # inherited from the parent process instead of being pickled
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        else:
+            context = multiprocessing.get_context()
+
+        # amount of pages and index of the best permutation found by any worker
+        best_permutation = context.Array('l', [ -1, -1 ])
+
+        with context.Pool(jobs, _init_permutation_worker, \
+                          (self.scale, self.pagewidth, self.pageheight, self.pageoverlap, \
+                           self.debugmode, tracks, best_permutation)) as pool:
+            for results in pool.imap(_calculate_permutations_worker, \
+                                     [ (trackorder, permindex, permutation_order) \
+                                            for (trackorder, permindex) in tasks ]):
+                for result in results:
+                    yield result
+
+
+    # The tracks which may follow trackorder, in the order they should be evaluated
+    @staticmethod
+    def __get_next_tracks(tracks, trackorder, permutation_order):
+        next_tracks = [ t for t in range(len(tracks)) if t not in trackorder ]
+        if permutation_order == 'nearest' and trackorder:
+            # tracks starting close to the end of the previous track first
+            prev_end = tracks[trackorder[-1]][-1]
+            next_tracks.sort(key=lambda t: prev_end.distance_haversine(tracks[t][0], 'km'))
+        return next_tracks
+
+
+    # Depth first search over all permutations of the tracks starting with trackorder.
+    # The layout state after each track is saved and restored for the next permutation
+    # sharing the same tracks at the start, instead of being recalculated.
+    # Yields a tuple (trackorder, amount of pages, pages, amount of permutations) for every
+    # calculated permutation, or for every subtree of permutations which are pruned because
+    # they need at least get_max_pages(permindex) pages. In that case amount of pages and
+    # pages are None.
+    def search_permutations(self, tracks, trackorder, permindex, permutation_order, \
+                            get_max_pages):
+        self.__reset_state()
+        if trackorder:
+            max_pages = get_max_pages(permindex)
+            if not self.__calculate_tracks(tracks, (), trackorder, permindex, max_pages):
+                yield (tuple(trackorder), None, None, \
+                       math.factorial(len(tracks) - len(trackorder)))
+                return
+        yield from self.__search_permutations(tracks, tuple(trackorder), permindex, \
+                                              permutation_order, get_max_pages)
+
+
+    def __search_permutations(self, tracks, trackorder, permindex, permutation_order, \
+                              get_max_pages):
+        if len(trackorder) == len(tracks):
+            yield (trackorder, len(self.__renderedareas), list(self.__renderedareas), 1)
+            return
+
+        amount_permutations = math.factorial(len(tracks) - len(trackorder) - 1)
+        for trackindex in self.__get_next_tracks(tracks, trackorder, permutation_order):
+            state = self.__save_state()
+            max_pages = get_max_pages(permindex)
+            if self.__calculate_tracks(tracks, trackorder, (trackindex, ), permindex, max_pages):
+                yield from self.__search_permutations(tracks, trackorder + (trackindex, ), \
+                                                      permindex, permutation_order, get_max_pages)
+            else:
+                yield (trackorder + (trackindex, ), None, None, amount_permutations)
+            self.__restore_state(state)
+            permindex += amount_permutations
+
+
+    # Local search for a track order with a minimum amount of pages, starting from the
+    # best of the input order and a greedy nearest next track order. Random swap,
+    # reverse and move operations on the track order are accepted when they do not
+    # need more pages, until the time budget is exhausted. Only the tracks after the
+    # first changed position are recalculated.
+    # Returns a tuple (trackorder, amount of pages, pages, 1) for the best order found.
+    def __optimize_track_order(self, tracks, seconds):
+        starttime = time.monotonic()
+        self.__deadline = starttime + seconds
+        random_generator = random.Random(0)
+
+        best_trackorder = None
+        best_pages = None
+        best_states = None
+        try:
+            greedy_trackorder = ()
+            while len(greedy_trackorder) < len(tracks):
+                greedy_trackorder += \
+                    (self.__get_next_tracks(tracks, greedy_trackorder, 'nearest')[0], )
+
+            for trackorder in [ tuple(range(len(tracks))), greedy_trackorder ]:
+                if trackorder == best_trackorder:
+                    continue
+                self.__reset_state()
+                states = self.__calculate_track_states(tracks, trackorder, 0, \
+                                                       len(best_pages) if best_pages else None)
+                if states is not None:
+                    (best_trackorder, best_pages, best_states) = \
+                        (trackorder, list(self.__renderedareas), states)
+                    self.log("Found track order with %d pages after %.1f seconds" % \
+                                (len(best_pages), time.monotonic() - starttime))
+
+            amount_evaluated = 2
+            if best_trackorder is not None:
+                self.__restore_layout(best_pages, best_states, 0)
+            while best_trackorder is not None and time.monotonic() < self.__deadline:
+                trackorder = self.__get_neighbour_track_order(best_trackorder, random_generator)
+                position = 0
+                while trackorder[position] == best_trackorder[position]:
+                    position += 1
+
+                # continue from the layout of the tracks both orders start with
+                self.__restore_state(best_states[position])
+                states = self.__calculate_track_states(tracks, trackorder, position, \
+                                                       len(best_pages) + 1)
+                amount_evaluated += 1
+                if profiler.enabled:
+                    profiler.count('track_orders_evaluated')
+                if states is not None:
+                    if len(self.__renderedareas) < len(best_pages):
+                        self.log("Found track order with %d pages after %.1f seconds" % \
+                                    (len(self.__renderedareas), time.monotonic() - starttime))
+                    (best_trackorder, best_pages, best_states) = \
+                        (trackorder, list(self.__renderedareas), best_states[:position + 1] + states)
+                else:
+                    self.__restore_layout(best_pages, best_states, position)
+        finally:
+            self.__deadline = None
+
+        if best_trackorder is None:
+            self.log("Time budget exhausted, using the input track order")
+            best_trackorder = tuple(range(len(tracks)))
+            best_pages = list(self.calculate_permutation(tracks, best_trackorder))
+        else:
+            self.log("Evaluated %d track orders in %.1f seconds" % \
+                        (amount_evaluated, time.monotonic() - starttime))
+
+        return (best_trackorder, len(best_pages), best_pages, 1)
+
+
+    # Calculate the tracks in trackorder starting at position, the tracks before position
+    # are already calculated. Returns the state after every track, or None if the
+    # calculation is aborted.
+    def __calculate_track_states(self, tracks, trackorder, position, max_pages):
+        states = list()
+        if position == 0:
+            states.append(self.__save_state())
+        for orderindex in range(position, len(trackorder)):
+            if not self.__calculate_tracks(tracks, trackorder[:orderindex], \
+                                           trackorder[orderindex:orderindex + 1], 0, max_pages):
+                return None
+            states.append(self.__save_state())
+        return states
+
+
+    # Put back the layout of a track order which was saved as a list of pages and the
+    # states after every track, keeping the pages of the tracks before position
+    def __restore_layout(self, pages, states, position):
+        self.__restore_state(states[position])
+        for page in pages[states[position][0]:]:
+            self.__renderedareas.append(page)
+        self.__currentpageindex = states[-1][1]
+
+
+    @staticmethod
+    def __get_neighbour_track_order(trackorder, random_generator):
+        trackorder = list(trackorder)
+        (i, j) = sorted(random_generator.sample(range(len(trackorder)), 2))
+        operation = random_generator.randrange(3)
+        if operation == 0:
+            # swap two tracks
+            (trackorder[i], trackorder[j]) = (trackorder[j], trackorder[i])
+        elif operation == 1:
+            # reverse the order of the tracks between i and j
+            trackorder[i:j + 1] = reversed(trackorder[i:j + 1])
+        else:
+            # move track j before track i
+            trackorder.insert(i, trackorder.pop(j))
+        return tuple(trackorder)
 
-            try:
-                for track in trackpermutation:
-                    self.__pointskipped = True
+
+    def __reset_state(self):
+        self.__renderedareas = AreaIndex()
+        for coverage in self.__coverages.values():
+            coverage.truncate(0)
+        self.__currentpageindex = 1
+        self.__currentpage = None
+        self.__firstpointaccepted = False
+
+
+    # Between two tracks the current page is always flushed and the rendered pages are
+    # never modified, the state is defined by the amount of rendered pages
+    def __save_state(self):
+        return (len(self.__renderedareas), self.__currentpageindex)
+
+
+    def __restore_state(self, state):
+        (amount_areas, self.__currentpageindex) = state
+        self.__renderedareas.truncate(amount_areas)
+        for coverage in self.__coverages.values():
+            coverage.truncate(amount_areas)
+        self.__currentpage = None
+        self.__firstpointaccepted = False
+
+
+    # Calculate a lower bound on the amount of pages needed for every track,
+    # used to prune track permutations which cannot be better than the best one found.
+    # Without tracks there are no lower bounds and nothing is pruned.
+    def calculate_lower_bounds(self, tracks):
+        if not tracks:
+            self.__lowerbounds = None
+            return
+
+        maxpagesize = max(self.pagewidth, self.pageheight)
+        maxabslat = max(max(abs(min(t.lat)), abs(max(t.lat))) for t in tracks)
+        # the largest extent of any page, slightly enlarged to absorb rounding errors
+        if maxabslat < 89.0:
+            pagesizelon = Area._convert_cm_to_degrees_lon(maxpagesize, self.scale, maxabslat)
+        else:
+            pagesizelon = 360.0
+        pagesizelon *= 1 + 1e-9
+        pagesizelat = Area._convert_cm_to_degrees_lat(maxpagesize, self.scale) * (1 + 1e-9)
+
+        self.__lowerbounds = \
+            [ (Area(Coordinate(min(t.lon), min(t.lat)), Coordinate(max(t.lon), max(t.lat))), \
+               max(self.__count_intervals(t.lon, pagesizelon), \
+                   self.__count_intervals(t.lat, pagesizelat))) for t in tracks ]
+
+
+    # Minimum amount of intervals of a given size needed to cover all values
+    @staticmethod
+    def __count_intervals(values, size):
+        amount = 0
+        end = None
+        for value in sorted(values):
+            if end is None or value > end:
+                amount += 1
+                end = value + size
+        return amount
+
+
+    # Lower bound on the amount of pages when the tracks in remaining_tracks are
+    # rendered after the pages which are already calculated. Every rendered page
+    # which overlaps the track may cover a part of it, at most one interval each.
+    def __calculate_lower_bound(self, remaining_tracks):
+        lowerbound = 0
+        for trackindex in remaining_tracks:
+            (trackarea, amount_intervals) = self.__lowerbounds[trackindex]
+            if amount_intervals > lowerbound:
+                amount_overlapping = sum(1 for a in self.__renderedareas if a.intersects(trackarea))
+                lowerbound = max(lowerbound, amount_intervals - amount_overlapping)
+        return self.__currentpageindex - 1 + lowerbound
+
+
+    # Calculate the pages needed to render the tracks in the order given by trackorder
+    # When max_pages is given the calculation is aborted as soon as it is certain that
+    # max_pages or more pages are needed, None is returned in that case
+    def calculate_permutation(self, tracks, trackorder, permindex=0, max_pages=None):
+        self.__reset_state()
+        if not self.__calculate_tracks(tracks, (), trackorder, permindex, max_pages):
+            return None
+        return self.__renderedareas
+
+
+    # Add the tracks in next_tracks to the layout of the tracks in trackorder.
+    # Returns False if the calculation is aborted because max_pages would be reached.
+    def __calculate_tracks(self, tracks, trackorder, next_tracks, permindex, max_pages):
+        self.__maxpages = max_pages
+
+        try:
+            for (orderindex, trackindex) in enumerate(next_tracks):
+                if self.__deadline is not None and time.monotonic() >= self.__deadline:
+                    raise PermutationPruned()
+                if max_pages is not None and self.__lowerbounds is not None:
+                    remaining_tracks = [ t for t in range(len(tracks)) \
+                                            if t not in trackorder and t not in next_tracks[:orderindex] ]
+                    if self.__calculate_lower_bound(remaining_tracks) >= max_pages:
+                        raise PermutationPruned()
+
+                if profiler.enabled:
+                    profiler.count('points_processed', len(tracks[trackindex]))
+                self.__pointskipped = True
+                coverage = self.__get_track_coverage(tracks, trackindex)
+                if coverage is not None:
+                    self.__add_uncovered_points(tracks[trackindex], coverage)
+                else:
                     prev_coord = None
-                    for coord in track:
+                    for coord in tracks[trackindex]:
                         self.__add_point(prev_coord, coord)
                         prev_coord = coord
-                    self.__flush()
-            except:
-                if self.debugmode:
-                    track_order = [ t[0].to_string() for t in trackpermutation ]
-                    print("Error while calculating permutation %d, track order = %s" % \
-                                (permindex, " // ".join(track_order)))
-                    self.__debug_exception()
-                raise
-
-            if min_amount_pages == -1 or len(self.__renderedareas) < min_amount_pages:
-                min_amount_pages = len(self.__renderedareas)
-                self.pages = self.__renderedareas
-                print("Found track permutation with %d pages" % min_amount_pages)
+                self.__flush()
+        except PermutationPruned:
+            return False
+        except:
+            if self.debugmode:
+                track_order = [ tracks[t][0].to_string() for t in tuple(trackorder) + tuple(next_tracks) ]
+                self.log("Error while calculating permutation %d, track order = %s" % \
+                            (permindex, " // ".join(track_order)))
+                self.__debug_exception()
+            raise
+        finally:
+            self.__maxpages = None
+
+        return True
+
+
+    # The coverage of a track with numpy when it is long enough, or None
+    def __get_track_coverage(self, tracks, trackindex):
+        track = tracks[trackindex]
+        if numpy is None or len(track) < MIN_POINTS_TRACK_COVERAGE:
+            return None
+        coverage = self.__coverages.get(trackindex)
+        if coverage is None or coverage.track is not track:
+            coverage = TrackCoverage(track)
+            self.__coverages[trackindex] = coverage
+        return coverage
+
+
+    # Equivalent to calling __add_point for all points of track, but the points on a
+    # rendered page are looked up in bulk in coverage, which is updated for the
+    # remaining points whenever pages are added. Runs of points on rendered pages
+    # are skipped at once.
+    def __add_uncovered_points(self, track, coverage):
+        coverage.update(self.__renderedareas)
+        position = 0
+        while position < len(track):
+            amount_areas = len(self.__renderedareas)
+            for index in coverage.get_uncovered_indices(position, amount_areas):
+                if index > position:
+                    # the points in between are on a rendered page
+                    self.__pointskipped = True
+                    if profiler.enabled:
+                        profiler.count('covered_points_skipped', index - position)
+                self.__add_unrendered_point(track[index - 1] if index > 0 else None, \
+                                            track[index])
+                position = index + 1
+                if len(self.__renderedareas) > amount_areas:
+                    # pages were added, the remaining points may be on them
+                    for areaindex in range(amount_areas, len(self.__renderedareas)):
+                        coverage.add_area(self.__renderedareas[areaindex], areaindex, position)
+                    break
+            else:
+                if position < len(track):
+                    # the remaining points are on a rendered page
+                    self.__pointskipped = True
+                    if profiler.enabled:
+                        profiler.count('covered_points_skipped', len(track) - position)
+                position = len(track)
 
 
     def __add_point(self, prev_coord, coord):
         if not self.__is_point_rendered(coord):
-            if not self.__firstpointaccepted:
-                self.__add_first_point(coord)
-            else:
-                self.__add_next_point(prev_coord, coord)
-            self.__pointskipped = False
+            self.__add_unrendered_point(prev_coord, coord)
         else:
             self.__pointskipped = True
 
 
+    def __add_unrendered_point(self, prev_coord, coord):
+        if not self.__firstpointaccepted:
+            self.__add_first_point(coord)
+        else:
+            self.__add_next_point(prev_coord, coord)
+        self.__pointskipped = False
+
+
     def __flush(self):
         if self.__firstpointaccepted:
             self.__currentpage.center_map()
             self.__renderedareas.append(self.__currentpage)
             self.__firstpointaccepted = False
+            if profiler.enabled:
+                profiler.count('pages_flushed')
 
 
     def __is_point_rendered(self, coord):
-        return any(a.contains_coord(coord) for a in self.__renderedareas)
+        return self.__renderedareas.contains_coord(coord)
 
 
     def __add_first_point(self, coord):
@@ -123,10 +609,15 @@ class TrackFinder:
         self.__currentpageindex += 1
         self.__firstpointaccepted = True
 
+        if self.__maxpages is not None and self.__currentpageindex - 1 >= self.__maxpages:
+            raise PermutationPruned()
+        if self.__deadline is not None and time.monotonic() >= self.__deadline:
+            raise PermutationPruned()
+
 
     def __get_closest_borderpoint(self, prev_coord, coord, include_currentpage = False):
         border_coords = [ page_prev_coord.calc_border_point(prev_coord, coord) \
-                            for page_prev_coord in self.__renderedareas \
+                            for page_prev_coord in self.__renderedareas.get_candidates(prev_coord) \
                                     if page_prev_coord.contains_coord(prev_coord) and \
                                        not page_prev_coord.contains_coord(coord) ]
         if include_currentpage:
@@ -151,6 +642,8 @@ class TrackFinder:
                 self.__currentpage.add_next_point(border_coord)
             self.__currentpage.center_map()
             self.__renderedareas.append(self.__currentpage)
+            if profiler.enabled:
+                profiler.count('pages_flushed')
             if not self.__pointskipped:
                 self.__add_first_point(border_coord)
                 self.__add_next_point(border_coord, coord)
@@ -167,13 +660,14 @@ class TrackFinder:
     def __debug_exception(self):
         # output already calculated areas
         for area in self.__renderedareas:
-            print(area.to_string())
+            self.log(area.to_string())
 
         # render overview map for visualization
-        self.pages = self.__renderedareas
-        self.__add_overview_page('debug_overview.gpx')
-        print("A debug overview map can be generated by running:")
-        print(("[rendercommand] --pagewidth %.2f --pageheight %.2f -b debug_overview " + \
+        self.pages = list(self.__renderedareas)
+        self.__write_overview_file('debug_overview.gpx')
+        self.__insert_overview_page()
+        self.log("A debug overview map can be generated by running:")
+        self.log(("[rendercommand] --pagewidth %.2f --pageheight %.2f -b debug_overview " + \
                "-t debug_overview.gpx -v [renderoptions] [gpxfiles] " + \
                "bbox -o %.15f -a %.15f -O %.15f -A %.15f") % \
               (self.pagewidth, self.pageheight, \
@@ -183,11 +677,13 @@ class TrackFinder:
 
     # Add an overview page on index 0 and write a temporary gpx file with the page layout
     # which will be deleted automatically in the destructor
-    def add_overview_page(self):
-        self.__add_overview_page()
+    def add_overview_page(self, write_tempfile=True):
+        if write_tempfile:
+            self.__write_overview_file()
+        self.__insert_overview_page()
 
 
-    def __add_overview_page(self, filename=None):
+    def __write_overview_file(self, filename=None):
         xsischemaloc_qname = \
             etree.QName('http://www.w3.org/2001/XMLSchema-instance', 'schemaLocation')
         xsischemaloc_value = \
@@ -199,12 +695,7 @@ class TrackFinder:
                          'xsi': 'http://www.w3.org/2001/XMLSchema-instance' }
         gpxnode = etree.Element('gpx', gpxattrs, nsmap=gpxnamespace)
 
-        overviewpage = Page(0, self.scale, self.pagewidth, self.pageheight, self.pageoverlap, \
-                            self.debugmode)
-
         for page in self.pages:
-            overviewpage.add_page_to_overview(page)
-
             tracknode = etree.Element('trk')
             tracknamenode = etree.Element('name')
             tracknamenode.text = 'Page %d' % page.pageindex
@@ -237,6 +728,14 @@ class TrackFinder:
         gpxtree.write(f, encoding='utf-8', xml_declaration=True)
         f.close()
 
+
+    def __insert_overview_page(self):
+        overviewpage = Page(0, self.scale, self.pagewidth, self.pageheight, self.pageoverlap, \
+                            self.debugmode)
+
+        for page in self.pages:
+            overviewpage.add_page_to_overview(page)
+
         overviewpage.center_map()
         self.pages.insert(0, overviewpage)
 
@@ -251,10 +750,8 @@ class TrackFinder:
                 oldindex += 1
                 newindex += 2
 
-            print("Page order is rectoverso, new order =", end="")
-            for page in self.pages:
-                print(" %d" % page.get_page_index(), end="")
-            print()
+            self.log("Page order is rectoverso, new order =" + \
+                     "".join(" %d" % page.get_page_index() for page in self.pages))
         elif page_order == "book":
             amount_empty_pages = (4 - (len(self.pages) % 4)) % 4
             for i in range(0, amount_empty_pages):
@@ -275,29 +772,115 @@ class TrackFinder:
                 oldindex += 4
                 newindex += 4
 
-            print("Page order is book, new order =", end="")
-            for page in self.pages:
-                if page is not None:
-                    print(" %d" % page.get_page_index(), end="")
-                else:
-                    print(" X", end="")
-            print()
-            print("WARNING: blank pages are not generated!")
+            self.log("Page order is book, new order =" + \
+                     "".join(" %d" % page.get_page_index() if page is not None else " X" \
+                                for page in self.pages))
+            self.log("WARNING: blank pages are not generated!")
         else:
-            print("Page order is naturalorder")
-
-
+            self.log("Page order is naturalorder")
+
+
+    # Render all pages, returns a RenderResult for every page in self.pages or None
+    # for the blank pages. The renderer plugin registered as rendercommand is loaded
+    # once for all pages. If there is none rendercommand is started as up to jobs
+    # workers when use_workers is set and it supports the worker protocol, or for
+    # every page otherwise.
+    # With more than one job the pages are rendered concurrently, the largest area
+    # first, and the output of every page is printed as soon as the output of all
+    # preceding pages is printed.
+    # Only the pages at the indices in selection are rendered when it is given, the
+    # overview page is rendered with overviewfile instead of the temp overview file
+    # when it is given. The detail pages are rendered with their own waypoint file
+    # from waypointfiles, by page index, when it is given, and with their own track
+    # file from trackfiles instead of gpxfiles when it is given.
     def render(self, rendercommand, renderoptions, output_basename, tempwaypointfile, \
-               gpxfiles, verbose):
+               gpxfiles, verbose, jobs=1, timeout=None, retries=0, cache=None, \
+               use_plugins=True, use_workers=False, selection=None, overviewfile=None, \
+               waypointfiles=None, trackfiles=None):
+        renderer = load_renderer(rendercommand, renderoptions, use_plugins, use_workers, jobs, \
+                                 self.log)
+        try:
+            results = self.__render_pages(renderer, output_basename, tempwaypointfile, gpxfiles, \
+                                          verbose, jobs, timeout, retries, cache, selection, \
+                                          overviewfile or self.tempoverviewfile, waypointfiles, \
+                                          trackfiles)
+        finally:
+            renderer.close()
+
+        failed_pages = [ result.pageindex for result in results \
+                                if result is not None and not result.success ]
+        if failed_pages:
+            self.log("Failed to render %d pages: %s" % \
+                        (len(failed_pages), ", ".join(str(p) for p in failed_pages)))
+
+        return results
+
+
+    # output filename without extension of the page at ordered_index in self.pages
+    def get_output_filename(self, output_basename, ordered_index):
+        return output_basename + str(ordered_index).zfill(len(str(len(self.pages))))
+
+
+    def __render_pages(self, renderer, output_basename, tempwaypointfile, gpxfiles, verbose, \
+                       jobs, timeout, retries, cache, selection, overviewfile, waypointfiles, \
+                       trackfiles):
+        tasks = list()
         for (ordered_index, page) in enumerate(self.pages):
-            if page is not None:
+            if page is not None and (selection is None or ordered_index in selection):
+                outfilename = self.get_output_filename(output_basename, ordered_index)
+                if page.pageindex == 0:
+                    tempgpxfile = overviewfile
+                elif waypointfiles is not None:
+                    tempgpxfile = waypointfiles.get(page.pageindex)
+                else:
+                    tempgpxfile = tempwaypointfile
+                if page.pageindex > 0 and trackfiles is not None:
+                    pagegpxfiles = [ trackfiles[page.pageindex] ] \
+                                        if page.pageindex in trackfiles else []
+                else:
+                    pagegpxfiles = gpxfiles
+                tasks.append((ordered_index, page, outfilename, tempgpxfile, pagegpxfiles))
+        rendered = set(task[0] for task in tasks)
+
+        results = [ None ] * len(self.pages)
+        if jobs > 1:
+            # the area on the ground determines the amount of data to render
+            tasks.sort(key=lambda task: task[1].surface(), reverse=True)
+            printed_index = 0
+            with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+                futures = { executor.submit(page.render_page, renderer, outfilename, tempgpxfile, \
+                                            pagegpxfiles, verbose, timeout, retries, cache): \
+                                    ordered_index \
+                                for (ordered_index, page, outfilename, tempgpxfile, \
+                                     pagegpxfiles) in tasks }
+                for future in concurrent.futures.as_completed(futures):
+                    results[futures[future]] = future.result()
+                    while printed_index < len(self.pages) and \
+                          (results[printed_index] is not None or printed_index not in rendered):
+                        if printed_index in rendered:
+                            self.__print_render_result(self.pages[printed_index], \
+                                                       results[printed_index])
+                        printed_index += 1
+        else:
+            for (ordered_index, page, outfilename, tempgpxfile, pagegpxfiles) in tasks:
                 print(page.to_string())
+                results[ordered_index] = page.render_page(renderer, outfilename, tempgpxfile, \
+                                                          pagegpxfiles, verbose, timeout, \
+                                                          retries, cache)
+                self.__print_render_output(results[ordered_index])
 
-                outfilename = output_basename + str(ordered_index).zfill(len(str(len(self.pages))))
+        return results
 
-                if page.pageindex == 0:
-                    page.render(rendercommand, renderoptions, outfilename, \
-                                self.tempoverviewfile, gpxfiles, verbose)
-                else:
-                    page.render(rendercommand, renderoptions, outfilename, \
-                                tempwaypointfile, gpxfiles, verbose)
+
+    def __print_render_result(self, page, result):
+        print(page.to_string())
+        self.__print_render_output(result)
+
+
+    @staticmethod
+    def __print_render_output(result):
+        print(result.output, end = '')
+        if result.errors:
+            sys.stdout.flush()
+            print(result.errors, end = '', file = sys.stderr)
+            sys.stderr.flush()
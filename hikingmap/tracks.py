@@ -18,112 +18,421 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import gzip
+import bz2
+import lzma
+import shutil
 import tempfile
+import itertools
+from collections import deque
 from lxml import etree
 from .coordinate import Coordinate
+from .area import Area
+from .track import Track
+from .endpointindex import EndpointIndex
+from .areaindex import AreaIndex
+from . import profiler
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# magic bytes at the start of compressed gpx files and the module to decompress them
+COMPRESSIONS = [ (b'\x1f\x8b', gzip), (b'BZh', bz2), (b'\xfd7zXZ\x00', lzma) ]
 
 class Tracks:
-    def __init__(self):
+    def __init__(self, log=print):
+        self.log = log
         self.tracks = list()
+        self.unsimplified_tracks = None
         self.waypoints = list()
         self.tempwaypointfile = None
+        # temp waypoint file of every page, by page index
+        self.pagewaypointfiles = dict()
+        # temp file with the clipped tracks of every page, by page index
+        self.pagetrackfiles = dict()
+        # decompressed temp copies of compressed gpx files
+        self.tempgpxfiles = list()
+        self.__simplified_indices = None
 
 
     def __del__(self):
-        # remove temp file
-        if self.tempwaypointfile is not None and os.path.isfile(self.tempwaypointfile):
-            print("Removing temp file %s" % self.tempwaypointfile)
-            os.remove(self.tempwaypointfile)
+        # remove temp files
+        for tempfilename in [ self.tempwaypointfile ] + list(self.pagewaypointfiles.values()) + \
+                                list(self.pagetrackfiles.values()) + self.tempgpxfiles:
+            if tempfilename is not None and os.path.isfile(tempfilename):
+                self.log("Removing temp file %s" % tempfilename)
+                os.remove(tempfilename)
 
 
-    def parse_files(self, gpxfiles):
+    def parse_files(self, gpxfiles, join_tolerance=0, trackcache=None):
         '''
-        Read all tracks from a given list of gpx files and store them in memory
+        Read all tracks from a given list of gpx files and store them in memory.
+        Tracks with endpoints at most join_tolerance meters apart are joined.
+        The tracks of unchanged files are loaded from trackcache when it is given.
         '''
-        for gpxfile in gpxfiles:
-            print("Reading file %s" % gpxfile)
-
-            gpxdoc = etree.parse(gpxfile)
-            gpxroot = gpxdoc.getroot()
-
-            for gpxtrack in gpxroot.findall('trk', namespaces=gpxroot.nsmap):
-                self.__parse_track(gpxtrack)
-
-
-    def __parse_track(self, gpxtrack):
-        namenode = gpxtrack.find('name', namespaces=gpxtrack.nsmap)
-        trackname = namenode.text if namenode is not None and namenode.text else "[unnamed]"
-        print("Found track %s" % trackname)
-
-        track = list()
-        for coord in gpxtrack.findall('trkseg/trkpt', namespaces=gpxtrack.nsmap):
-            track.append(Coordinate(float(coord.get('lon')),
-                                    float(coord.get('lat'))))
-
-        # search if track connects to existing track in tracks
-        foundindex = 0
-        foundtrack = False
-        for foundindex, existingtrack in enumerate(self.tracks):
-            if existingtrack[0].equals(track[0]):
-                print("=> same startpoint as track %d: reversing track" % foundindex)
-                track.reverse()
-            elif existingtrack[-1].equals(track[-1]):
-                print("=> same endpoint as track %d: reversing track" % foundindex)
-                track.reverse()
-
-            if existingtrack[-1].equals(track[0]):
-                print("=> connecting after track %d" % foundindex)
-                newtrack = existingtrack + track[1:]
-                self.tracks[foundindex] = newtrack
-                foundtrack = True
-                break
-            elif existingtrack[0].equals(track[-1]):
-                print("=> connecting before track %d" % foundindex)
-                newtrack = track + existingtrack[1:]
-                self.tracks[foundindex] = newtrack
-                foundtrack = True
-                break
-
-        if not foundtrack:
-            print("=> new track %d" % len(self.tracks))
+        self.add_tracks(self.__read_files(gpxfiles, trackcache), join_tolerance)
+
+
+    def add_tracks(self, named_tracks, join_tolerance=0):
+        '''
+        Add tracks from an iterable of (name, Track) tuples, tracks with endpoints at
+        most join_tolerance meters apart are joined
+        '''
+        # joined tracks are kept as a chain of track segments until all tracks are added
+        chains = [ deque([ track ]) for track in self.tracks ]
+        endpoints = EndpointIndex(join_tolerance)
+        for (trackindex, track) in enumerate(self.tracks):
+            endpoints.add(track[0], trackindex)
+            endpoints.add(track[-1], trackindex)
+
+        for (trackname, track) in named_tracks:
+            if profiler.enabled:
+                profiler.count('tracks_parsed')
+                profiler.count('points_parsed', len(track))
+            self.__parse_track(trackname, track, chains, endpoints)
+
+        self.tracks = list()
+        for chain in chains:
+            track = Track()
+            for segment in chain:
+                track.extend(segment)
             self.tracks.append(track)
 
 
+    @staticmethod
+    def read_gpx(gpxfile):
+        '''
+        Read all tracks from a gpx filename or file object as a list of (name, Track)
+        tuples, without joining them
+        '''
+        return list(Tracks.__iterparse_tracks(gpxfile))
+
+
+    @staticmethod
+    def __get_compression(magic):
+        for (compression_magic, compression) in COMPRESSIONS:
+            if magic.startswith(compression_magic):
+                return compression
+        return None
+
+
+    @staticmethod
+    def is_compressed(gpxfile):
+        '''
+        True when the gpx file is compressed with gzip, bzip2 or xz
+        '''
+        with open(gpxfile, 'rb') as f:
+            return Tracks.__get_compression(f.read(6)) is not None
+
+
+    @staticmethod
+    def open_gpx(gpxfile):
+        '''
+        Open a gpx filename or seekable binary file object for reading. Files
+        compressed with gzip, bzip2 or xz are recognized by their first bytes and
+        decompressed while they are read.
+        '''
+        if isinstance(gpxfile, (str, os.PathLike)):
+            with open(gpxfile, 'rb') as f:
+                compression = Tracks.__get_compression(f.read(6))
+            return compression.open(gpxfile, 'rb') if compression else open(gpxfile, 'rb')
+        else:
+            magic = gpxfile.read(6)
+            gpxfile.seek(-len(magic), os.SEEK_CUR)
+            compression = Tracks.__get_compression(magic)
+            return compression.open(gpxfile, 'rb') if compression else gpxfile
+
+
+    def write_decompressed_tempfiles(self, gpxfiles):
+        '''
+        Returns gpxfiles in which every compressed file is replaced by a temporary
+        decompressed copy, for renderers which can not read compressed files. The
+        copies will be deleted automatically in the destructor.
+        '''
+        decompressed_gpxfiles = list()
+        for gpxfile in gpxfiles:
+            if self.is_compressed(gpxfile):
+                (fd, tempgpxfile) = tempfile.mkstemp(prefix = "hikingmap_temp_gpx", \
+                                                     suffix = ".gpx")
+                self.tempgpxfiles.append(tempgpxfile)
+                with os.fdopen(fd, 'wb') as f, self.open_gpx(gpxfile) as gpx:
+                    shutil.copyfileobj(gpx, f, 1 << 20)
+                decompressed_gpxfiles.append(tempgpxfile)
+            else:
+                decompressed_gpxfiles.append(gpxfile)
+        return decompressed_gpxfiles
+
+
+    def __read_files(self, gpxfiles, trackcache):
+        for gpxfile in gpxfiles:
+            if trackcache is None:
+                self.log("Reading file %s" % gpxfile)
+                yield from self.__iterparse_tracks(gpxfile)
+                continue
+
+            file_key = trackcache.get_file_key(gpxfile)
+            named_tracks = trackcache.load(gpxfile, file_key)
+            if named_tracks is not None:
+                self.log("Reading file %s from track cache" % gpxfile)
+                if profiler.enabled:
+                    profiler.count('track_cache_hits')
+            else:
+                self.log("Reading file %s" % gpxfile)
+                if profiler.enabled:
+                    profiler.count('track_cache_misses')
+                # store before yielding, the tracks may be reversed when they are joined
+                named_tracks = list(self.__iterparse_tracks(gpxfile))
+                trackcache.store(gpxfile, file_key, named_tracks)
+            yield from named_tracks
+
+
+    @staticmethod
+    def __iterparse_tracks(gpxfile):
+        '''
+        Stream all tracks from a gpx file as (name, Track) tuples.
+        Elements are cleared as soon as they are consumed, so memory usage is
+        bounded by the largest track instead of by the size of the file.
+        Compressed files are decompressed while they are parsed.
+        '''
+        if isinstance(gpxfile, (str, os.PathLike)) and not Tracks.is_compressed(gpxfile):
+            # lxml reads uncompressed files faster by itself than through a file object
+            yield from Tracks.__iterparse_gpx(gpxfile)
+            return
+
+        gpx = Tracks.open_gpx(gpxfile)
+        try:
+            yield from Tracks.__iterparse_gpx(gpx)
+        finally:
+            if gpx is not gpxfile:
+                gpx.close()
+
+
+    @staticmethod
+    def __iterparse_gpx(gpxfile):
+        depth = 0
+        tags = None
+        trackname = None
+        track = None
+        for (event, element) in etree.iterparse(gpxfile, events=('start', 'end')):
+            if event == 'start':
+                if depth == 0:
+                    # only trk/name/trkseg/trkpt in the default namespace of the root
+                    # are recognized, similar to findall with the nsmap of the root
+                    ns = element.nsmap.get(None)
+                    tags = { localname: ('{%s}%s' % (ns, localname) if ns else localname) \
+                                    for localname in [ 'trk', 'name', 'trkseg', 'trkpt' ] }
+                elif depth == 1 and element.tag == tags['trk']:
+                    trackname = None
+                    track = Track()
+                depth += 1
+                continue
+
+            depth -= 1
+            if track is not None:
+                if depth == 3 and element.tag == tags['trkpt'] and \
+                   element.getparent().tag == tags['trkseg']:
+                    track.append(float(element.get('lon')), float(element.get('lat')))
+                elif depth == 2 and element.tag == tags['name'] and trackname is None:
+                    trackname = element.text if element.text else "[unnamed]"
+                elif depth == 1 and element.tag == tags['trk']:
+                    yield (trackname if trackname else "[unnamed]", track)
+                    track = None
+
+            if depth > 0:
+                # release everything consumed so far, including preceding siblings
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+
+    def __parse_track(self, trackname, track, chains, endpoints):
+        self.log("Found track %s" % trackname)
+
+        # search the first existing track with an endpoint connecting to track
+        candidates = endpoints.find(track[0]) + endpoints.find(track[-1])
+        if not candidates:
+            self.log("=> new track %d" % len(chains))
+            endpoints.add(track[0], len(chains))
+            endpoints.add(track[-1], len(chains))
+            chains.append(deque([ track ]))
+            return
+
+        foundindex = min(candidates)
+        chain = chains[foundindex]
+        existingstart = chain[0][0]
+        existingend = chain[-1][-1]
+        endpoints.remove(existingstart, foundindex)
+        endpoints.remove(existingend, foundindex)
+
+        if endpoints.matches(existingstart, track[0]):
+            self.log("=> same startpoint as track %d: reversing track" % foundindex)
+            track.reverse()
+        elif endpoints.matches(existingend, track[-1]):
+            self.log("=> same endpoint as track %d: reversing track" % foundindex)
+            track.reverse()
+
+        if endpoints.matches(existingend, track[0]):
+            self.log("=> connecting after track %d" % foundindex)
+            if len(track) > 1:
+                chain.append(track[1:])
+        elif endpoints.matches(existingstart, track[-1]):
+            self.log("=> connecting before track %d" % foundindex)
+            if len(track) > 1:
+                chain.appendleft(track[:-1])
+
+        endpoints.add(chain[0][0], foundindex)
+        endpoints.add(chain[-1][-1], foundindex)
+
+
+    def simplify(self, tolerance):
+        '''
+        Remove the points of all tracks which are closer than tolerance meters to the
+        simplified track, the original tracks are kept in unsimplified_tracks
+        '''
+        self.unsimplified_tracks = self.tracks
+        self.__simplified_indices = \
+            [ track.get_simplified_indices(tolerance) for track in self.unsimplified_tracks ]
+        self.tracks = [ track.select(indices) for (track, indices) in \
+                            zip(self.unsimplified_tracks, self.__simplified_indices) ]
+
+        self.log("Simplified tracks from %d to %d points" % \
+                    (sum(len(track) for track in self.unsimplified_tracks), \
+                     sum(len(track) for track in self.tracks)))
+
+
+    def add_unsimplified_points(self, points):
+        '''
+        Add points of the unsimplified tracks to the simplified tracks again,
+        points contains a list of point indices for every track. Returns the amount
+        of points which were not in the simplified tracks yet.
+        '''
+        amount_added = 0
+        for (trackindex, indices) in enumerate(points):
+            new_indices = set(indices).difference(self.__simplified_indices[trackindex])
+            if new_indices:
+                amount_added += len(new_indices)
+                self.__simplified_indices[trackindex] = \
+                    sorted(new_indices.union(self.__simplified_indices[trackindex]))
+                self.tracks[trackindex] = self.unsimplified_tracks[trackindex] \
+                                            .select(self.__simplified_indices[trackindex])
+        return amount_added
+
+
     def calculate_waypoints(self, waypt_distance, length_unit):
         '''
         Calculate waypoints after each waypt_distance for every track
         '''
         for (trackindex, track) in enumerate(self.tracks):
-            print("Generating waypoints for track %d: %s - %s" % \
+            self.log("Generating waypoints for track %d: %s - %s" % \
                         (trackindex, track[0].to_string(), track[-1].to_string()))
 
-            track_waypoints = list()
-            next_waypt_dist = 0
-            cumul_distance = 0
-            prev_coord = track[0]
-            for coord in track[1:]:
-                # calculate cumul dist at coord
-                cumul_distance_prev_coord = cumul_distance
-                cumul_distance += prev_coord.distance_haversine(coord, length_unit)
-                # loop as long as dist < cumul dist at coord
-                while next_waypt_dist < cumul_distance:
-                    d = next_waypt_dist - cumul_distance_prev_coord
-                    waypt = prev_coord.calc_waypoint_on_line(coord, d, length_unit)
-                    track_waypoints.append((waypt, ('%.2f' % next_waypt_dist).rstrip('0').rstrip('.')))
-                    next_waypt_dist += waypt_distance
+            if numpy is not None and len(track) > 1:
+                (track_waypoints, cumul_distance) = \
+                    self.__calculate_track_waypoints_vectorized(track, waypt_distance, length_unit)
+            else:
+                (track_waypoints, cumul_distance) = \
+                    self.__calculate_track_waypoints(track, waypt_distance, length_unit)
 
-                prev_coord = coord
-
-            print("Total track distance: %.2f %s" % (cumul_distance, length_unit))
+            self.log("Total track distance: %.2f %s" % (cumul_distance, length_unit))
+            if profiler.enabled:
+                profiler.count('waypoints', len(track_waypoints))
 
             self.waypoints.append(track_waypoints)
 
 
-    def write_waypoints_tempfile(self):
+    @staticmethod
+    def __get_waypoint_description(waypt_dist):
+        return ('%.2f' % waypt_dist).rstrip('0').rstrip('.')
+
+
+    @staticmethod
+    def __calculate_track_waypoints(track, waypt_distance, length_unit):
+        track_waypoints = list()
+        next_waypt_dist = 0
+        cumul_distance = 0
+        prev_coord = track[0]
+        for coord in itertools.islice(track, 1, None):
+            # calculate cumul dist at coord
+            cumul_distance_prev_coord = cumul_distance
+            cumul_distance += prev_coord.distance_haversine(coord, length_unit)
+            # loop as long as dist < cumul dist at coord
+            while next_waypt_dist < cumul_distance:
+                d = next_waypt_dist - cumul_distance_prev_coord
+                waypt = prev_coord.calc_waypoint_on_line(coord, d, length_unit)
+                track_waypoints.append((waypt, Tracks.__get_waypoint_description(next_waypt_dist)))
+                next_waypt_dist += waypt_distance
+
+            prev_coord = coord
+
+        return (track_waypoints, cumul_distance)
+
+
+    @staticmethod
+    def __calculate_track_waypoints_vectorized(track, waypt_distance, length_unit):
         '''
-        Write all waypoints to a temporary gpx file which will be deleted
-        automatically in the destructor
+        NumPy implementation of __calculate_track_waypoints, used when numpy is
+        installed. The formulas and the order of the summations are identical,
+        the resulting waypoints only differ from the scalar implementation by the
+        rounding of the trigonometric functions: less than 1e-9 degrees.
         '''
+        earth_radius = Coordinate.get_earth_radius(length_unit)
+        lon = numpy.radians(numpy.frombuffer(track.lon, dtype=numpy.float64))
+        lat = numpy.radians(numpy.frombuffer(track.lat, dtype=numpy.float64))
+
+        # length of all segments and cumulative distance at every point
+        d_lat = lat[1:] - lat[:-1]
+        d_lon = lon[1:] - lon[:-1]
+        a = numpy.sin(d_lat/2) * numpy.sin(d_lat/2) + \
+            numpy.sin(d_lon/2) * numpy.sin(d_lon/2) * \
+            numpy.cos(lat[:-1]) * numpy.cos(lat[1:])
+        c = 2 * numpy.arctan2(numpy.sqrt(a), numpy.sqrt(1-a))
+        cumul_distances = numpy.concatenate(([ 0.0 ], numpy.cumsum(earth_radius * c)))
+        cumul_distance = float(cumul_distances[-1])
+
+        # waypoint distances, accumulated the same way as the scalar implementation
+        waypt_dists = numpy.full(int(cumul_distance // waypt_distance) + 2, float(waypt_distance))
+        waypt_dists[0] = 0.0
+        waypt_dists = numpy.cumsum(waypt_dists)
+        waypt_dists = waypt_dists[waypt_dists < cumul_distance]
+
+        # segment containing each waypoint and distance from its start point
+        segments = numpy.searchsorted(cumul_distances, waypt_dists, side='right') - 1
+        d = waypt_dists - cumul_distances[segments]
+        lon1 = lon[segments]
+        lat1 = lat[segments]
+        lat2 = lat[segments + 1]
+
+        # bearing from start to end point of each segment
+        d_lon = lon[segments + 1] - lon1
+        b = numpy.arctan2(numpy.sin(d_lon) * numpy.cos(lat2), \
+                          numpy.cos(lat1) * numpy.sin(lat2) - \
+                          numpy.sin(lat1) * numpy.cos(lat2) * numpy.cos(d_lon))
+
+        # waypoint coordinates
+        waypt_lon = lon1 + numpy.arctan2(numpy.sin(b) * \
+                                         numpy.sin(d/earth_radius) * \
+                                         numpy.cos(lat1), \
+                                         numpy.cos(d/earth_radius) - \
+                                         numpy.sin(lat1) * \
+                                         numpy.sin(lat2))
+        waypt_lat = numpy.arcsin(numpy.sin(lat1) * \
+                                 numpy.cos(d/earth_radius) + \
+                                 numpy.cos(lat1) * \
+                                 numpy.sin(d/earth_radius) * \
+                                 numpy.cos(b))
+
+        track_waypoints = [ (Coordinate(waypt_lon_rad, waypt_lat_rad, False), \
+                             Tracks.__get_waypoint_description(waypt_dist)) \
+                                for (waypt_lon_rad, waypt_lat_rad, waypt_dist) in \
+                                    zip(waypt_lon.tolist(), waypt_lat.tolist(), waypt_dists.tolist()) ]
+
+        return (track_waypoints, cumul_distance)
+
+
+    @staticmethod
+    def __create_gpx_node():
         xsischemaloc_qname = \
             etree.QName('http://www.w3.org/2001/XMLSchema-instance', 'schemaLocation')
         xsischemaloc_value = \
@@ -133,16 +442,131 @@ class Tracks:
                      'creator': 'hikingmap' }
         gpxnamespace = { None: 'http://www.topografix.com/GPX/1/0', \
                          'xsi': 'http://www.w3.org/2001/XMLSchema-instance' }
-        gpxnode = etree.Element('gpx', gpxattrs, nsmap=gpxnamespace)
+        return etree.Element('gpx', gpxattrs, nsmap=gpxnamespace)
 
-        for track_waypoints in self.waypoints:
-            for (waypoint, description) in track_waypoints:
-                gpxnode.append(waypoint.to_xml('wpt', description))
 
+    @staticmethod
+    def __write_gpx_tempfile(gpxnode, prefix):
         gpxtree = etree.ElementTree(gpxnode)
 
-        (fd, self.tempwaypointfile) = tempfile.mkstemp(prefix = "hikingmap_temp_waypoints", \
-                                                       suffix = ".gpx")
+        (fd, filename) = tempfile.mkstemp(prefix = prefix, suffix = ".gpx")
         f = os.fdopen(fd, 'wb')
         gpxtree.write(f, encoding='utf-8', xml_declaration=True)
         f.close()
+        return filename
+
+
+    @staticmethod
+    def __write_waypoints_file(waypoints, prefix):
+        gpxnode = Tracks.__create_gpx_node()
+        for (waypoint, description) in waypoints:
+            gpxnode.append(waypoint.to_xml('wpt', description))
+
+        return Tracks.__write_gpx_tempfile(gpxnode, prefix)
+
+
+    @staticmethod
+    def __write_tracks_file(track_segments, prefix):
+        gpxnode = Tracks.__create_gpx_node()
+        tracknode = None
+        prev_trackindex = None
+        for (trackindex, segment) in track_segments:
+            if trackindex != prev_trackindex:
+                tracknode = etree.SubElement(gpxnode, 'trk')
+                etree.SubElement(tracknode, 'name').text = 'Track %d' % trackindex
+                prev_trackindex = trackindex
+            tracksegnode = etree.SubElement(tracknode, 'trkseg')
+            for coord in segment:
+                tracksegnode.append(coord.to_xml('trkpt', None))
+
+        return Tracks.__write_gpx_tempfile(gpxnode, prefix)
+
+
+    def write_waypoints_tempfile(self):
+        '''
+        Write all waypoints to a temporary gpx file which will be deleted
+        automatically in the destructor
+        '''
+        self.tempwaypointfile = \
+            self.__write_waypoints_file((waypoint for track_waypoints in self.waypoints \
+                                                    for waypoint in track_waypoints), \
+                                        "hikingmap_temp_waypoints")
+
+
+    def write_page_waypoints_tempfiles(self, pages, margin):
+        '''
+        Write the waypoints of every detail page to a temporary gpx file, only the
+        waypoints within margin cm on paper of the page are written. The pages are
+        looked up in an area index for every waypoint, so all files are written in
+        a single pass over the waypoints. Pages without waypoints get no file.
+        '''
+        detailpages = [ page for page in pages if page is not None and page.pageindex > 0 ]
+        clipareas = AreaIndex()
+        for page in detailpages:
+            clipareas.append(page.get_clip_area(margin))
+
+        page_waypoints = [ list() for page in detailpages ]
+        for track_waypoints in self.waypoints:
+            for (waypoint, description) in track_waypoints:
+                for areaindex in clipareas.get_candidate_indices(waypoint):
+                    if clipareas[areaindex].contains_coord(waypoint):
+                        page_waypoints[areaindex].append((waypoint, description))
+
+        for (page, waypoints) in zip(detailpages, page_waypoints):
+            if waypoints:
+                self.pagewaypointfiles[page.pageindex] = \
+                    self.__write_waypoints_file(waypoints, \
+                                                "hikingmap_temp_waypoints_%d_" % page.pageindex)
+
+
+    def write_page_tracks_tempfiles(self, pages, margin):
+        '''
+        Write the tracks of every detail page to a temporary gpx file, clipped to
+        the page extended by margin cm on paper. Every line between two track points
+        is only clipped against the pages found in an area index, so all files are
+        written in a single pass over the tracks. The original tracks are written
+        when the tracks are simplified.
+        '''
+        detailpages = [ page for page in pages if page is not None and page.pageindex > 0 ]
+        clipareas = AreaIndex()
+        for page in detailpages:
+            clipareas.append(page.get_clip_area(margin))
+
+        tracks = self.unsimplified_tracks if self.unsimplified_tracks is not None else self.tracks
+        page_segments = [ list() for page in detailpages ]
+        for (trackindex, track) in enumerate(tracks):
+            if len(track) == 1:
+                for areaindex in clipareas.get_candidate_indices(track[0]):
+                    if clipareas[areaindex].contains_coord(track[0]):
+                        page_segments[areaindex].append((trackindex, [ track[0] ]))
+                continue
+
+            # segment of every page which ends at prev_coord
+            open_segments = dict()
+            prev_coord = track[0]
+            for coord in itertools.islice(track, 1, None):
+                line_area = Area(Coordinate(min(prev_coord.lon, coord.lon), \
+                                            min(prev_coord.lat, coord.lat)), \
+                                 Coordinate(max(prev_coord.lon, coord.lon), \
+                                            max(prev_coord.lat, coord.lat)))
+                next_open_segments = dict()
+                for areaindex in clipareas.get_overlapping_indices(line_area):
+                    clipped_line = clipareas[areaindex].clip_line(prev_coord, coord)
+                    if clipped_line is None:
+                        continue
+                    segment = open_segments.get(areaindex)
+                    if segment is None:
+                        segment = [ clipped_line[0] ]
+                        page_segments[areaindex].append((trackindex, segment))
+                    segment.append(clipped_line[1])
+                    # the segment continues when the line was not clipped at its end
+                    if clipped_line[1] is coord:
+                        next_open_segments[areaindex] = segment
+                open_segments = next_open_segments
+                prev_coord = coord
+
+        for (page, segments) in zip(detailpages, page_segments):
+            if segments:
+                self.pagetrackfiles[page.pageindex] = \
+                    self.__write_tracks_file(segments, \
+                                             "hikingmap_temp_tracks_%d_" % page.pageindex)
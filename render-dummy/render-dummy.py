@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import argparse, math
+import argparse, json, math, sys, time
 
 # global constants
 earthCircumference = 40041.44 # km (average, equatorial 40075.017 km / meridional 40007.86 km)
@@ -86,18 +86,41 @@ def assure_bbox_mode(parameters):
         parameters.maxlat = parameters.lat + pagesize_lat / 2
 
 
-# MAIN
-parameters = parse_commandline()
-assure_bbox_mode(parameters)
-
-print("| Dummy rendering:")
-print("|   bbox (%.6f %.6f - %.6f %.6f)" % (parameters.minlon, parameters.minlat, \
-                                            parameters.maxlon, parameters.maxlat))
-print("|   pagesize %.1fcm x %.1fcm" % (parameters.pagewidth, parameters.pageheight))
-print("|   filename %s.pdf" % parameters.basefilename)
-if parameters.temptrackfile:
-    print("|   temptrackfile = %s" % parameters.temptrackfile)
-if parameters.tempwaypointfile:
-    print("|   tempwaypointfile = %s" % parameters.tempwaypointfile)
-print("|   gpxfiles = %s" % ', '.join(parameters.gpxfiles))
+def render(parameters):
+    output = "| Dummy rendering:\n"
+    output += "|   bbox (%.6f %.6f - %.6f %.6f)\n" % (parameters.minlon, parameters.minlat, \
+                                                  parameters.maxlon, parameters.maxlat)
+    output += "|   pagesize %.1fcm x %.1fcm\n" % (parameters.pagewidth, parameters.pageheight)
+    output += "|   filename %s.pdf\n" % parameters.basefilename
+    if parameters.temptrackfile:
+        output += "|   temptrackfile = %s\n" % parameters.temptrackfile
+    if parameters.tempwaypointfile:
+        output += "|   tempwaypointfile = %s\n" % parameters.tempwaypointfile
+    output += "|   gpxfiles = %s\n" % ', '.join(parameters.gpxfiles)
+    return output
+
+
+def run_worker():
+    # announce the protocol, then answer every job read from stdin
+    print(json.dumps({ 'protocol': 'hikingmap-worker', 'version': 1 }), flush = True)
+    for line in sys.stdin:
+        job = json.loads(line)
+        starttime = time.perf_counter()
+        answer = { 'id': job['id'] }
+        try:
+            answer['output'] = render(argparse.Namespace(mode = 'bbox', **job))
+            answer['status'] = 'ok'
+        except Exception as e:
+            answer['errors'] = "%s\n" % e
+            answer['status'] = 'error'
+        answer['seconds'] = time.perf_counter() - starttime
+        print(json.dumps(answer), flush = True)
+
 
+# MAIN
+if '--worker' in sys.argv[1:]:
+    run_worker()
+else:
+    parameters = parse_commandline()
+    assure_bbox_mode(parameters)
+    print(render(parameters), end = '')
@@ -15,6 +15,9 @@ setuptools.setup(
     url="https://github.com/roelderickx/hikingmap",
     packages=setuptools.find_packages(),
     python_requires='>=3.7',
+    extras_require={
+        'numpy': ['numpy']
+    },
     entry_points={
         'console_scripts': ['hikingmap = hikingmap.hikingmap:main']
     },
@@ -0,0 +1,59 @@
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ export PYTHONPATH=$TESTDIR/..
+
+api:
+  $ $PYTHON - $TESTDIR/test1.gpx <<EOF
+  > import sys, threading
+  > from hikingmap import Tracks, LayoutCalculator
+  > tracks = Tracks(lambda message: None)
+  > tracks.parse_files(sys.argv[1:])
+  > points = [ list(zip(track.lon, track.lat)) for track in tracks.tracks ]
+  > calculator = LayoutCalculator(generate_overview=True, page_order='book')
+  > layout = calculator.calculate(points)
+  > print(layout['trackorder'])
+  > for page in layout['pages']:
+  >     if page is None:
+  >         print('blank')
+  >     else:
+  >         print('%d %s %.6f,%.6f - %.6f,%.6f' % (page['pageindex'], page['orientation'], \
+  >                     page['minlon'], page['minlat'], page['maxlon'], page['maxlat']))
+  > print(sum(len(track_waypoints) for track_waypoints in layout['waypoints']))
+  > results = [ None ] * 4
+  > def calculate(i):
+  >     results[i] = calculator.calculate(points)
+  > threads = [ threading.Thread(target=calculate, args=(i,)) for i in range(4) ]
+  > for thread in threads:
+  >     thread.start()
+  > for thread in threads:
+  >     thread.join()
+  > print(all(result == layout for result in results))
+  > EOF
+  [0, 1, 3, 2, 4, 5]
+  blank
+  0 landscape -0.044192,50.060627 - 0.554202,50.328274
+  1 portrait 0.102233,50.070969 - 0.242452,50.199985
+  6 landscape 0.224245,50.096971 - 0.425416,50.186878
+  5 portrait 0.403588,50.104238 - 0.543777,50.233254
+  2 portrait -0.033767,50.188916 - 0.106803,50.317932
+  3 landscape 0.103441,50.159360 - 0.304983,50.249267
+  4 landscape 0.297965,50.185425 - 0.499544,50.275332
+  188
+  True
+
+pagerender:
+  $ $PYTHON - $TESTDIR/render-test.py $TESTDIR/test3.gpx <<EOF
+  > import sys
+  > from hikingmap import Coordinate, Area, Page
+  > page = Page(1, 50000, 20.0, 28.7, 1.0, False)
+  > page.set_page_area(Area(Coordinate(0.2, 36.2), Coordinate(0.3, 36.3)))
+  > page.set_orientation(page.orientation_portrait)
+  > print(page.render(sys.argv[1], [], 'detail.1', None, sys.argv[2:], False))
+  > print(page.render('false', [], 'detail.1', None, sys.argv[2:], False))
+  > EOF
+  | Test rendering:
+  |   bbox (0.200000 36.200000 - 0.300000 36.300000)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename detail.1.pdf
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  True
+  False
@@ -0,0 +1,47 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+cliptracks:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 0 --clip-tracks -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep "^\(detail\||   gpxfiles\|Removing\)"
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  |   gpxfiles = .*hikingmap_temp_tracks_1_.*.gpx (re)
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  |   gpxfiles = .*hikingmap_temp_tracks_2_.*.gpx (re)
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  |   gpxfiles = .*hikingmap_temp_tracks_3_.*.gpx (re)
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  |   gpxfiles = .*hikingmap_temp_tracks_4_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_tracks_1_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_tracks_2_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_tracks_3_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_tracks_4_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_overview.*.gpx (re)
+
+manifest:
+  $ hikingmap plan -m $TESTDIR/manifest -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --clip-tracks -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py > /dev/null
+  $ ls $TESTDIR/manifest/tracks
+  1.gpx
+  2.gpx
+  3.gpx
+  4.gpx
+  $ xmllint --format $TESTDIR/test3.gpx | grep -c "<trkpt"
+  3061
+  $ for f in $TESTDIR/manifest/tracks/*.gpx; do xmllint --format $f | grep -c "<trkpt"; done
+  980
+  780
+  1195
+  924
+  $ hikingmap execute $TESTDIR/manifest --pages 2 | grep "gpxfiles"
+  |   gpxfiles = .*/hikingmap/test/manifest/tracks/3.gpx (re)
+  $ rm -rf $TESTDIR/manifest
+
+clipmargin:
+  $ hikingmap plan -m $TESTDIR/manifest -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --clip-tracks --clip-margin 0 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py > /dev/null
+  $ for f in $TESTDIR/manifest/tracks/*.gpx; do xmllint --format $f | grep -c "<trkseg"; done
+  2
+  2
+  4
+  4
+  $ rm -rf $TESTDIR/manifest
@@ -0,0 +1,54 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+clipwaypoints:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 1 -u km --clip-waypoints -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep "^\(detail\||   \(temp\|bbox\)\|Removing\)"
+  |   bbox (-0.040328 36.220999 - 0.321785 36.640096)
+  |   temptrackfile = .*hikingmap_temp_overview.*.gpx (re)
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  |   bbox (0.201255 36.242158 - 0.312732 36.371175)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints_1_.*.gpx (re)
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  |   bbox (0.109946 36.355882 - 0.270172 36.445788)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints_2_.*.gpx (re)
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  |   bbox (-0.023655 36.426579 - 0.136694 36.516486)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints_3_.*.gpx (re)
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  |   bbox (-0.031275 36.489921 - 0.080589 36.618937)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints_4_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_waypoints_1_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_waypoints_2_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_waypoints_3_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_waypoints_4_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_overview.*.gpx (re)
+  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | grep -c "<wpt"
+  30
+  $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
+
+clipmargin:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 1 -u km --clip-waypoints --clip-margin 0 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py > /dev/null
+  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | grep -c "<wpt"
+  24
+  $ rm -f $TESTDIR/tempwaypointfile.gpx
+
+manifest:
+  $ hikingmap plan -m $TESTDIR/manifest -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 1 -u km --clip-waypoints -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py > /dev/null
+  $ ls $TESTDIR/manifest $TESTDIR/manifest/waypoints
+  .*/hikingmap/test/manifest: (re)
+  completed
+  gpx
+  manifest.json
+  waypoints
+  
+  .*/hikingmap/test/manifest/waypoints: (re)
+  1.gpx
+  2.gpx
+  3.gpx
+  4.gpx
+  $ hikingmap execute $TESTDIR/manifest --pages 3 | grep "tempwaypointfile"
+  |   tempwaypointfile = .*/hikingmap/test/manifest/waypoints/4.gpx (re)
+  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | grep -c "<wpt"
+  30
+  $ rm -rf $TESTDIR/manifest $TESTDIR/tempwaypointfile.gpx
@@ -0,0 +1,57 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# hikingmap -- render maps on paper using data from OpenStreetMap
+# Copyright (C) 2019  Roel Derickx <roel.derickx AT gmail>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse, sys
+from lxml import etree
+
+GPX_NAMESPACE = '{http://www.topografix.com/GPX/1/0}'
+
+def parse_commandline():
+    parser = argparse.ArgumentParser(description = "Compare the waypoints of two gpx files")
+    parser.add_argument('--tolerance', type = float, default = 1e-9, \
+                        help = "maximum difference in degrees (default: %(default)s)")
+    parser.add_argument(dest = 'gpxfiles', nargs = 2, \
+                        help = "the gpx files to compare")
+    return parser.parse_args()
+
+
+def read_waypoints(gpxfile):
+    return [ (float(wpt.get('lon')), float(wpt.get('lat')), wpt.findtext(GPX_NAMESPACE + 'name')) \
+                for wpt in etree.parse(gpxfile).iter(GPX_NAMESPACE + 'wpt') ]
+
+
+# MAIN
+# Prints the waypoints which differ, nothing when all waypoints are the same
+# within the tolerance. The waypoints calculated with numpy may differ from the
+# ones calculated without in the last digits.
+parameters = parse_commandline()
+(waypoints1, waypoints2) = [ read_waypoints(f) for f in parameters.gpxfiles ]
+if len(waypoints1) != len(waypoints2):
+    print("%d waypoints instead of %d" % (len(waypoints1), len(waypoints2)))
+    sys.exit(1)
+
+equal = True
+for (index, ((lon1, lat1, name1), (lon2, lat2, name2))) in \
+        enumerate(zip(waypoints1, waypoints2)):
+    if name1 != name2 or abs(lon1 - lon2) > parameters.tolerance or \
+       abs(lat1 - lat2) > parameters.tolerance:
+        print("waypoint %d: %s %.15f,%.15f instead of %s %.15f,%.15f" % \
+                (index, name1, lon1, lat1, name2, lon2, lat2))
+        equal = False
+sys.exit(0 if equal else 1)
@@ -0,0 +1,47 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+  $ gzip -c $TESTDIR/test3.gpx > $TESTDIR/test3.gpx.gz
+  $ bzip2 -c $TESTDIR/test3.gpx > $TESTDIR/test3.gpx.bz2
+  $ xz -c $TESTDIR/test3.gpx > $TESTDIR/test3.gpx.xz
+
+gzip:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx.gz -- $TESTDIR/render-test.py | grep "^\(Reading\|detail\||   gpxfiles\|Removing\)"
+  Reading file .*/hikingmap/test/test3.gpx.gz (re)
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  |   gpxfiles = .*hikingmap_temp_gpx.*.gpx (re)
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  |   gpxfiles = .*hikingmap_temp_gpx.*.gpx (re)
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  |   gpxfiles = .*hikingmap_temp_gpx.*.gpx (re)
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  |   gpxfiles = .*hikingmap_temp_gpx.*.gpx (re)
+  Removing temp file .*hikingmap_temp_gpx.*.gpx (re)
+
+bzip2:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx.bz2 -- $TESTDIR/render-test.py | grep "^detail"
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+
+xz:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx.xz -- $TESTDIR/render-test.py | grep "^detail"
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+
+cliptracks:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --clip-tracks -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx.xz -- $TESTDIR/render-test.py | grep "^Removing"
+  Removing temp file .*hikingmap_temp_tracks_1_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_tracks_2_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_tracks_3_.*.gpx (re)
+  Removing temp file .*hikingmap_temp_tracks_4_.*.gpx (re)
+
+manifest:
+  $ hikingmap plan -m $TESTDIR/manifest -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx.bz2 -- $TESTDIR/render-test.py > /dev/null
+  $ ls $TESTDIR/manifest/gpx
+  0_test3.gpx
+  $ cmp $TESTDIR/manifest/gpx/0_test3.gpx $TESTDIR/test3.gpx
+  $ rm -rf $TESTDIR/manifest $TESTDIR/test3.gpx.gz $TESTDIR/test3.gpx.bz2 $TESTDIR/test3.gpx.xz
@@ -0,0 +1,45 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+exactendpoints:
+  $ hikingmap --debug -v -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 -b $TESTDIR/detail. --gpx $TESTDIR/test4.gpx -- $TESTDIR/render-test.py
+  Reading file .*/hikingmap/test/test4.gpx (re)
+  Found track track 000
+  => new track 0
+  Found track track 001
+  => new track 1
+  Found track track 002
+  => new track 2
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 6 track permutations
+  Found track permutation with 1 pages
+  Pruned 5 of 6 track permutations
+  Page order is naturalorder
+  detail map 1 (portrait): 0.064222,36.242992 - 0.175778,36.372008
+  | Test rendering:
+  |   bbox (0.064222 36.242992 - 0.175778 36.372008)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.0.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test4.gpx (re)
+
+jointolerance:
+  $ hikingmap --debug -v -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --join-tolerance 5 -b $TESTDIR/detail. --gpx $TESTDIR/test4.gpx -- $TESTDIR/render-test.py
+  Reading file .*/hikingmap/test/test4.gpx (re)
+  Found track track 000
+  => new track 0
+  Found track track 001
+  => connecting after track 0
+  Found track track 002
+  => same startpoint as track 0: reversing track
+  => connecting before track 0
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 1 track permutations
+  Found track permutation with 1 pages
+  Page order is naturalorder
+  detail map 1 (portrait): 0.069229,36.245492 - 0.180771,36.374508
+  | Test rendering:
+  |   bbox (0.069229 36.245492 - 0.180771 36.374508)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.0.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test4.gpx (re)
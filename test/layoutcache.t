@@ -0,0 +1,91 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+calculate:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 1 -u km -o rectoverso --layout-cache $TESTDIR/layoutcache -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep -v "^|"
+  Reading file .*/hikingmap/test/test3.gpx (re)
+  Found track track 000
+  => new track 0
+  Found track track 001
+  => new track 1
+  Found track track 002
+  => new track 2
+  Found track track 003
+  => new track 3
+  Generating waypoints for track 0: 0.115582,36.429966 - 0.113308,36.426573
+  Total track distance: 0.47 km
+  Generating waypoints for track 1: 0.033205,36.488041 - 0.031212,36.487269
+  Total track distance: 0.20 km
+  Generating waypoints for track 2: 0.261325,36.34589 - 0.264876,36.342772
+  Total track distance: 0.48 km
+  Generating waypoints for track 3: 0.308385,36.244406 - 0.001886,36.594681
+  Total track distance: 107.84 km
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 24 track permutations
+  Found track permutation with 6 pages
+  Found track permutation with 5 pages
+  Found track permutation with 4 pages
+  Pruned 21 of 24 track permutations
+  Page order is rectoverso, new order = 0 2 1 3 4
+  overview map (portrait): -0.040328,36.220999 - 0.321785,36.640096, scale = 1:162420
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
+  Removing temp file .*hikingmap_temp_overview.*.gpx (re)
+
+cached:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 1 -u km -o rectoverso --layout-cache $TESTDIR/layoutcache -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py
+  Using cached page layout
+  Page order is rectoverso, new order = 0 2 1 3 4
+  overview map (portrait): -0.040328,36.220999 - 0.321785,36.640096, scale = 1:162420
+  | Test rendering:
+  |   bbox (-0.040328 36.220999 - 0.321785 36.640096)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.0.pdf (re)
+  |   temptrackfile = .*hikingmap_temp_overview.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  | Test rendering:
+  |   bbox (0.109946 36.355882 - 0.270172 36.445788)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.1.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  | Test rendering:
+  |   bbox (0.201255 36.242158 - 0.312732 36.371175)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.2.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  | Test rendering:
+  |   bbox (-0.023655 36.426579 - 0.136694 36.516486)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.3.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  | Test rendering:
+  |   bbox (-0.031275 36.489921 - 0.080589 36.618937)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.4.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
+  Removing temp file .*hikingmap_temp_overview.*.gpx (re)
+  $ xmllint --format $TESTDIR/tempoverviewfile.gpx | diff -uNr - $TESTDIR/test3_overview.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test3_waypoints.xml
+  $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
+
+recalculate:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 1 -u km -o rectoverso --layout-cache $TESTDIR/layoutcache --recalculate -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep -c "Reading file"
+  1
+  $ hikingmap -s 25000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 1 -u km -o rectoverso --layout-cache $TESTDIR/layoutcache -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep -c "Reading file"
+  1
+  $ ls $TESTDIR/layoutcache | wc -l
+  2
+  $ rm -rf $TESTDIR/layoutcache
@@ -0,0 +1,72 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+plan:
+  $ hikingmap plan -m $TESTDIR/manifest -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 1 -u km -o book -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep -v "^\(Found\|=>\|Pruned\|This\|Calculating\|Generating\|Total\)"
+  Reading file .*/hikingmap/test/test3.gpx (re)
+  Page order is book, new order = X 0 1 X X 2 3 4
+  WARNING: blank pages are not generated!
+  Manifest with 5 pages written to .*/hikingmap/test/manifest (re)
+  Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
+  Removing temp file .*hikingmap_temp_overview.*.gpx (re)
+  $ ls $TESTDIR/manifest $TESTDIR/manifest/gpx
+  .*/hikingmap/test/manifest: (re)
+  completed
+  gpx
+  manifest.json
+  overview.gpx
+  waypoints.gpx
+  
+  .*/hikingmap/test/manifest/gpx: (re)
+  0_test3.gpx
+
+execute:
+  $ hikingmap execute $TESTDIR/manifest --shard 1/2 --render-jobs 2
+  Rendering 3 of 5 pages
+  overview map (portrait): -0.040328,36.220999 - 0.321785,36.640096, scale = 1:162420
+  | Test rendering:
+  |   bbox (-0.040328 36.220999 - 0.321785 36.640096)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.1.pdf (re)
+  |   temptrackfile = .*/hikingmap/test/manifest/overview.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/manifest/gpx/0_test3.gpx (re)
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  | Test rendering:
+  |   bbox (0.109946 36.355882 - 0.270172 36.445788)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.5.pdf (re)
+  |   tempwaypointfile = .*/hikingmap/test/manifest/waypoints.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/manifest/gpx/0_test3.gpx (re)
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  | Test rendering:
+  |   bbox (-0.031275 36.489921 - 0.080589 36.618937)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.7.pdf (re)
+  |   tempwaypointfile = .*/hikingmap/test/manifest/waypoints.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/manifest/gpx/0_test3.gpx (re)
+  $ hikingmap execute $TESTDIR/manifest --check
+  2 of 5 pages not completed: 2, 6
+  [1]
+  $ hikingmap execute $TESTDIR/manifest --shard 2/2 --check
+  2 of 2 pages not completed: 2, 6
+  [1]
+  $ hikingmap execute $TESTDIR/manifest --pages 2,6-7 | grep "^\(Rendering\|detail\)"
+  Rendering 3 of 5 pages
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  $ hikingmap execute $TESTDIR/manifest --check
+  All 5 pages completed
+  $ xmllint --format $TESTDIR/tempoverviewfile.gpx | diff -uNr - $TESTDIR/test3_overview.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test3_waypoints.xml
+  $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
+
+invalid:
+  $ hikingmap execute $TESTDIR/manifest --shard 3/2
+  Invalid shard 3/2, expected I/N with 1 <= I <= N
+  [1]
+  $ hikingmap execute $TESTDIR/manifest --pages 0,1
+  Pages not in the manifest: 0
+  [1]
+  $ rm -rf $TESTDIR/manifest
@@ -0,0 +1,62 @@
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ export PYTHONPATH=$TESTDIR/..
+  $ $PYTHON -c "import numpy" 2> /dev/null || exit 80
+
+waypoints:
+  $ $PYTHON - $TESTDIR/test1.gpx $TESTDIR/test2.gpx $TESTDIR/test3.gpx <<EOF
+  > import sys
+  > from hikingmap import tracks as tracksmodule
+  > def calculate_waypoints(gpxfile):
+  >     tracks = tracksmodule.Tracks(lambda message: None)
+  >     tracks.parse_files([ gpxfile ])
+  >     tracks.calculate_waypoints(1, 'km')
+  >     return [ waypoint for track_waypoints in tracks.waypoints for waypoint in track_waypoints ]
+  > numpy = tracksmodule.numpy
+  > for gpxfile in sys.argv[1:]:
+  >     tracksmodule.numpy = numpy
+  >     vectorized = calculate_waypoints(gpxfile)
+  >     tracksmodule.numpy = None
+  >     scalar = calculate_waypoints(gpxfile)
+  >     print(len(vectorized), len(scalar), \
+  >           [ description for (_, description) in vectorized ] == \
+  >               [ description for (_, description) in scalar ], \
+  >           max(max(abs(v.lon - s.lon), abs(v.lat - s.lat)) \
+  >                   for ((v, _), (s, _)) in zip(vectorized, scalar)) < 1e-9)
+  > EOF
+  188 188 True True
+  421 421 True True
+  111 111 True True
+
+pages:
+  $ $PYTHON $TESTDIR/../benchmark/generate.py -s loop -n 20000 $TESTDIR/loop.gpx
+  $ $PYTHON - $TESTDIR/test1.gpx $TESTDIR/test2.gpx $TESTDIR/test3.gpx $TESTDIR/loop.gpx <<EOF
+  > import sys
+  > from hikingmap import trackfinder as trackfindermodule
+  > from hikingmap.tracks import Tracks
+  > def calculate_pages(tracks, scale):
+  >     trackfinder = trackfindermodule.TrackFinder(scale, 20.0, 28.7, 1.0, False, \
+  >                                                 log=lambda message: None)
+  >     trackfinder.calculate_pages(tracks, 1, 'nearest', 0)
+  >     return [ page.to_string() for page in trackfinder.pages ]
+  > numpy = trackfindermodule.numpy
+  > for gpxfile in sys.argv[1:]:
+  >     tracks = Tracks(lambda message: None)
+  >     tracks.parse_files([ gpxfile ])
+  >     for scale in (25000, 100000):
+  >         trackfindermodule.numpy = numpy
+  >         vectorized = calculate_pages(tracks, scale)
+  >         trackfindermodule.numpy = None
+  >         scalar = calculate_pages(tracks, scale)
+  >         print(max(len(track) for track in tracks.tracks) >= \
+  >                   trackfindermodule.MIN_POINTS_TRACK_COVERAGE, \
+  >               len(vectorized), vectorized == scalar)
+  > EOF
+  True 15 True
+  True 3 True
+  True 41 True
+  True 9 True
+  True 9 True
+  True 2 True
+  True 58 True
+  True 14 True
+  $ rm -f $TESTDIR/loop.gpx
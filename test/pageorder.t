@@ -167,7 +167,7 @@ rectoversoorder:
   Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
   Removing temp file .*hikingmap_temp_overview.*.gpx (re)
   $ xmllint --format $TESTDIR/tempoverviewfile.gpx | diff -uNr - $TESTDIR/test2_overview.xml
-  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | diff -uNr - $TESTDIR/test2_waypoints.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test2_waypoints.xml
   $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
 
 bookorder:
@@ -336,6 +336,6 @@ bookorder:
   Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
   Removing temp file .*hikingmap_temp_overview.*.gpx (re)
   $ xmllint --format $TESTDIR/tempoverviewfile.gpx | diff -uNr - $TESTDIR/test2_overview.xml
-  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | diff -uNr - $TESTDIR/test2_waypoints.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test2_waypoints.xml
   $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
 
@@ -0,0 +1,155 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+jobs:
+  $ hikingmap --debug -v -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 1 -u km -o naturalorder -j 4 -b $TESTDIR/detail. --gpx $TESTDIR/test1.gpx -- $TESTDIR/render-test.py
+  Reading file .*/hikingmap/test/test1.gpx (re)
+  Found track track 000
+  => new track 0
+  Found track track 001
+  => new track 1
+  Found track track 002
+  => new track 2
+  Found track track 003
+  => new track 3
+  Found track track 004
+  => new track 4
+  Found track track 005
+  => new track 5
+  Generating waypoints for track 0: 0.202043,50.15133 - 0.142642,50.121724
+  Total track distance: 7.32 km
+  Generating waypoints for track 1: 0.014733,50.23897 - 0.057488,50.2679
+  Total track distance: 7.76 km
+  Generating waypoints for track 2: 0.240819,50.203693 - 0.271912,50.249238
+  Total track distance: 7.52 km
+  Generating waypoints for track 3: 0.00058,50.242979 - 0.206156,50.196791
+  Total track distance: 123.40 km
+  Generating waypoints for track 4: 0.538902,50.177782 - 0.524084,50.149292
+  Total track distance: 3.77 km
+  Generating waypoints for track 5: 0.198391,50.197266 - 0.360945,50.137978
+  Total track distance: 35.01 km
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 720 track permutations
+  Found track permutation with 7 pages
+  Found track permutation with 6 pages
+  Pruned \d+ of 720 track permutations (re)
+  Page order is naturalorder
+  overview map (landscape): -0.044192,50.060627 - 0.554202,50.328274, scale = 1:148846
+  | Test rendering:
+  |   bbox (-0.044192 50.060627 - 0.554202 50.328274)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.0.pdf (re)
+  |   temptrackfile = .*hikingmap_temp_overview.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test1.gpx (re)
+  detail map 1 (portrait): 0.102233,50.070969 - 0.242452,50.199985
+  | Test rendering:
+  |   bbox (0.102233 50.070969 - 0.242452 50.199985)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.1.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test1.gpx (re)
+  detail map 2 (portrait): -0.033767,50.188916 - 0.106803,50.317932
+  | Test rendering:
+  |   bbox (-0.033767 50.188916 - 0.106803 50.317932)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.2.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test1.gpx (re)
+  detail map 3 (landscape): 0.103441,50.15936 - 0.304983,50.249267
+  | Test rendering:
+  |   bbox (0.103441 50.159360 - 0.304983 50.249267)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.3.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test1.gpx (re)
+  detail map 4 (landscape): 0.297965,50.185425 - 0.499544,50.275332
+  | Test rendering:
+  |   bbox (0.297965 50.185425 - 0.499544 50.275332)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.4.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test1.gpx (re)
+  detail map 5 (portrait): 0.403588,50.104238 - 0.543777,50.233254
+  | Test rendering:
+  |   bbox (0.403588 50.104238 - 0.543777 50.233254)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.5.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test1.gpx (re)
+  detail map 6 (landscape): 0.224245,50.096971 - 0.425416,50.186878
+  | Test rendering:
+  |   bbox (0.224245 50.096971 - 0.425416 50.186878)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.6.pdf (re)
+  |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test1.gpx (re)
+  Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
+  Removing temp file .*hikingmap_temp_overview.*.gpx (re)
+  $ xmllint --format $TESTDIR/tempoverviewfile.gpx | diff -uNr - $TESTDIR/test1_overview.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test1_waypoints.xml
+  $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
+
+nearestorder:
+  $ hikingmap --debug -v -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 -o naturalorder --permutation-order nearest -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py
+  Reading file .*/hikingmap/test/test3.gpx (re)
+  Found track track 000
+  => new track 0
+  Found track track 001
+  => new track 1
+  Found track track 002
+  => new track 2
+  Found track track 003
+  => new track 3
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 24 track permutations
+  Found track permutation with 6 pages
+  Found track permutation with 5 pages
+  Found track permutation with 4 pages
+  Pruned 21 of 24 track permutations
+  Page order is naturalorder
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  | Test rendering:
+  |   bbox (0.201255 36.242158 - 0.312732 36.371175)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.0.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  | Test rendering:
+  |   bbox (0.109946 36.355882 - 0.270172 36.445788)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.1.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  | Test rendering:
+  |   bbox (-0.023655 36.426579 - 0.136694 36.516486)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.2.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  | Test rendering:
+  |   bbox (-0.031275 36.489921 - 0.080589 36.618937)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.3.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+
+optimizeseconds:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --optimize-seconds 2 -b $TESTDIR/detail. --gpx $TESTDIR/test1.gpx $TESTDIR/test2.gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep -E "^(Too many|Optimizing|Evaluated)"
+  Too many tracks to calculate all track permutations
+  Optimizing track order during 2 seconds
+  Evaluated \d+ track orders in 2\.\d seconds (re)
+
+notracks:
+  $ cat > $TESTDIR/waypoints.gpx <<EOF
+  > <?xml version="1.0" encoding="UTF-8"?>
+  > <gpx version="1.0" creator="hikingmap" xmlns="http://www.topografix.com/GPX/1/0">
+  >   <wpt lat="36.3" lon="0.2"><name>start</name></wpt>
+  > </gpx>
+  > EOF
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 -b $TESTDIR/detail. --gpx $TESTDIR/waypoints.gpx -- $TESTDIR/render-test.py
+  Reading file .*/hikingmap/test/waypoints.gpx (re)
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 1 track permutations
+  Found track permutation with 0 pages
+  Page order is naturalorder
+  $ rm -f $TESTDIR/waypoints.gpx
@@ -0,0 +1,64 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/..:$TESTDIR/plugin $PYTHON -m hikingmap"
+  $ mkdir -p $TESTDIR/plugin/hm_render_test-1.0.dist-info
+  $ cat > $TESTDIR/plugin/hm_render_test-1.0.dist-info/METADATA <<EOF
+  > Metadata-Version: 2.1
+  > Name: hm-render-test
+  > Version: 1.0
+  > EOF
+  $ cat > $TESTDIR/plugin/hm_render_test-1.0.dist-info/entry_points.txt <<EOF
+  > [hikingmap.renderers]
+  > hm-render-test = hm_render_test:TestRenderer
+  > true = hm_render_test:TestRenderer
+  > false = hm_render_test:BrokenRenderer
+  > EOF
+  $ cat > $TESTDIR/plugin/hm_render_test.py <<EOF
+  > class TestRenderer:
+  >     def __init__(self, renderoptions):
+  >         print("Loading test renderer with options %s" % ' '.join(renderoptions))
+  >     def render(self, request):
+  >         return "| page %d: %.1fcm x %.1fcm, bbox (%.6f %.6f - %.6f %.6f), %s" % \
+  >                     (request.pageindex, request.pagewidth, request.pageheight, \
+  >                      request.minlon, request.minlat, request.maxlon, request.maxlat, \
+  >                      'track' if request.temptrackfile else 'no track')
+  >     def close(self):
+  >         print("Closing test renderer")
+  > class BrokenRenderer:
+  >     def __init__(self, renderoptions):
+  >         raise RuntimeError("broken")
+  > EOF
+
+plugin:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 0 --render-jobs 2 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- hm-render-test --style test | grep -v "^\(Found\|=>\|Pruned\|This\|Calculating\)"
+  Reading file .*/hikingmap/test/test3.gpx (re)
+  Page order is naturalorder
+  Loading test renderer with options --style test
+  Using renderer plugin hm-render-test
+  overview map (portrait): -0.040328,36.220999 - 0.321785,36.640096, scale = 1:162420
+  | page 0: 20.0cm x 28.7cm, bbox (-0.040328 36.220999 - 0.321785 36.640096), track
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  | page 1: 20.0cm x 28.7cm, bbox (0.201255 36.242158 - 0.312732 36.371175), no track
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  | page 2: 28.7cm x 20.0cm, bbox (0.109946 36.355882 - 0.270172 36.445788), no track
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  | page 3: 28.7cm x 20.0cm, bbox (-0.023655 36.426579 - 0.136694 36.516486), no track
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  | page 4: 20.0cm x 28.7cm, bbox (-0.031275 36.489921 - 0.080589 36.618937), no track
+  Closing test renderer
+  Removing temp file .*hikingmap_temp_overview.*.gpx (re)
+
+noplugins:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --no-render-plugins -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- true | grep -v "^\(Found\|=>\|Pruned\|This\|Calculating\)"
+  Reading file .*/hikingmap/test/test3.gpx (re)
+  Page order is naturalorder
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+
+fallback:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- false | grep "^Failed"
+  Failed to load renderer plugin false, using render command instead: broken
+  Failed to render 4 pages: 1, 2, 3, 4
+  $ rm -rf $TESTDIR/plugin
@@ -0,0 +1,11 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+profile:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 1 --profile $TESTDIR/profile.json -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep "^Profile"
+  Profile written to .*/hikingmap/test/profile.json (re)
+  $ $PYTHON -c "import json; p = json.load(open('$TESTDIR/profile.json')); print(' '.join(s['name'] for s in p['stages'])); print(' '.join('%s=%d' % (c, p['counters'][c]) for c in [ 'tracks_parsed', 'points_parsed', 'waypoints', 'permutations_calculated', 'permutations_pruned', 'pages_rendered', 'render_attempts' ]))"
+  parse_files calculate_waypoints write_waypoints_tempfile calculate_pages add_overview_page reorder_pages render
+  tracks_parsed=4 points_parsed=3061 waypoints=111 permutations_calculated=3 permutations_pruned=21 pages_rendered=5 render_attempts=5
+  $ rm -f $TESTDIR/profile.json $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
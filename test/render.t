@@ -0,0 +1,109 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+renderjobs:
+  $ hikingmap --debug -v -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 0 -o rectoverso --render-jobs 4 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py
+  Reading file .*/hikingmap/test/test3.gpx (re)
+  Found track track 000
+  => new track 0
+  Found track track 001
+  => new track 1
+  Found track track 002
+  => new track 2
+  Found track track 003
+  => new track 3
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 24 track permutations
+  Found track permutation with 6 pages
+  Found track permutation with 5 pages
+  Found track permutation with 4 pages
+  Pruned 21 of 24 track permutations
+  Page order is rectoverso, new order = 0 2 1 3 4
+  overview map (portrait): -0.040328,36.220999 - 0.321785,36.640096, scale = 1:162420
+  | Test rendering:
+  |   bbox (-0.040328 36.220999 - 0.321785 36.640096)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.0.pdf (re)
+  |   temptrackfile = .*hikingmap_temp_overview.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  | Test rendering:
+  |   bbox (0.109946 36.355882 - 0.270172 36.445788)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.1.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  | Test rendering:
+  |   bbox (0.201255 36.242158 - 0.312732 36.371175)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.2.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  | Test rendering:
+  |   bbox (-0.023655 36.426579 - 0.136694 36.516486)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.3.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  | Test rendering:
+  |   bbox (-0.031275 36.489921 - 0.080589 36.618937)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.4.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  Removing temp file .*hikingmap_temp_overview.*.gpx (re)
+
+renderretries:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --render-retries 2 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- false
+  Reading file .*/hikingmap/test/test3.gpx (re)
+  Found track track 000
+  => new track 0
+  Found track track 001
+  => new track 1
+  Found track track 002
+  => new track 2
+  Found track track 003
+  => new track 3
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 24 track permutations
+  Found track permutation with 6 pages
+  Found track permutation with 5 pages
+  Found track permutation with 4 pages
+  Pruned 21 of 24 track permutations
+  Page order is naturalorder
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  Rendering page 1 failed, retrying
+  Rendering page 1 failed, retrying
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  Rendering page 2 failed, retrying
+  Rendering page 2 failed, retrying
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  Rendering page 3 failed, retrying
+  Rendering page 3 failed, retrying
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  Rendering page 4 failed, retrying
+  Rendering page 4 failed, retrying
+  Failed to render 4 pages: 1, 2, 3, 4
+
+rendercache:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --render-cache $TESTDIR/rendercache -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep -E "^(detail map|Page|Render cache)"
+  Page order is naturalorder
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  Render cache: 0 hits, 4 misses, 0 entries evicted
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --render-cache $TESTDIR/rendercache -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep -E "^(detail map|Page|Render cache)"
+  Page order is naturalorder
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  Page 1 restored from render cache
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  Page 2 restored from render cache
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  Page 3 restored from render cache
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  Page 4 restored from render cache
+  Render cache: 4 hits, 0 misses, 0 entries evicted
+  $ ls $TESTDIR/rendercache | wc -l
+  4
+  $ rm -rf $TESTDIR/rendercache
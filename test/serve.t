@@ -0,0 +1,63 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+serve:
+  $ hikingmap serve --socket $TESTDIR/serve.sock --max-concurrent 2 > $TESTDIR/serve.log 2>&1 &
+  $ SERVER=$!
+  $ for i in `seq 50`; do [ -S $TESTDIR/serve.sock ] && break; sleep 0.1; done
+  $ cat > $TESTDIR/client.py <<EOF
+  > import sys, json, socket, http.client
+  > class UnixConnection(http.client.HTTPConnection):
+  >     def connect(self):
+  >         self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  >         self.sock.connect(sys.argv[1])
+  > def request(method, path, body=None):
+  >     connection = UnixConnection('localhost')
+  >     connection.request(method, path, json.dumps(body) if body is not None else None)
+  >     response = connection.getresponse()
+  >     return (response.status, response.getheader('X-Hikingmap-Cache'), json.loads(response.read()))
+  > with open(sys.argv[2]) as f:
+  >     content = f.read()
+  > for body in [ { 'gpx': [ content ], 'parameters': { 'waypt_distance': 0 } }, \
+  >               { 'gpx': [ content ], 'parameters': { 'waypt_distance': 0 } }, \
+  >               { 'files': [ sys.argv[2] ], 'parameters': { 'page_order': 'book' } }, \
+  >               { 'gpx': [ content ], 'parameters': { 'scale': 'large' } }, \
+  >               { 'gpx': [ '<gpx' ] }, \
+  >               { 'files': [ sys.argv[2] ], 'parameters': { 'unknown': 1 } } ]:
+  >     (status, cache, data) = request('POST', '/layout', body)
+  >     if status == 200:
+  >         print(status, cache, data['trackorder'], len(data['pages']), \
+  >               sum(len(track_waypoints) for track_waypoints in data['waypoints']))
+  >     else:
+  >         print(status, data['error'].split(':')[0])
+  > (status, cache, data) = request('GET', '/stats')
+  > print(status, data['requests'], data['errors'], data['max_concurrent'], sorted(data['latency']))
+  > print(data['track_cache'])
+  > print(data['layout_cache'])
+  > EOF
+  $ $PYTHON $TESTDIR/client.py $TESTDIR/serve.sock $TESTDIR/test1.gpx
+  200 miss [0, 1, 3, 2, 4, 5] 6 0
+  200 hit [0, 1, 3, 2, 4, 5] 6 0
+  200 miss [0, 1, 3, 2, 4, 5] 8 188
+  400 Invalid parameters
+  400 Invalid gpx
+  400 Unknown parameter unknown
+  200 6 3 2 ['max', 'mean', 'p50', 'p95']
+  {'size': 2, 'maxsize': 64, 'hits': 1, 'misses': 3}
+  {'size': 2, 'maxsize': 256, 'hits': 1, 'misses': 4}
+  $ kill $SERVER && wait $SERVER
+  $ [ -e $TESTDIR/serve.sock ] || echo removed
+  removed
+  $ cat $TESTDIR/serve.log
+  Listening on .*/serve.sock (re)
+  $ rm -f $TESTDIR/client.py $TESTDIR/serve.log $TESTDIR/serve.sock
+
+notasocket:
+  $ echo "not a socket" > $TESTDIR/serve.sock
+  $ hikingmap serve --socket $TESTDIR/serve.sock
+  .*/hikingmap/test/serve.sock exists and is not a socket (re)
+  [1]
+  $ cat $TESTDIR/serve.sock
+  not a socket
+  $ rm -f $TESTDIR/serve.sock
@@ -0,0 +1,54 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+simplify:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --simplify 0.2 -b $TESTDIR/detail. --gpx $TESTDIR/test1.gpx -- $TESTDIR/render-test.py | grep -v "^|"
+  Reading file .*/hikingmap/test/test1.gpx (re)
+  Found track track 000
+  => new track 0
+  Found track track 001
+  => new track 1
+  Found track track 002
+  => new track 2
+  Found track track 003
+  => new track 3
+  Found track track 004
+  => new track 4
+  Found track track 005
+  => new track 5
+  Simplified tracks from 6163 to 1514 points
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 720 track permutations
+  Found track permutation with 7 pages
+  Found track permutation with 6 pages
+  Pruned 718 of 720 track permutations
+  Adding 1 points which are not on any page
+  Calculating track order permutation resulting in a minimum amount of pages
+  This may take a while, checking 720 track permutations
+  Found track permutation with 7 pages
+  Found track permutation with 6 pages
+  Pruned 718 of 720 track permutations
+  Page order is naturalorder
+  detail map 1 (portrait): 0.102233,50.070969 - 0.242452,50.199985
+  detail map 2 (portrait): -0.033767,50.188916 - 0.106803,50.317932
+  detail map 3 (landscape): 0.10344,50.159494 - 0.304984,50.249401
+  detail map 4 (landscape): 0.297965,50.185633 - 0.499545,50.27554
+  detail map 5 (portrait): 0.403568,50.104135 - 0.543757,50.233152
+  detail map 6 (landscape): 0.224489,50.096968 - 0.42566,50.186875
+
+simplifycheck:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --simplify 0.2 --simplify-check -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-test.py | grep -E "^(Simplified|Unsimplified|Speedup)"
+  Simplified tracks from 3061 to 990 points
+  Simplified tracks: 4 pages in \d+\.\d+ seconds (re)
+  Unsimplified tracks: 4 pages in \d+\.\d+ seconds (re)
+  Speedup: \d+\.\dx (re)
+
+uncoveredpoints:
+  $ $PYTHON $TESTDIR/../benchmark/generate.py -s loop -n 20000 $TESTDIR/loop.gpx
+  $ hikingmap -s 25000 -w 0 --simplify 0.2 -b $TESTDIR/detail. --gpx $TESTDIR/loop.gpx -- $TESTDIR/render-test.py | grep -E "^(Adding|Found track permutation|[0-9]+ points)"
+  Found track permutation with 58 pages
+  Adding 3 points which are not on any page
+  Found track permutation with 58 pages
+  48 points are not on any page, although they are part of the simplified tracks
+  $ rm -f $TESTDIR/loop.gpx
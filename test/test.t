@@ -7,8 +7,22 @@ usage:
   usage: __main__.py [-h] [-s SCALE] [--pagewidth PAGEWIDTH]
                      [--pageheight PAGEHEIGHT] [--pageoverlap PAGEOVERLAP]
                      [--overview] [-w WAYPT_DISTANCE] [-u {km,mi}]
-                     [-o {naturalorder,rectoverso,book}] [-b OUTPUT_BASENAME]
-                     [-v] --gpx GPXFILES [GPXFILES ...]
+                     [--clip-waypoints] [--clip-tracks]
+                     [--clip-margin CLIP_MARGIN]
+                     [--join-tolerance JOIN_TOLERANCE] [--simplify SIMPLIFY]
+                     [--simplify-check] [-o {naturalorder,rectoverso,book}]
+                     [-j JOBS] [--permutation-order {input,nearest}]
+                     [--optimize-seconds OPTIMIZE_SECONDS]
+                     [--render-jobs RENDER_JOBS]
+                     [--render-timeout RENDER_TIMEOUT]
+                     [--render-retries RENDER_RETRIES]
+                     [--render-cache RENDER_CACHE]
+                     [--render-cache-size RENDER_CACHE_SIZE]
+                     [--no-render-plugins] [--render-workers]
+                     [--layout-cache LAYOUT_CACHE] [--recalculate]
+                     [--track-cache TRACK_CACHE] [--track-cache-hash]
+                     [-b OUTPUT_BASENAME] [--profile PROFILE] [-v]
+                     --gpx GPXFILES [GPXFILES ...]
                      [rendercommand] ...
   
   positional arguments:
@@ -32,12 +46,71 @@ usage:
                           (default: 1)
     -u, --unit {km,mi}    length unit in which the value of the waypoints
                           parameter is expressed (default: km)
+    --clip-waypoints      write the waypoints of every page to a separate file,
+                          only containing the waypoints on the page
+    --clip-tracks         write the tracks of every page to a separate file,
+                          clipped to the page, and render the pages with this
+                          file instead of the gpx files
+    --clip-margin CLIP_MARGIN
+                          margin in cm around the page within which waypoints
+                          and tracks are written for --clip-waypoints and
+                          --clip-tracks (default: 1.0)
+    --join-tolerance JOIN_TOLERANCE
+                          maximum distance in meters between the endpoints of
+                          tracks which are joined (default: 0)
+    --simplify SIMPLIFY   remove track points closer than N mm on paper to the
+                          simplified track before calculating the pages, 0 to
+                          disable (default: 0)
+    --simplify-check      compare the pages of the simplified tracks with the
+                          pages of the original tracks
     -o, --page-order {naturalorder,rectoverso,book}
                           order in which pages are generated (default:
                           naturalorder)
+    -j, --jobs JOBS       amount of processes used to calculate the track
+                          permutations (default: 1)
+    --permutation-order {input,nearest}
+                          order in which the track permutations are evaluated,
+                          either the input order or the nearest next track first
+                          (default: input)
+    --optimize-seconds OPTIMIZE_SECONDS
+                          time in seconds to search for a better track order
+                          when there are too many tracks to check all track
+                          permutations, 0 to use the input order (default: 0)
+    --render-jobs RENDER_JOBS
+                          amount of pages rendered at the same time (default: 1)
+    --render-timeout RENDER_TIMEOUT
+                          maximum time in seconds to render a single page
+                          (default: no limit)
+    --render-retries RENDER_RETRIES
+                          amount of times rendering a page is retried when it
+                          fails or times out (default: 0)
+    --render-cache RENDER_CACHE
+                          directory to cache rendered pages, pages which are
+                          rendered before with the same parameters are copied
+                          from the cache
+    --render-cache-size RENDER_CACHE_SIZE
+                          maximum size of the render cache in MB (default: 1024)
+    --no-render-plugins   always start the render command for every page, even
+                          when a renderer plugin with the same name is installed
+    --render-workers      start the render command once as a worker instead of
+                          for every page, when it supports running as a worker
+    --layout-cache LAYOUT_CACHE
+                          directory to cache the calculated pages, the gpx files
+                          are not read again when they and the layout parameters
+                          are unchanged
+    --recalculate         calculate the pages even when they are found in the
+                          layout cache
+    --track-cache TRACK_CACHE
+                          directory to cache the tracks read from the gpx files,
+                          files with the same size and modification time are not
+                          parsed again
+    --track-cache-hash    only use the track cache when the hash of the contents
+                          of the gpx files is unchanged as well
     -b, --basename OUTPUT_BASENAME
                           output filename, hikingmap will add the pagenumber and
                           extension (default: detail.)
+    --profile PROFILE     write the duration, memory usage and counters of every
+                          stage to this json file
     -v, --verbose         show verbose output
     --gpx GPXFILES [GPXFILES ...]
                           one or more GPX tracks
@@ -66,6 +139,7 @@ nooverview:
   Found track permutation with 6 pages
   Found track permutation with 5 pages
   Found track permutation with 4 pages
+  Pruned 21 of 24 track permutations
   Page order is naturalorder
   detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
   | Test rendering:
@@ -96,7 +170,7 @@ nooverview:
   |   tempwaypointfile = .*hikingmap_temp_waypoints.*.gpx (re)
   |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
   Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
-  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | diff -uNr - $TESTDIR/test3_waypoints.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test3_waypoints.xml
   $ rm -f $TESTDIR/tempwaypointfile.gpx
 
 nowaypoints:
@@ -115,6 +189,7 @@ nowaypoints:
   Found track permutation with 6 pages
   Found track permutation with 5 pages
   Found track permutation with 4 pages
+  Pruned 21 of 24 track permutations
   Page order is naturalorder
   overview map (portrait): -0.040328,36.220999 - 0.321785,36.640096, scale = 1:162420
   | Test rendering:
@@ -175,6 +250,7 @@ renderoptions:
   Found track permutation with 6 pages
   Found track permutation with 5 pages
   Found track permutation with 4 pages
+  Pruned 21 of 24 track permutations
   Page order is naturalorder
   overview map (portrait): -0.040328,36.220999 - 0.321785,36.640096, scale = 1:162420
   | Test rendering:
@@ -219,7 +295,7 @@ renderoptions:
   Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
   Removing temp file .*hikingmap_temp_overview.*.gpx (re)
   $ xmllint --format $TESTDIR/tempoverviewfile.gpx | diff -uNr - $TESTDIR/test3_overview.xml
-  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | diff -uNr - $TESTDIR/test3_waypoints.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test3_waypoints.xml
   $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
 
 test1:
@@ -253,6 +329,7 @@ test1:
   This may take a while, checking 720 track permutations
   Found track permutation with 7 pages
   Found track permutation with 6 pages
+  Pruned 718 of 720 track permutations
   Page order is naturalorder
   overview map (landscape): -0.044192,50.060627 - 0.554202,50.328274, scale = 1:148846
   | Test rendering:
@@ -306,7 +383,7 @@ test1:
   Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
   Removing temp file .*hikingmap_temp_overview.*.gpx (re)
   $ xmllint --format $TESTDIR/tempoverviewfile.gpx | diff -uNr - $TESTDIR/test1_overview.xml
-  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | diff -uNr - $TESTDIR/test1_waypoints.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test1_waypoints.xml
   $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
 
 test2:
@@ -474,7 +551,7 @@ test2:
   Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
   Removing temp file .*hikingmap_temp_overview.*.gpx (re)
   $ xmllint --format $TESTDIR/tempoverviewfile.gpx | diff -uNr - $TESTDIR/test2_overview.xml
-  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | diff -uNr - $TESTDIR/test2_waypoints.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test2_waypoints.xml
   $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
 
 test3:
@@ -501,6 +578,7 @@ test3:
   Found track permutation with 6 pages
   Found track permutation with 5 pages
   Found track permutation with 4 pages
+  Pruned 21 of 24 track permutations
   Page order is naturalorder
   overview map (portrait): -0.040328,36.220999 - 0.321785,36.640096, scale = 1:162420
   | Test rendering:
@@ -540,6 +618,6 @@ test3:
   Removing temp file .*hikingmap_temp_waypoints.*.gpx (re)
   Removing temp file .*hikingmap_temp_overview.*.gpx (re)
   $ xmllint --format $TESTDIR/tempoverviewfile.gpx | diff -uNr - $TESTDIR/test3_overview.xml
-  $ xmllint --format $TESTDIR/tempwaypointfile.gpx | diff -uNr - $TESTDIR/test3_waypoints.xml
+  $ $PYTHON $TESTDIR/compare-waypoints.py $TESTDIR/tempwaypointfile.gpx $TESTDIR/test3_waypoints.xml
   $ rm -f $TESTDIR/tempoverviewfile.gpx $TESTDIR/tempwaypointfile.gpx
 
@@ -0,0 +1,60 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+  $ cp $TESTDIR/test3.gpx $TESTDIR/trackcache.gpx
+
+store:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --track-cache $TESTDIR/trackcache -b $TESTDIR/detail. --gpx $TESTDIR/trackcache.gpx $TESTDIR/test1.gpx -- $TESTDIR/render-test.py | grep "^\(Reading\|detail\)"
+  Reading file .*/hikingmap/test/trackcache.gpx (re)
+  Reading file .*/hikingmap/test/test1.gpx (re)
+  detail map 1 (portrait): 0.058576,36.363749 - 0.170314,36.492765
+  detail map 2 (portrait): -0.023704,36.423147 - 0.088121,36.552163
+  detail map 3 (portrait): 0.207291,36.279823 - 0.31891,36.408839
+  detail map 4 (portrait): 0.201255,36.222407 - 0.312732,36.351423
+  detail map 5 (landscape): 0.122012,36.375362 - 0.28232,36.465269
+  detail map 6 (portrait): -0.032156,36.508914 - 0.079763,36.63793
+  detail map 7 (portrait): 0.102233,50.070969 - 0.242452,50.199985
+  detail map 8 (portrait): -0.033767,50.188916 - 0.106803,50.317932
+  detail map 9 (portrait): 0.187055,50.161957 - 0.327522,50.290974
+  detail map 10 (landscape): 0.024602,50.15621 - 0.226156,50.246117
+  detail map 11 (landscape): 0.324024,50.181998 - 0.525574,50.271905
+  detail map 12 (portrait): 0.403628,50.089762 - 0.543818,50.218779
+  detail map 13 (landscape): 0.224285,50.097 - 0.425457,50.186907
+  $ ls $TESTDIR/trackcache | wc -l
+  2
+
+load:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --track-cache $TESTDIR/trackcache -b $TESTDIR/detail. --gpx $TESTDIR/trackcache.gpx $TESTDIR/test1.gpx -- $TESTDIR/render-test.py | grep "^\(Reading\|detail\)"
+  Reading file .*/hikingmap/test/trackcache.gpx from track cache (re)
+  Reading file .*/hikingmap/test/test1.gpx from track cache (re)
+  detail map 1 (portrait): 0.058576,36.363749 - 0.170314,36.492765
+  detail map 2 (portrait): -0.023704,36.423147 - 0.088121,36.552163
+  detail map 3 (portrait): 0.207291,36.279823 - 0.31891,36.408839
+  detail map 4 (portrait): 0.201255,36.222407 - 0.312732,36.351423
+  detail map 5 (landscape): 0.122012,36.375362 - 0.28232,36.465269
+  detail map 6 (portrait): -0.032156,36.508914 - 0.079763,36.63793
+  detail map 7 (portrait): 0.102233,50.070969 - 0.242452,50.199985
+  detail map 8 (portrait): -0.033767,50.188916 - 0.106803,50.317932
+  detail map 9 (portrait): 0.187055,50.161957 - 0.327522,50.290974
+  detail map 10 (landscape): 0.024602,50.15621 - 0.226156,50.246117
+  detail map 11 (landscape): 0.324024,50.181998 - 0.525574,50.271905
+  detail map 12 (portrait): 0.403628,50.089762 - 0.543818,50.218779
+  detail map 13 (landscape): 0.224285,50.097 - 0.425457,50.186907
+
+modified:
+  $ touch -d "2001-01-01" $TESTDIR/trackcache.gpx
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --track-cache $TESTDIR/trackcache -b $TESTDIR/detail. --gpx $TESTDIR/trackcache.gpx $TESTDIR/test1.gpx -- $TESTDIR/render-test.py | grep "^Reading"
+  Reading file .*/hikingmap/test/trackcache.gpx (re)
+  Reading file .*/hikingmap/test/test1.gpx from track cache (re)
+
+hash:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --track-cache $TESTDIR/trackcache --track-cache-hash -b $TESTDIR/detail. --gpx $TESTDIR/trackcache.gpx -- $TESTDIR/render-test.py | grep "^Reading"
+  Reading file .*/hikingmap/test/trackcache.gpx (re)
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --track-cache $TESTDIR/trackcache --track-cache-hash -b $TESTDIR/detail. --gpx $TESTDIR/trackcache.gpx -- $TESTDIR/render-test.py | grep "^Reading"
+  Reading file .*/hikingmap/test/trackcache.gpx from track cache (re)
+
+corrupt:
+  $ for f in $TESTDIR/trackcache/*; do truncate -s 100 $f; done
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --track-cache $TESTDIR/trackcache -b $TESTDIR/detail. --gpx $TESTDIR/trackcache.gpx -- $TESTDIR/render-test.py | grep "^Reading"
+  Reading file .*/hikingmap/test/trackcache.gpx (re)
+  $ rm -rf $TESTDIR/trackcache $TESTDIR/trackcache.gpx
@@ -0,0 +1,149 @@
+  $ [ "$0" != "/bin/bash" ] || shopt -s expand_aliases
+  $ [ -n "$PYTHON" ] || PYTHON="`which python`"
+  $ alias hikingmap="TMPDIR=$TESTDIR PYTHONPATH=$TESTDIR/.. $PYTHON -m hikingmap"
+
+worker:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 --overview -w 0 --render-workers --render-jobs 2 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/../render-dummy/render-dummy.py | grep -v "^\(Found\|=>\|Pruned\|This\|Calculating\)"
+  Reading file .*/hikingmap/test/test3.gpx (re)
+  Page order is naturalorder
+  Using render workers of .*/hikingmap/test/../render-dummy/render-dummy.py (re)
+  overview map (portrait): -0.040328,36.220999 - 0.321785,36.640096, scale = 1:162420
+  | Dummy rendering:
+  |   bbox (-0.040328 36.220999 - 0.321785 36.640096)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.0.pdf (re)
+  |   temptrackfile = .*hikingmap_temp_overview.*.gpx (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  | Dummy rendering:
+  |   bbox (0.201255 36.242158 - 0.312732 36.371175)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.1.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  | Dummy rendering:
+  |   bbox (0.109946 36.355882 - 0.270172 36.445788)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.2.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  | Dummy rendering:
+  |   bbox (-0.023655 36.426579 - 0.136694 36.516486)
+  |   pagesize 28.7cm x 20.0cm
+  |   filename .*/hikingmap/test/detail.3.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  | Dummy rendering:
+  |   bbox (-0.031275 36.489921 - 0.080589 36.618937)
+  |   pagesize 20.0cm x 28.7cm
+  |   filename .*/hikingmap/test/detail.4.pdf (re)
+  |   gpxfiles = .*/hikingmap/test/test3.gpx (re)
+  Removing temp file .*hikingmap_temp_overview.*.gpx (re)
+
+noworkers:
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/../render-dummy/render-dummy.py | grep "^\(Using\||   filename\)"
+  |   filename .*/hikingmap/test/detail.0.pdf (re)
+  |   filename .*/hikingmap/test/detail.1.pdf (re)
+  |   filename .*/hikingmap/test/detail.2.pdf (re)
+  |   filename .*/hikingmap/test/detail.3.pdf (re)
+
+crash:
+  $ cat > $TESTDIR/render-crash.py <<EOF
+  > import sys, json
+  > print(json.dumps({ 'protocol': 'hikingmap-worker', 'version': 1 }), flush=True)
+  > job = json.loads(sys.stdin.readline())
+  > print("crashing on page %d" % job['pageindex'], file=sys.stderr, flush=True)
+  > EOF
+  $ chmod +x $TESTDIR/render-crash.py
+  $ sed -i "1i #!$PYTHON" $TESTDIR/render-crash.py
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --render-workers --render-retries 1 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-crash.py 2>&1 | grep -v "^\(Found\|=>\|Pruned\|This\|Calculating\)"
+  Reading file .*/hikingmap/test/test3.gpx (re)
+  Page order is naturalorder
+  Using render workers of .*/hikingmap/test/render-crash.py (re)
+  detail map 1 (portrait): 0.201255,36.242158 - 0.312732,36.371175
+  crashing on page 1
+  Render worker exited while rendering page 1
+  Rendering page 1 failed, retrying
+  crashing on page 1
+  Render worker exited while rendering page 1
+  detail map 2 (landscape): 0.109946,36.355882 - 0.270172,36.445788
+  crashing on page 2
+  Render worker exited while rendering page 2
+  Rendering page 2 failed, retrying
+  crashing on page 2
+  Render worker exited while rendering page 2
+  detail map 3 (landscape): -0.023655,36.426579 - 0.136694,36.516486
+  crashing on page 3
+  Render worker exited while rendering page 3
+  Rendering page 3 failed, retrying
+  crashing on page 3
+  Render worker exited while rendering page 3
+  detail map 4 (portrait): -0.031275,36.489921 - 0.080589,36.618937
+  crashing on page 4
+  Render worker exited while rendering page 4
+  Rendering page 4 failed, retrying
+  crashing on page 4
+  Render worker exited while rendering page 4
+  Failed to render 4 pages: 1, 2, 3, 4
+  $ rm -f $TESTDIR/render-crash.py
+
+timeout:
+  $ cat > $TESTDIR/render-hang.py <<EOF
+  > import sys, json, time
+  > print(json.dumps({ 'protocol': 'hikingmap-worker', 'version': 1 }), flush=True)
+  > for line in sys.stdin:
+  >     time.sleep(60)
+  > EOF
+  $ chmod +x $TESTDIR/render-hang.py
+  $ sed -i "1i #!$PYTHON" $TESTDIR/render-hang.py
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --render-workers --render-jobs 4 --render-timeout 0.5 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-hang.py 2>&1 | grep "^\(Rendering\|Failed\)" | sort
+  Failed to render 4 pages: 1, 2, 3, 4
+  Rendering page 1 timed out after 0.5 seconds
+  Rendering page 2 timed out after 0.5 seconds
+  Rendering page 3 timed out after 0.5 seconds
+  Rendering page 4 timed out after 0.5 seconds
+  $ rm -f $TESTDIR/render-hang.py
+
+invalidanswer:
+  $ cat > $TESTDIR/render-invalid.py <<EOF
+  > import sys, json
+  > print(json.dumps({ 'protocol': 'hikingmap-worker', 'version': 1 }), flush=True)
+  > for line in sys.stdin:
+  >     answer = [ [], 1, "x" ][json.loads(line)['pageindex'] % 3]
+  >     print(json.dumps(answer), flush=True)
+  > EOF
+  $ chmod +x $TESTDIR/render-invalid.py
+  $ sed -i "1i #!$PYTHON" $TESTDIR/render-invalid.py
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --render-workers --render-retries 1 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-invalid.py 2>&1 | grep "^\(Invalid\|Rendering\|Failed\)"
+  Invalid answer of render worker for page 1
+  Rendering page 1 failed, retrying
+  Invalid answer of render worker for page 1
+  Invalid answer of render worker for page 2
+  Rendering page 2 failed, retrying
+  Invalid answer of render worker for page 2
+  Invalid answer of render worker for page 3
+  Rendering page 3 failed, retrying
+  Invalid answer of render worker for page 3
+  Invalid answer of render worker for page 4
+  Rendering page 4 failed, retrying
+  Invalid answer of render worker for page 4
+  Failed to render 4 pages: 1, 2, 3, 4
+  $ rm -f $TESTDIR/render-invalid.py
+
+noprotocol:
+  $ cat > $TESTDIR/render-stdin.py <<EOF
+  > import sys
+  > if '--worker' in sys.argv:
+  >     sys.stdin.read()
+  > else:
+  >     print("rendering %s" % sys.argv[sys.argv.index('-b') + 1])
+  > EOF
+  $ chmod +x $TESTDIR/render-stdin.py
+  $ sed -i "1i #!$PYTHON" $TESTDIR/render-stdin.py
+  $ hikingmap -s 50000 --pagewidth 20.0 --pageheight 28.7 --pageoverlap 1.0 -w 0 --render-workers --render-timeout 5 -b $TESTDIR/detail. --gpx $TESTDIR/test3.gpx -- $TESTDIR/render-stdin.py 2>&1 | grep "^\(Using\|.*does not support\|rendering\)"
+  .*/hikingmap/test/render-stdin.py does not support running as a worker, using render command instead (re)
+  rendering .*/hikingmap/test/detail.0 (re)
+  rendering .*/hikingmap/test/detail.1 (re)
+  rendering .*/hikingmap/test/detail.2 (re)
+  rendering .*/hikingmap/test/detail.3 (re)
+  $ rm -f $TESTDIR/render-stdin.py